@@ -4,7 +4,10 @@ from vertexai.generative_models import GenerativeModel, Tool, Part, Content, Cha
 import vertexai.preview.generative_models as generative_models
 import googlemaps
 import json
-from typing import List, Dict, Any, Generator
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Generator, Tuple
+
+from geo import decode_polyline, sample_path
 
 # Initialize Vertex AI
 project_id = os.getenv("GOOGLE_CLOUD_PROJECT")
@@ -50,6 +53,46 @@ def search_places(query: str, location: str = None, radius: int = None, gmaps_cl
         print(f"Error searching places: {e}")
         return []
 
+# Waypoint naming and searches inside plan_trip. Separate from _tool_pool,
+# which plan_trip itself runs on, so the two can't starve each other.
+_plan_pool = ThreadPoolExecutor(max_workers=int(os.getenv("PLAN_TRIP_CONCURRENCY", "8")), thread_name_prefix="plan-trip")
+
+
+def _waypoint_city(gmaps_client, lat: float, lng: float, fallback: str) -> str:
+    """City (or county) name for a waypoint; fallback if the lookup fails."""
+    try:
+        reverse_result = gmaps_client.reverse_geocode((lat, lng))
+        city_name = "Unknown"
+        for component in reverse_result[0].get("address_components", []):
+            if "locality" in component.get("types", []):
+                city_name = component.get("long_name")
+                break
+            elif "administrative_area_level_2" in component.get("types", []):
+                city_name = component.get("long_name")
+        return city_name
+    except Exception:
+        return fallback
+
+
+def _stop_type_query(stop_type: str, city: str = None) -> str:
+    if stop_type == "gas stations":
+        return "gas station"
+    if stop_type == "restaurants":
+        return "restaurant"
+    if stop_type == "attractions":
+        return f"tourist attractions in {city}"
+    return stop_type
+
+
+def _search_waypoint(query: str, wp: Dict[str, Any], gmaps_client) -> List[Dict[str, Any]]:
+    print(f"    Searching: {query} near {wp['city'] or 'waypoint'}")
+    try:
+        return search_places(query, location=f"{wp['lat']},{wp['lng']}", radius=15000, gmaps_client=gmaps_client)
+    except Exception as search_error:
+        print(f"    Search error: {search_error}")
+        return []
+
+
 def plan_trip(origin: str, destination: str, stop_types: List[str] = None, gmaps_client: googlemaps.Client = None) -> Dict[str, Any]:
     """
     Plan a trip route, find waypoints, and search for places at each waypoint.
@@ -86,59 +129,39 @@ def plan_trip(origin: str, destination: str, stop_types: List[str] = None, gmaps
         total_distance_miles = total_distance_m * 0.000621371
         num_stops = max(2, min(5, int(total_distance_miles / 150)))  # 2-5 intermediate stops
         
-        waypoints = []
-        steps = leg.get("steps", [])
+        # Evenly spaced by distance along the decoded overview polyline, which
+        # follows the road; older responses without one fall back to the
+        # step endpoints.
+        encoded = route.get("overview_polyline", {}).get("points")
+        if encoded:
+            path = decode_polyline(encoded)
+        else:
+            path = [(start_location.get("lat"), start_location.get("lng"))] + [
+                (step["end_location"]["lat"], step["end_location"]["lng"]) for step in leg.get("steps", [])
+            ]
+        samples = sample_path(path, num_stops)
         
-        # Calculate cumulative distance to find evenly spaced points
-        cumulative_distance = 0
-        distance_per_stop = total_distance_m / (num_stops + 1)
-        next_stop_distance = distance_per_stop
-        stop_count = 0
+        # Waypoint names and the searches that don't need them all start at
+        # once; "tourist attractions in <city>" searches follow as soon as the
+        # names are in. Repeat lookups are answered by the geocode and place
+        # search caches behind gmaps_client.
+        city_futures = [
+            _plan_pool.submit(_waypoint_city, gmaps_client, lat, lng, f"Stop {index + 1}")
+            for index, (lat, lng) in enumerate(samples)
+        ]
         
-        # Always add origin
         origin_city = leg.get("start_address", origin).split(",")[0]
-        waypoints.append({
+        dest_city = leg.get("end_address", destination).split(",")[0]
+        waypoints = [{
             "city": origin_city,
             "lat": start_location.get("lat"),
             "lng": start_location.get("lng"),
             "type": "origin"
-        })
-        
-        # Find intermediate waypoints
-        for step in steps:
-            step_distance = step.get("distance", {}).get("value", 0)
-            cumulative_distance += step_distance
-            
-            if cumulative_distance >= next_stop_distance and stop_count < num_stops:
-                step_end = step.get("end_location", {})
-                lat = step_end.get("lat")
-                lng = step_end.get("lng")
-                
-                # Reverse geocode to get city name
-                try:
-                    reverse_result = gmaps_client.reverse_geocode((lat, lng))
-                    city_name = "Unknown"
-                    for component in reverse_result[0].get("address_components", []):
-                        if "locality" in component.get("types", []):
-                            city_name = component.get("long_name")
-                            break
-                        elif "administrative_area_level_2" in component.get("types", []):
-                            city_name = component.get("long_name")
-                except:
-                    city_name = f"Stop {stop_count + 1}"
-                
-                waypoints.append({
-                    "city": city_name,
-                    "lat": lat,
-                    "lng": lng,
-                    "type": "waypoint"
-                })
-                
-                stop_count += 1
-                next_stop_distance += distance_per_stop
-        
-        # Always add destination
-        dest_city = leg.get("end_address", destination).split(",")[0]
+        }]
+        waypoints.extend(
+            {"city": None, "lat": lat, "lng": lng, "type": "waypoint"}
+            for lat, lng in samples
+        )
         waypoints.append({
             "city": dest_city,
             "lat": end_location.get("lat"),
@@ -148,38 +171,30 @@ def plan_trip(origin: str, destination: str, stop_types: List[str] = None, gmaps
         
         print(f"  Plan: Found {len(waypoints)} waypoints, now searching at each...")
         
-        # NOW SEARCH FOR PLACES AT EACH WAYPOINT
-        all_places = []
+        # NOW SEARCH FOR PLACES AT EACH WAYPOINT, in waypoint then stop type order
+        searches = {}
+        for wp_index, wp in enumerate(waypoints):
+            for stop_type in stop_types:
+                if stop_type != "attractions":
+                    searches[(wp_index, stop_type)] = _plan_pool.submit(
+                        _search_waypoint, _stop_type_query(stop_type, None), wp, gmaps_client
+                    )
+        for wp, city in zip(waypoints[1:-1], city_futures):
+            wp["city"] = city.result()
+        for wp_index, wp in enumerate(waypoints):
+            if "attractions" in stop_types:
+                searches[(wp_index, "attractions")] = _plan_pool.submit(
+                    _search_waypoint, _stop_type_query("attractions", wp["city"]), wp, gmaps_client
+                )
         
-        for wp in waypoints:
-            city = wp["city"]
-            lat = wp["lat"]
-            lng = wp["lng"]
-            location_str = f"{lat},{lng}"
-            
-            # Search for each stop type at this waypoint
+        all_places = []
+        for wp_index, wp in enumerate(waypoints):
             for stop_type in stop_types:
-                # Build search query
-                if stop_type == "gas stations":
-                    query = "gas station"
-                elif stop_type == "restaurants":
-                    query = "restaurant"
-                elif stop_type == "attractions":
-                    query = f"tourist attractions in {city}"
-                else:
-                    query = stop_type
-                
-                print(f"    Searching: {query} near {city}")
-                
-                try:
-                    results = search_places(query, location=location_str, radius=15000, gmaps_client=gmaps_client)
-                    # Take top 1-2 results per search to avoid overwhelming
-                    for place in results[:2]:
-                        place["waypoint_city"] = city
-                        place["stop_type"] = stop_type
-                        all_places.append(place)
-                except Exception as search_error:
-                    print(f"    Search error: {search_error}")
+                # Take top 1-2 results per search to avoid overwhelming
+                for place in searches[(wp_index, stop_type)].result()[:2]:
+                    place["waypoint_city"] = wp["city"]
+                    place["stop_type"] = stop_type
+                    all_places.append(place)
         
         # Deduplicate by place_id (same location can appear in multiple searches)
         seen_place_ids = set()
@@ -306,6 +321,36 @@ optimize_day_func = FunctionDeclaration(
     },
 )
 
+select_stops_func = FunctionDeclaration(
+    name="select_stops",
+    description="Choose which candidate places fit into a day and add them in an optimized visiting order. Use after search_places or plan_trip returns more places than a day can hold, instead of picking by hand. Stops already on the day are kept.",
+    parameters={
+        "type": "object",
+        "properties": {
+            "candidates": {
+                "type": "array",
+                "description": "Candidate places (e.g. search results) to choose from",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "name": {"type": "string", "description": "Name of the place"},
+                        "address": {"type": "string", "description": "Full address (optional)"},
+                        "lat": {"type": "number", "description": "Latitude (optional, geocoded if missing)"},
+                        "lng": {"type": "number", "description": "Longitude (optional, geocoded if missing)"},
+                        "place_id": {"type": "string", "description": "Google Places ID (optional)"},
+                        "rating": {"type": "number", "description": "Rating used as the place's value (optional)"}
+                    },
+                    "required": ["name"]
+                }
+            },
+            "hours": {"type": "number", "description": "Time available for the day in hours, including about an hour at each stop"},
+            "miles": {"type": "number", "description": "Driving distance budget in miles, instead of hours"},
+            "day_id": {"type": "string", "description": "The id of the day to fill. Defaults to the first day."}
+        },
+        "required": ["candidates"]
+    },
+)
+
 create_day_func = FunctionDeclaration(
     name="create_day",
     description="Add a new day to the trip, e.g. when the user wants to extend the trip or spread stops out.",
@@ -365,6 +410,7 @@ agent_tools = Tool(
         remove_stop_func,
         move_stop_func,
         optimize_day_func,
+        select_stops_func,
         create_day_func,
         set_dates_func,
     ],
@@ -443,7 +489,27 @@ class TripToolExecutor:
         by_id = {stop.id: stop.name for stop in optimized.stops}
         order = [by_id[sid] for sid in optimized.route.order if sid in by_id]
         distance = optimized.route.totalDistanceMiles
-        return f"Optimized {day.label}: {' -> '.join(order)} ({distance} miles total)"
+        outcome = f"Optimized {day.label}: {' -> '.join(order)} ({distance} miles total)"
+        if (optimized.route.solver or {}).get("feasible") is False:
+            outcome += ". Warning: not every pinned arrival/departure time can be met with this order"
+        return outcome
+
+    def select_stops(self, candidates: List[Dict], hours: float = None, miles: float = None, day_id: str = None) -> str:
+        if hours is None and miles is None:
+            raise ValueError("Provide hours or miles as the day's budget")
+        day = self._resolve_day(day_id)
+        result = self.service.select_stops(
+            self.trip_id,
+            day.id,
+            [dict(candidate) for candidate in candidates],
+            budget_minutes=hours * 60 if miles is None else None,
+            budget_miles=miles,
+            **self._auth,
+        )
+        outcome = f"Added to {day.label}: {', '.join(result['selected']) or 'nothing that fits the budget'}"
+        if result["skipped"]:
+            outcome += f". Left out: {', '.join(result['skipped'])}"
+        return outcome
 
     def create_day(self, date: str = None) -> str:
         day = self.service.add_day(self.trip_id, date=date, **self._auth)
@@ -462,7 +528,10 @@ class TripToolExecutor:
 
 
 # Tool names that mutate the stored trip (frontend refreshes on these)
-MUTATING_TOOLS = {"add_stops", "remove_stop", "move_stop", "optimize_day", "create_day", "set_dates"}
+MUTATING_TOOLS = {"add_stops", "remove_stop", "move_stop", "optimize_day", "select_stops", "create_day", "set_dates"}
+READ_ONLY_TOOLS = {"search_places", "plan_trip"}
+# Read-only tool calls from every chat turn share this pool.
+_tool_pool = ThreadPoolExecutor(max_workers=int(os.getenv("AGENT_TOOL_CONCURRENCY", "8")), thread_name_prefix="agent-tool")
 
 
 def _proto_to_python(value):
@@ -477,6 +546,38 @@ def _proto_to_python(value):
         return value
 
 
+def _run_read_only_tool(name: str, args: Dict[str, Any], gmaps_client) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """Run a tool that doesn't touch the stored trip. Returns the events to
+    yield and the function response for the model."""
+    print(f"Agent calling tool: {name}({args})")
+    if name == "search_places":
+        results = search_places(
+            args.get("query"),
+            location=args.get("location"),
+            radius=args.get("radius"),
+            gmaps_client=gmaps_client,
+        )
+        events = [{"type": "places", "places": results}] if results else []
+        return events, {"content": results}
+
+    trip_plan = plan_trip(
+        args.get("origin"),
+        args.get("destination"),
+        args.get("stop_types"),
+        gmaps_client=gmaps_client,
+    )
+    places_found = trip_plan.get("places_found", [])
+    events = [{"type": "places", "places": places_found}] if places_found else []
+    return events, {
+        "content": (
+            f"Found {len(places_found)} places across {trip_plan.get('num_waypoints', 0)} waypoints "
+            f"from {args.get('origin')} to {args.get('destination')}. "
+            f"Distance: {trip_plan.get('total_distance_miles', 0)} miles."
+            if not trip_plan.get("error") else trip_plan["error"]
+        )
+    }
+
+
 def get_chat_response(
     messages: List[Dict[str, str]],
     gmaps_client: googlemaps.Client,
@@ -484,9 +585,12 @@ def get_chat_response(
     trip_id: str = None,
     uid: str = None,
     claim_token: str = None,
+    cassette=None,
 ) -> Generator[Dict[str, Any], None, None]:
     """
     Generate a chat response using Vertex AI with server-side tool execution.
+    With a cassette (services/cassette.py) the Vertex turns are recorded, or
+    replayed without contacting Vertex at all.
 
     Yields event dicts for the caller to serialize (NDJSON):
       {"type": "text", "delta": str}      - assistant prose
@@ -502,22 +606,24 @@ def get_chat_response(
     if trip_service and trip_id:
         executor = TripToolExecutor(trip_service, trip_id, uid=uid, claim_token=claim_token)
 
-    model = GenerativeModel(
-        "gemini-2.5-flash-lite",
-        tools=[agent_tools],
-        system_instruction=system_instruction
-    )
-
     # Rebuild history
     chat_history = []
     for msg in messages[:-1]:
         role = "user" if msg['role'] == 'user' else "model"
         chat_history.append(Content(role=role, parts=[Part.from_text(msg['content'])]))
 
-    # response_validation=False: gemini flash occasionally emits a malformed
-    # code-style function call; the SDK validator would poison the whole chat
-    # session. We detect the empty/malformed turn below and nudge a retry.
-    chat = model.start_chat(history=chat_history, response_validation=False)
+    def start_chat():
+        model = GenerativeModel(
+            "gemini-2.5-flash-lite",
+            tools=[agent_tools],
+            system_instruction=system_instruction
+        )
+        # response_validation=False: gemini flash occasionally emits a malformed
+        # code-style function call; the SDK validator would poison the whole chat
+        # session. We detect the empty/malformed turn below and nudge a retry.
+        return model.start_chat(history=chat_history, response_validation=False)
+
+    chat = cassette.chat(start_chat) if cassette else start_chat()
     last_user_message = messages[-1]['content']
 
     response = chat.send_message(last_user_message, stream=False)
@@ -563,42 +669,24 @@ def get_chat_response(
 
         # The model may issue several calls in one turn (e.g. add_stops +
         # optimize_day); Vertex requires one response part per call part.
+        # Read-only tools all start at once on the tool pool; mutating tools
+        # run here, one at a time in declared order. Events and responses
+        # follow the declared order either way.
+        pending = {
+            index: _tool_pool.submit(_run_read_only_tool, fn.name, dict(fn.args) if fn.args else {}, gmaps_client)
+            for index, fn in enumerate(function_calls)
+            if fn.name in READ_ONLY_TOOLS
+        }
         function_responses = []
-        for fn in function_calls:
+        for index, fn in enumerate(function_calls):
             args = dict(fn.args) if fn.args else {}
-            print(f"Agent calling tool: {fn.name}({args})")
-
-            if fn.name == "search_places":
-                results = search_places(
-                    args.get("query"),
-                    location=args.get("location"),
-                    radius=args.get("radius"),
-                    gmaps_client=gmaps_client,
-                )
-                if results:
-                    yield {"type": "places", "places": results}
-                result_content = {"content": results}
-
-            elif fn.name == "plan_trip":
-                trip_plan = plan_trip(
-                    args.get("origin"),
-                    args.get("destination"),
-                    args.get("stop_types"),
-                    gmaps_client=gmaps_client,
-                )
-                places_found = trip_plan.get("places_found", [])
-                if places_found:
-                    yield {"type": "places", "places": places_found}
-                result_content = {
-                    "content": (
-                        f"Found {len(places_found)} places across {trip_plan.get('num_waypoints', 0)} waypoints "
-                        f"from {args.get('origin')} to {args.get('destination')}. "
-                        f"Distance: {trip_plan.get('total_distance_miles', 0)} miles."
-                        if not trip_plan.get("error") else trip_plan["error"]
-                    )
-                }
+
+            if index in pending:
+                events, result_content = pending[index].result()
+                yield from events
 
             elif fn.name in MUTATING_TOOLS:
+                print(f"Agent calling tool: {fn.name}({args})")
                 if not executor:
                     result_content = {"error": "No stored trip is available; ask the user to add a location first."}
                 else:
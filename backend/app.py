@@ -1,18 +1,29 @@
 from flask import Flask, request, jsonify, Response
 from flask_cors import CORS
-import googlemaps
 from dotenv import load_dotenv
 import os
-from christofides import route_total_distance, tsp
+from christofides import DEFAULT_GAP_THRESHOLD, make_cached_distance_fn, make_maps_client, route_total_distance, solve, tsp
 from agent import get_chat_response
 from trip_naming import generate_trip_name
+import weather
 from weather import get_weather_for_locations
+import atexit
 import json
 import firebase_admin
 from firebase_admin import credentials, firestore, auth as firebase_auth
 from session_service import FirestoreSessionService, InMemorySessionService
+from routes.jobs import create_jobs_blueprint, job_response
 from routes.trips import create_trips_blueprint
+from services.cassette import Cassette
+from services.distance_cache import DistanceCache
+from services.cache_store import cache_store_for
+from services.distance_prefetcher import DistancePrefetcher
+from services.geocoder import Geocoder
+from services.job_service import JobService
+from services.maps_batcher import BatchingMapsClient
+from services.place_search_cache import PlaceSearchCache
 from services.trip_repository import FirestoreTripRepository, InMemoryTripRepository
+from services.solver_pool import SolverBusyError, SolverPool, SolverTimeoutError
 from services.trip_service import TripService
 import re
 
@@ -25,7 +36,26 @@ GOOGLE_MAPS_API_KEY = os.getenv('NEXT_PUBLIC_GOOGLE_MAPS_API_KEY')
 if not GOOGLE_MAPS_API_KEY:
     raise ValueError("Google Maps API key not found in .env.local file")
 
-gmaps = googlemaps.Client(key=GOOGLE_MAPS_API_KEY)
+gmaps = make_maps_client(GOOGLE_MAPS_API_KEY)
+
+# PATHWISE_CASSETTE=path records (PATHWISE_CASSETTE_MODE=record) or replays
+# Maps, weather and Vertex traffic for offline performance regression runs.
+cassette = None
+if os.getenv("PATHWISE_CASSETTE"):
+    cassette = Cassette(
+        os.environ["PATHWISE_CASSETTE"],
+        mode=os.getenv("PATHWISE_CASSETTE_MODE", "replay"),
+        speed=float(os.getenv("PATHWISE_CASSETTE_SPEED", "1")),
+    )
+    gmaps = cassette.maps(gmaps)
+    weather.http_session = cassette.http(weather.http_session)
+    if cassette.recording:
+        atexit.register(cassette.save)
+    print(f"INFO: {cassette.mode.capitalize()}ing external traffic with cassette {cassette.path}")
+
+# Distance Matrix calls from concurrent requests are merged into full
+# batches; every other client method passes straight through.
+maps_client = BatchingMapsClient(gmaps, window_seconds=float(os.getenv("MAPS_BATCH_WINDOW_MS", "10")) / 1000)
 
 # Initialize Firebase Admin SDK
 # Use service account credentials from GOOGLE_APPLICATION_CREDENTIALS
@@ -49,7 +79,26 @@ except Exception as e:
     session_service = InMemorySessionService()
     trip_repository = InMemoryTripRepository()
 
-trip_service = TripService(trip_repository, gmaps_client=gmaps)
+# CPU-bound route solves run in worker processes so a large optimization
+# doesn't stall every other request served by this single uvicorn process.
+solver_pool = SolverPool.from_env()
+distance_cache = DistanceCache()
+# Geocodes persist in Firestore (when available) so popular places are
+# looked up once across users and restarts; place searches are cached
+# briefly in memory. The geocoder also serves as the agent's and MCP's
+# Maps client, so their tools get both caches.
+geocoder = Geocoder(PlaceSearchCache(maps_client), cache_store_for(db, "geocode_cache"))
+trip_service = TripService(
+    trip_repository,
+    gmaps_client=maps_client,
+    distance_cache=distance_cache,
+    solver_pool=solver_pool,
+    geocoder=geocoder,
+    # Timer-driven prefetches would make recorded matrix requests depend on
+    # timing, so they are off while a cassette is in use.
+    prefetcher=DistancePrefetcher(maps_client, distance_cache) if cassette is None else None,
+)
+job_service = JobService()
 
 
 app = Flask(__name__)
@@ -81,7 +130,20 @@ def add_cors_headers(response):
         response.headers["Access-Control-Allow-Methods"] = "GET, POST, PATCH, DELETE, OPTIONS"
     return response
 
-app.register_blueprint(create_trips_blueprint(trip_service))
+app.register_blueprint(create_trips_blueprint(trip_service, job_service))
+app.register_blueprint(create_jobs_blueprint(job_service, trip_service))
+
+
+@app.errorhandler(SolverBusyError)
+def handle_solver_busy(error):
+    response = jsonify({"error": str(error)})
+    response.headers["Retry-After"] = str(error.retry_after)
+    return response, 503
+
+
+@app.errorhandler(SolverTimeoutError)
+def handle_solver_timeout(error):
+    return jsonify({"error": str(error)}), 504
 
 @app.route('/')
 def home():
@@ -105,7 +167,7 @@ def submit_itinerary():
 
     try:
         # Run the TSP algorithm on the entered locations
-        optimized_route = tsp(locations, start_index, end_index)
+        optimized_route = tsp(locations, start_index, end_index, gmaps_client=maps_client, pool=solver_pool)
         
         # Convert locations to indices for response
         # Since optimized_route contains location dicts in optimized order,
@@ -135,6 +197,8 @@ def submit_itinerary():
             "status": "success",
             "optimized_route": route_indices
         })
+    except (SolverBusyError, SolverTimeoutError):
+        raise
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -159,25 +223,22 @@ def geocode_locations():
     locations = request.json.get('locations', [])
     geocoded_locations = []
     
-    for location in locations:
-        try:
-            # Geocode the location
-            geocode_result = gmaps.geocode(location)
+    # Geocoded concurrently (duplicates once); results keep the input order.
+    for outcome in geocoder.geocode_many(locations):
+        location = outcome.query
+        if outcome.error is not None:
+            print(f"Error geocoding {location}: {str(outcome.error)}")
+        elif outcome.results:
+            lat = outcome.results[0]['geometry']['location']['lat']
+            lng = outcome.results[0]['geometry']['location']['lng']
             
-            if geocode_result:
-                lat = geocode_result[0]['geometry']['location']['lat']
-                lng = geocode_result[0]['geometry']['location']['lng']
-                
-                geocoded_locations.append({
-                    'name': location,
-                    'lat': lat,
-                    'lng': lng
-                })
-            else:
-                print(f"Could not geocode location: {location}")
-        
-        except Exception as e:
-            print(f"Error geocoding {location}: {str(e)}")
+            geocoded_locations.append({
+                'name': location,
+                'lat': lat,
+                'lng': lng
+            })
+        else:
+            print(f"Could not geocode location: {location}")
     
     return jsonify({
         'geocoded_locations': geocoded_locations
@@ -195,45 +256,78 @@ def optimize_route():
             ...
         ],
         "start_index": 0 (optional),
-        "end_index": null (optional)
+        "end_index": null (optional),
+        "max_gap": 0.02 (optional, stop improving once within this of the lower bound),
+        "async": false (optional, run as a background job; see /api/jobs)
     }
     
     Returns:
     {
         "route": [optimized list of locations],
         "total_distance": total_miles,
-        "total_time": estimated_time
+        "total_time": estimated_time,
+        "lower_bound": lower bound on the optimal total_distance (miles),
+        "gap": (total_distance - lower_bound) / lower_bound
     }
+    With async, the same payload plus "job" when the job finishes quickly,
+    otherwise 202 with {"job": {...}} to poll at /api/jobs/<id>.
     """
     locations = request.json.get('locations', [])
     start_index = request.json.get('start_index', 0)
     end_index = request.json.get('end_index', None)
+    max_gap = request.json.get('max_gap')
     
     if len(locations) < 2:
         return jsonify({
             'error': 'At least two locations are required for route optimization'
         }), 400
+    if max_gap is not None:
+        try:
+            max_gap = float(max_gap)
+        except (TypeError, ValueError):
+            return jsonify({'error': 'max_gap must be a number'}), 400
     
     # Validate indices
     if start_index is not None and (start_index < 0 or start_index >= len(locations)):
         start_index = 0
     if end_index is not None and (end_index < 0 or end_index >= len(locations)):
         end_index = None
-    
-    # Use Christofides algorithm to optimize route
-    optimized_route = tsp(locations, start_index, end_index)
-    
-    # Calculate total distance and estimated time
-    total_distance = route_total_distance(optimized_route, gmaps_client=gmaps)
-    
-    # Rough estimate: 50 miles per hour average
-    total_time = f"{total_distance / 50:.1f} hours"
-    
-    return jsonify({
-        'route': optimized_route,
-        'total_distance': round(total_distance, 1),
-        'total_time': total_time
-    })
+
+    def run(report=None):
+        on_progress = None
+        if report:
+            on_progress = lambda done, total: report({"phase": "matrix", "batchesDone": done, "batchesTotal": total})
+        # Use Christofides algorithm to optimize route
+        result = solve(
+            locations,
+            start_index,
+            end_index,
+            distance_fn=make_cached_distance_fn(
+                locations, gmaps_client=maps_client, cache=trip_service.distance_cache, on_progress=on_progress
+            ),
+            gap_threshold=DEFAULT_GAP_THRESHOLD if max_gap is None else max_gap,
+            pool=solver_pool,
+        )
+        optimized_route = result.route
+
+        # Calculate total distance and estimated time
+        total_distance = result.cost if result.cost is not None else route_total_distance(optimized_route, gmaps_client=maps_client)
+
+        # Rough estimate: 50 miles per hour average
+        total_time = f"{total_distance / 50:.1f} hours"
+        stats = result.stats()
+
+        return {
+            'route': optimized_route,
+            'total_distance': round(total_distance, 1),
+            'total_time': total_time,
+            'lower_bound': stats['lowerBoundMiles'],
+            'gap': stats['gap']
+        }
+
+    if request.json.get('async'):
+        return job_response(job_service, job_service.submit("optimize_route", run))
+    return jsonify(run())
 
 def build_trip_prompt_context(trip):
     """Compact trip state for the agent's system prompt: day/stop ids are the
@@ -337,11 +431,14 @@ Guidelines:
             full_text = ""
             for event in get_chat_response(
                 messages,
-                gmaps,
+                # Cached geocoding for the agent's tools; other Maps calls
+                # pass straight through.
+                geocoder,
                 trip_service=trip_service,
                 trip_id=agent_trip_id,
                 uid=user_id,
                 claim_token=claim_token,
+                cassette=cassette,
             ):
                 if event.get("type") == "text":
                     full_text += event.get("delta") or ""
@@ -401,7 +498,7 @@ def get_chat_messages(chat_id):
 def get_travel_distance(origin, destination):
     """Get the driving distance between two locations."""
     try:
-        result = gmaps.distance_matrix(
+        result = maps_client.distance_matrix(
             origins=(f"{origin['lat']},{origin['lng']}"),
             destinations=(f"{destination['lat']},{destination['lng']}"),
             mode="driving"
@@ -480,7 +577,7 @@ def get_weather():
         if not locations:
             return jsonify({"regions": [], "clusterCount": 0})
         
-        result = get_weather_for_locations(locations)
+        result = get_weather_for_locations(locations, geocoder=geocoder)
         return jsonify(result)
     except Exception as e:
         print(f"Error fetching weather: {e}")
@@ -17,10 +17,11 @@ from a2wsgi import WSGIMiddleware
 from starlette.applications import Starlette
 from starlette.routing import Mount
 
-from app import app as flask_app, gmaps, trip_service
+from app import app as flask_app, geocoder, job_service, solver_pool, trip_service
 from mcp_server import create_mcp_server
 
-mcp = create_mcp_server(trip_service, gmaps)
+# The geocoder caches lookups and passes other Maps calls through.
+mcp = create_mcp_server(trip_service, geocoder, job_service)
 mcp_asgi = mcp.streamable_http_app()
 
 
@@ -29,6 +30,7 @@ async def lifespan(app):
     # The MCP session manager must be running for /mcp requests to be served.
     async with mcp.session_manager.run():
         yield
+    solver_pool.shutdown()
 
 
 _starlette = Starlette(
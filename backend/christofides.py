@@ -1,9 +1,16 @@
 import googlemaps
 import itertools
+import math
+import random
+import time
 import networkx as nx
+from dataclasses import dataclass, field
 from dotenv import load_dotenv
 import os
-from typing import Callable, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from services.http_client import DEFAULT_CONNECT_TIMEOUT_SECONDS, DEFAULT_READ_TIMEOUT_SECONDS, maps_session
+from services.maps_gateway import default_gateway
 
 # Load environment variables from backend/.env.local
 env_path = os.path.join(os.path.dirname(__file__), '.env.local')
@@ -14,9 +21,34 @@ GOOGLE_MAPS_API_KEY = os.getenv('NEXT_PUBLIC_GOOGLE_MAPS_API_KEY')
 if not GOOGLE_MAPS_API_KEY:
     raise ValueError("Google Maps API key not found in .env.local file")
 
-gmaps = googlemaps.Client(key=GOOGLE_MAPS_API_KEY)
+# Point every Maps client at another host, e.g. scripts/maps_standin.py for
+# offline load tests.
+GOOGLE_MAPS_BASE_URL = os.getenv("GOOGLE_MAPS_BASE_URL")
+
+
+def make_maps_client(api_key: str = GOOGLE_MAPS_API_KEY):
+    """A Maps client routed through the shared gateway, which owns rate
+    limiting and retries. The client's own retry loop (up to 60 s per call)
+    is cut short: it checks retry_timeout before every attempt, including
+    the first, so it can't be zero, but 50 ms is shorter than any request
+    that could be retried. Clients share one keep-alive connection pool."""
+    options = {
+        "retry_timeout": 0.05,
+        "retry_over_query_limit": False,
+        "requests_session": maps_session,
+        "connect_timeout": DEFAULT_CONNECT_TIMEOUT_SECONDS,
+        "read_timeout": DEFAULT_READ_TIMEOUT_SECONDS,
+    }
+    if GOOGLE_MAPS_BASE_URL:
+        options["base_url"] = GOOGLE_MAPS_BASE_URL.rstrip("/")
+    return default_gateway.client(googlemaps.Client(key=api_key, **options))
+
+
+gmaps = make_maps_client()
 
 DistanceFn = Callable[[dict, dict], float]
+# on_progress(done, total) for matrix batches.
+ProgressFn = Callable[[int, int], None]
 
 
 def _location_key(location: dict) -> Tuple[float, float]:
@@ -44,56 +76,156 @@ def get_travel_distance(origin, destination, gmaps_client=None):
         return float('inf')
 
 
-def build_distance_lookup(locations: List[dict], gmaps_client=None) -> Dict[Tuple[int, int], float]:
+def _element_values(element: dict) -> Tuple[float, Optional[float]]:
+    """(miles, minutes) for one Distance Matrix element; inf miles if unusable."""
+    if element.get("status") != "OK":
+        return float("inf"), None
+    miles = element.get("distance", {}).get("value", float("inf")) * 0.000621371
+    seconds = element.get("duration", {}).get("value")
+    return miles, (seconds / 60 if seconds is not None else None)
+
+
+def build_matrix_lookup(
+    locations: List[dict], gmaps_client=None, cache=None, on_progress: Optional[ProgressFn] = None
+) -> Dict[Tuple[int, int], Tuple[float, Optional[float]]]:
     """
-    Build a pairwise driving-distance lookup with batched Distance Matrix calls.
+    Build a pairwise (miles, minutes) lookup with batched Distance Matrix calls.
 
     Google caps Distance Matrix requests at 25 origins, 25 destinations, and
     100 elements. Using 10x10 chunks stays inside all three limits and replaces
-    the previous N^2/2 one-request-per-pair behavior.
+    the previous N^2/2 one-request-per-pair behavior. With a cache, pairs seen
+    before are read from it and chunks that are already complete are skipped.
+    on_progress(done, total) is called after each chunk that had to be fetched.
     """
-    lookup: Dict[Tuple[int, int], float] = {}
+    lookup: Dict[Tuple[int, int], Tuple[float, Optional[float]]] = {}
     client = gmaps_client or gmaps
     chunk_size = 10
 
+    if cache is not None:
+        for i, origin in enumerate(locations):
+            for j, destination in enumerate(locations):
+                cached = cache.get_entry(origin, destination)
+                if cached is not None:
+                    lookup[(i, j)] = cached
+
+    chunks = []
     for origin_start in range(0, len(locations), chunk_size):
         origin_indices = list(range(origin_start, min(origin_start + chunk_size, len(locations))))
-        origins = [f"{locations[i]['lat']},{locations[i]['lng']}" for i in origin_indices]
-
         for dest_start in range(0, len(locations), chunk_size):
             dest_indices = list(range(dest_start, min(dest_start + chunk_size, len(locations))))
-            destinations = [f"{locations[i]['lat']},{locations[i]['lng']}" for i in dest_indices]
+            if not all((i, j) in lookup for i in origin_indices for j in dest_indices):
+                chunks.append((origin_indices, dest_indices))
 
-            try:
-                result = client.distance_matrix(
-                    origins=origins,
-                    destinations=destinations,
-                    mode="driving",
-                )
-            except Exception as e:
-                print(f"Error in batched distance_matrix: {str(e)}")
-                for i in origin_indices:
-                    for j in dest_indices:
-                        lookup[(i, j)] = float("inf")
-                continue
+    for done, (origin_indices, dest_indices) in enumerate(chunks, start=1):
+        origins = [f"{locations[i]['lat']},{locations[i]['lng']}" for i in origin_indices]
+        destinations = [f"{locations[i]['lat']},{locations[i]['lng']}" for i in dest_indices]
 
-            rows = result.get("rows", [])
-            for row_offset, row in enumerate(rows):
-                i = origin_indices[row_offset]
-                for col_offset, element in enumerate(row.get("elements", [])):
-                    j = dest_indices[col_offset]
-                    if i == j:
-                        lookup[(i, j)] = 0
-                    elif element.get("status") == "OK":
-                        lookup[(i, j)] = element.get("distance", {}).get("value", float("inf")) * 0.000621371
-                    else:
-                        lookup[(i, j)] = float("inf")
+        try:
+            result = client.distance_matrix(
+                origins=origins,
+                destinations=destinations,
+                mode="driving",
+            )
+        except Exception as e:
+            print(f"Error in batched distance_matrix: {str(e)}")
+            for i in origin_indices:
+                for j in dest_indices:
+                    lookup[(i, j)] = (float("inf"), None)
+            result = {}
+
+        rows = result.get("rows", [])
+        for row_offset, row in enumerate(rows):
+            i = origin_indices[row_offset]
+            for col_offset, element in enumerate(row.get("elements", [])):
+                j = dest_indices[col_offset]
+                if i == j:
+                    lookup[(i, j)] = (0, 0)
+                else:
+                    lookup[(i, j)] = _element_values(element)
+                if cache is not None:
+                    cache.put(locations[i], locations[j], *lookup[(i, j)])
+        if on_progress is not None:
+            on_progress(done, len(chunks))
 
     return lookup
 
 
-def make_cached_distance_fn(locations: List[dict], gmaps_client=None) -> DistanceFn:
-    lookup = build_distance_lookup(locations, gmaps_client=gmaps_client)
+def build_distance_lookup(locations: List[dict], gmaps_client=None, cache=None, on_progress: Optional[ProgressFn] = None) -> Dict[Tuple[int, int], float]:
+    """Pairwise driving miles; see build_matrix_lookup for batching."""
+    lookup = build_matrix_lookup(locations, gmaps_client=gmaps_client, cache=cache, on_progress=on_progress)
+    return {pair: miles for pair, (miles, _) in lookup.items()}
+
+
+def build_duration_matrix(locations: List[dict], gmaps_client=None, cache=None, on_progress: Optional[ProgressFn] = None) -> List[List[float]]:
+    """Driving minutes between every pair (inf where unknown), symmetric like
+    the distance matrix the solver uses."""
+    lookup = build_matrix_lookup(locations, gmaps_client=gmaps_client, cache=cache, on_progress=on_progress)
+    return _symmetric_matrix(lookup, len(locations), 1)
+
+
+def build_distance_matrix(locations: List[dict], gmaps_client=None, cache=None, on_progress: Optional[ProgressFn] = None) -> List[List[float]]:
+    """Driving miles between every pair (inf where unknown), symmetric."""
+    lookup = build_matrix_lookup(locations, gmaps_client=gmaps_client, cache=cache, on_progress=on_progress)
+    return _symmetric_matrix(lookup, len(locations), 0)
+
+
+def _symmetric_matrix(lookup: Dict[Tuple[int, int], Tuple[float, Optional[float]]], n: int, field_index: int) -> List[List[float]]:
+    matrix = [[0.0] * n for _ in range(n)]
+    for i in range(n):
+        for j in range(i + 1, n):
+            value = lookup.get((i, j), (None, None))[field_index]
+            if value is None or value == float("inf"):
+                value = lookup.get((j, i), (None, None))[field_index]
+            matrix[i][j] = matrix[j][i] = value if value is not None else float("inf")
+    return matrix
+
+
+def fetch_pair_distances(pairs: List[Tuple[dict, dict]], gmaps_client=None, cache=None) -> List[float]:
+    """
+    Driving distance for each (origin, destination) pair, in input order.
+
+    Only pairs missing from the cache are requested, grouped by origin so an
+    order of N stops costs at most N-1 elements instead of a full N x N matrix.
+    """
+    results: List[Optional[float]] = []
+    for origin, destination in pairs:
+        if _location_key(origin) == _location_key(destination):
+            results.append(0.0)
+        else:
+            results.append(cache.get(origin, destination) if cache is not None else None)
+    missing_by_origin: Dict[Tuple[float, float], List[int]] = {}
+    for index, (origin, _) in enumerate(pairs):
+        if results[index] is None:
+            missing_by_origin.setdefault(_location_key(origin), []).append(index)
+    if not missing_by_origin:
+        return results
+
+    client = gmaps_client or gmaps
+    max_destinations = 25
+    for indices in missing_by_origin.values():
+        origin = pairs[indices[0]][0]
+        for chunk_start in range(0, len(indices), max_destinations):
+            chunk = indices[chunk_start:chunk_start + max_destinations]
+            try:
+                result = client.distance_matrix(
+                    origins=[f"{origin['lat']},{origin['lng']}"],
+                    destinations=[f"{pairs[i][1]['lat']},{pairs[i][1]['lng']}" for i in chunk],
+                    mode="driving",
+                )
+                elements = result.get("rows", [{}])[0].get("elements", [])
+            except Exception as e:
+                print(f"Error in pair distance_matrix: {str(e)}")
+                elements = []
+            for offset, index in enumerate(chunk):
+                miles, minutes = _element_values(elements[offset] if offset < len(elements) else {})
+                results[index] = miles
+                if cache is not None:
+                    cache.put(pairs[index][0], pairs[index][1], miles, minutes)
+    return results
+
+
+def make_cached_distance_fn(locations: List[dict], gmaps_client=None, cache=None, on_progress: Optional[ProgressFn] = None) -> DistanceFn:
+    lookup = build_distance_lookup(locations, gmaps_client=gmaps_client, cache=cache, on_progress=on_progress)
     index_by_key = {_location_key(location): index for index, location in enumerate(locations)}
     pair_cache: Dict[Tuple[int, int], float] = {}
 
@@ -112,6 +244,53 @@ def make_cached_distance_fn(locations: List[dict], gmaps_client=None) -> Distanc
 # 13 stops => at most 2^12 * 12 * 12 DP transitions, well under a second.
 EXACT_SOLVE_MAX_STOPS = 13
 
+# Heuristic solves stop improving once the tour is within this fraction of the
+# lower bound. Callers pass their own gap_threshold to trade quality for latency.
+DEFAULT_GAP_THRESHOLD = 0.02
+# Perturb-and-reoptimize restarts after the first local search, bounded by time.
+MAX_RESTARTS = 8
+SOLVE_TIME_LIMIT_SECONDS = 2.0
+LOWER_BOUND_ITERATIONS = 1000
+# Subgradient step scale decay after each window of non-improving iterations.
+# Halving stalls far below the optimum on clustered layouts; a slow decay
+# keeps climbing (clustered 50 stops: ~10% gap instead of ~39%).
+LOWER_BOUND_STEP_DECAY = 0.97
+LOWER_BOUND_STALE_WINDOW = 5
+# Share of the solve time limit the bound may use before local search starts.
+LOWER_BOUND_TIME_SHARE = 0.25
+# predicted_improvement runs on the request thread; its straight-line tour
+# stops improving after this long.
+PRECHECK_TIME_LIMIT_SECONDS = 0.05
+
+
+@dataclass
+class SolveResult:
+    """Solver output: index order (cycles repeat the start), its cost, and a
+    lower bound on the optimum so callers can see how good the tour is."""
+    order: List[int]
+    cost: Optional[float]
+    lower_bound: Optional[float] = None
+    strategy: str = "held_karp"
+    restarts: int = 0
+    route: List[dict] = field(default_factory=list)
+
+    @property
+    def gap(self) -> Optional[float]:
+        if self.cost is None or self.lower_bound is None:
+            return None
+        if self.lower_bound <= 0:
+            return 0.0 if self.cost <= 0 else None
+        return max(0.0, (self.cost - self.lower_bound) / self.lower_bound)
+
+    def stats(self) -> Dict[str, Any]:
+        gap = self.gap
+        return {
+            "strategy": self.strategy,
+            "lowerBoundMiles": round(self.lower_bound, 1) if self.lower_bound is not None else None,
+            "gap": round(gap, 4) if gap is not None else None,
+            "restarts": self.restarts,
+        }
+
 
 def build_graph(locations, distance_fn: Optional[DistanceFn] = None):
     """Build a complete graph with distances between all location pairs."""
@@ -185,10 +364,13 @@ def _held_karp(dist: List[List[float]], start: int, end: int) -> List[int]:
     return [start] + order + [end]
 
 
-def _two_opt_pass(order: List[int], dist: List[List[float]]) -> bool:
-    """One sweep of 2-opt segment reversals; endpoints stay fixed."""
+def _two_opt_pass(order: List[int], dist: List[List[float]], deadline: float = math.inf) -> bool:
+    """One sweep of 2-opt segment reversals; endpoints stay fixed. Stops
+    early, keeping the moves made so far, once deadline passes."""
     improved = False
     for i in range(1, len(order) - 2):
+        if time.monotonic() >= deadline:
+            break
         for j in range(i + 1, len(order) - 1):
             a, b = order[i - 1], order[i]
             c, d = order[j], order[j + 1]
@@ -199,12 +381,15 @@ def _two_opt_pass(order: List[int], dist: List[List[float]]) -> bool:
     return improved
 
 
-def _or_opt_pass(order: List[int], dist: List[List[float]]) -> bool:
-    """One sweep of Or-opt: relocate segments of 1-3 stops; endpoints stay fixed."""
+def _or_opt_pass(order: List[int], dist: List[List[float]], deadline: float = math.inf) -> bool:
+    """One sweep of Or-opt: relocate segments of 1-3 stops; endpoints stay
+    fixed. Stops early, keeping the moves made so far, once deadline passes."""
     improved = False
     for seg_len in (1, 2, 3):
         i = 1
         while i + seg_len <= len(order) - 1:
+            if time.monotonic() >= deadline:
+                return improved
             seg = order[i:i + seg_len]
             before, after = order[i - 1], order[i + seg_len]
             removal_gain = (
@@ -232,15 +417,99 @@ def _or_opt_pass(order: List[int], dist: List[List[float]]) -> bool:
     return improved
 
 
-def _local_search(order: List[int], dist: List[List[float]]) -> List[int]:
-    """Run 2-opt and Or-opt to convergence on an order with fixed endpoints."""
+def _local_search(order: List[int], dist: List[List[float]], deadline: float = math.inf) -> List[int]:
+    """Run 2-opt and Or-opt to convergence on an order with fixed endpoints,
+    or until deadline (a time.monotonic() value) passes."""
     while True:
-        improved = _two_opt_pass(order, dist)
-        improved = _or_opt_pass(order, dist) or improved
-        if not improved:
+        improved = _two_opt_pass(order, dist, deadline)
+        improved = _or_opt_pass(order, dist, deadline) or improved
+        if not improved or time.monotonic() >= deadline:
             return order
 
 
+def _order_cost(order: List[int], dist: List[List[float]]) -> float:
+    return sum(dist[order[i]][order[i + 1]] for i in range(len(order) - 1))
+
+
+def _double_bridge(order: List[int], rng: random.Random) -> List[int]:
+    """Swap two interior segments; the classic kick that 2-opt cannot undo."""
+    a, b, c = sorted(rng.sample(range(1, len(order) - 1), 3))
+    return order[:a] + order[b:c] + order[a:b] + order[c:]
+
+
+def _one_tree(dist: List[List[float]], special: int, pi: List[float]) -> Tuple[float, List[int]]:
+    """Minimum 1-tree under penalties pi: an MST over every node but special
+    (Prim, O(n^2)) plus special's two cheapest edges. Returns (weight, degrees)."""
+    n = len(dist)
+    inf = float("inf")
+    degree = [0] * n
+    nodes = [v for v in range(n) if v != special]
+    best = {v: inf for v in nodes}
+    parent: Dict[int, int] = {}
+    best[nodes[0]] = 0.0
+    weight = 0.0
+    while best:
+        u = min(best, key=best.get)
+        weight += best.pop(u)
+        if u in parent:
+            degree[u] += 1
+            degree[parent[u]] += 1
+        row, pu = dist[u], pi[u]
+        for v in best:
+            w = row[v] + pu + pi[v]
+            if w < best[v]:
+                best[v] = w
+                parent[v] = u
+    edges = sorted(dist[special][v] + pi[special] + pi[v] for v in nodes)
+    weight += edges[0] + edges[1]
+    degree[special] = 2
+    for v in sorted(nodes, key=lambda v: dist[special][v] + pi[v])[:2]:
+        degree[v] += 1
+    return weight - 2 * sum(pi), degree
+
+
+def held_karp_lower_bound(
+    dist: List[List[float]],
+    start: int,
+    end: int,
+    upper_bound: float,
+    iterations: int = LOWER_BOUND_ITERATIONS,
+    deadline: Optional[float] = None,
+) -> Optional[float]:
+    """
+    Held-Karp 1-tree bound with subgradient optimization. Pass end == start
+    for a cycle; for a path the start-end edge is made free, which turns any
+    start-to-end path into a cycle of the same cost, so the bound still holds.
+    Returns None when the matrix has unreachable pairs.
+    """
+    n = len(dist)
+    if n < 3 or any(d == float("inf") for row in dist for d in row):
+        return None
+    if start != end:
+        dist = [list(row) for row in dist]
+        dist[start][end] = dist[end][start] = 0.0
+
+    pi = [0.0] * n
+    best = float("-inf")
+    step_scale = 2.0
+    stale = 0
+    for _ in range(iterations):
+        bound, degree = _one_tree(dist, start, pi)
+        if bound > best + 1e-9:
+            best, stale = bound, 0
+        else:
+            stale += 1
+            if stale >= LOWER_BOUND_STALE_WINDOW:
+                step_scale, stale = step_scale * LOWER_BOUND_STEP_DECAY, 0
+        subgradient = [d - 2 for d in degree]
+        norm = sum(g * g for g in subgradient)
+        if norm == 0 or upper_bound <= bound or (deadline and time.monotonic() > deadline):
+            break
+        step = step_scale * (upper_bound - bound) / norm
+        pi = [p + step * g for p, g in zip(pi, subgradient)]
+    return min(best, upper_bound)
+
+
 def find_minimum_weight_perfect_matching(G, odd_degree_vertices):
     """Find a minimum weight perfect matching for the given vertices."""
     H = nx.Graph()
@@ -251,7 +520,7 @@ def find_minimum_weight_perfect_matching(G, odd_degree_vertices):
     matching = nx.min_weight_matching(H)
     return matching
 
-def tsp(locations, start_index=0, end_index=None, distance_fn: Optional[DistanceFn] = None, gmaps_client=None):
+def tsp(locations, start_index=0, end_index=None, distance_fn: Optional[DistanceFn] = None, gmaps_client=None, pool=None):
     """
     Implementation of Christofides algorithm for TSP.
     
@@ -263,11 +532,30 @@ def tsp(locations, start_index=0, end_index=None, distance_fn: Optional[Distance
     Returns:
         List of locations in optimized order
     """
+    return solve(locations, start_index, end_index, distance_fn=distance_fn, gmaps_client=gmaps_client, pool=pool).route
+
+
+def solve(
+    locations,
+    start_index=0,
+    end_index=None,
+    distance_fn: Optional[DistanceFn] = None,
+    gmaps_client=None,
+    gap_threshold: float = DEFAULT_GAP_THRESHOLD,
+    pool=None,
+    on_improve: Optional[Callable[[float, Optional[float]], None]] = None,
+) -> SolveResult:
+    """
+    Like tsp(), but returns the SolveResult (route, cost, lower bound, gap).
+    The matrix is always fetched here; with a SolverPool the CPU-bound solve
+    runs in a worker process, where on_improve cannot be reported.
+    """
     if len(locations) < 2:
-        return locations
+        return SolveResult(order=list(range(len(locations))), cost=0.0, lower_bound=0.0, strategy="trivial", route=list(locations))
     
     if len(locations) == 2:
-        return locations if start_index == 0 else [locations[1], locations[0]]
+        order = [0, 1] if start_index == 0 else [1, 0]
+        return SolveResult(order=order, cost=None, strategy="trivial", route=[locations[i] for i in order])
     
     # Validate indices
     if start_index < 0 or start_index >= len(locations):
@@ -281,19 +569,86 @@ def tsp(locations, start_index=0, end_index=None, distance_fn: Optional[Distance
     
     distance = distance_fn or make_cached_distance_fn(locations, gmaps_client=gmaps_client)
     dist = _build_distance_matrix(locations, distance)
+    if pool is not None:
+        result = pool.run(solve_matrix, dist, start_index, end_index, gap_threshold=gap_threshold, size=len(dist))
+    else:
+        result = solve_matrix(dist, start_index, end_index, gap_threshold=gap_threshold, on_improve=on_improve)
+    result.route = [locations[i] for i in result.order]
+    return result
+
+
+def solve_matrix(
+    dist: List[List[float]],
+    start_index: int,
+    end_index: Optional[int] = None,
+    gap_threshold: float = DEFAULT_GAP_THRESHOLD,
+    max_restarts: int = MAX_RESTARTS,
+    time_limit: float = SOLVE_TIME_LIMIT_SECONDS,
+    on_improve: Optional[Callable[[float, Optional[float]], None]] = None,
+) -> SolveResult:
+    """
+    Solve on a precomputed matrix. Small trips are exact; larger ones are
+    constructed (Christofides for cycles, nearest neighbor for paths) and
+    improved with local search, then double-bridge restarts until the tour is
+    within gap_threshold of the Held-Karp lower bound. Improvement stops at
+    time_limit either way, keeping the best tour found.
+    on_improve(best_cost, lower_bound) is called whenever the tour improves.
+    """
     is_cycle = end_index is None
+    end = start_index if is_cycle else end_index
 
     # Small trips get the true optimum; cycles are the end == start case.
-    if len(locations) <= EXACT_SOLVE_MAX_STOPS:
-        order = _held_karp(dist, start_index, start_index if is_cycle else end_index)
-        return [locations[i] for i in order]
+    if len(dist) <= EXACT_SOLVE_MAX_STOPS:
+        order = _held_karp(dist, start_index, end)
+        cost = _order_cost(order, dist)
+        return SolveResult(order=order, cost=cost, lower_bound=cost, strategy="held_karp")
 
     if is_cycle:
-        order = _christofides_cycle(dist, start_index)
+        order, strategy = _christofides_cycle(dist, start_index), "christofides"
     else:
-        order = _nearest_neighbor_path(dist, start_index, end_index)
-    order = _local_search(order, dist)
-    return [locations[i] for i in order]
+        order, strategy = _nearest_neighbor_path(dist, start_index, end_index), "nearest_neighbor"
+    # The time limit covers the improvement phase; construction always runs.
+    deadline = time.monotonic() + time_limit
+
+    lower_bound = held_karp_lower_bound(
+        dist,
+        start_index,
+        end,
+        _order_cost(order, dist),
+        deadline=time.monotonic() + time_limit * LOWER_BOUND_TIME_SHARE,
+    )
+    target = lower_bound * (1 + gap_threshold) if lower_bound is not None else None
+
+    # The first search always runs to convergence unless time runs out: it
+    # is cheap next to the bound, and stopping it at the gap target leaves
+    # easy improvements on the table. The target only decides on restarts.
+    best = _local_search(order, dist, deadline)
+    best_cost = _order_cost(best, dist)
+    if on_improve is not None:
+        on_improve(best_cost, lower_bound)
+    rng = random.Random(0)
+    restarts = 0
+    while (
+        restarts < max_restarts
+        and len(best) > 4
+        and (target is None or best_cost > target)
+        and time.monotonic() < deadline
+    ):
+        restarts += 1
+        candidate = _local_search(_double_bridge(best, rng), dist, deadline)
+        candidate_cost = _order_cost(candidate, dist)
+        if candidate_cost < best_cost - 1e-9:
+            best, best_cost = candidate, candidate_cost
+            if on_improve is not None:
+                on_improve(best_cost, lower_bound)
+
+    return SolveResult(
+        order=best,
+        cost=best_cost,
+        lower_bound=min(lower_bound, best_cost) if lower_bound is not None else None,
+        strategy=f"{strategy}+local_search",
+        restarts=restarts,
+    )
 
 
 def _christofides_cycle(dist: List[List[float]], start_index: int) -> List[int]:
@@ -354,19 +709,58 @@ def _christofides_cycle(dist: List[List[float]], start_index: int) -> List[int]:
     return hamiltonian_path
 
 
-def route_total_distance(route, distance_fn: Optional[DistanceFn] = None, gmaps_client=None):
+def straight_line_miles(origin: dict, destination: dict) -> float:
+    """Great-circle distance in miles; a free stand-in for driving distance."""
+    lat1, lng1 = math.radians(float(origin["lat"])), math.radians(float(origin["lng"]))
+    lat2, lng2 = math.radians(float(destination["lat"])), math.radians(float(destination["lng"]))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 3959 * 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+
+
+def predicted_improvement(
+    locations,
+    current_order: List[int],
+    start_index=0,
+    end_index=None,
+    time_limit: float = PRECHECK_TIME_LIMIT_SECONDS,
+) -> float:
+    """
+    Fraction by which an optimized order would beat current_order, estimated
+    on straight-line distances so no Distance Matrix call is needed. Pass
+    end_index=None for a cycle, in which case current_order is closed back to
+    its first stop.
+
+    The estimate is a nearest-neighbor tour improved by 2-opt and Or-opt
+    for at most time_limit seconds, not a full solve: callers run it on the
+    request thread before deciding whether to solve at all.
+    """
+    if len(locations) < 3:
+        return 0.0
+    dist = _build_distance_matrix(locations, straight_line_miles)
+    closed = current_order + [current_order[0]] if end_index is None else current_order
+    current_cost = _order_cost(closed, dist)
+    if current_cost <= 0:
+        return 0.0
+    end = start_index if end_index is None else end_index
+    estimate = _local_search(_nearest_neighbor_path(dist, start_index, end), dist, time.monotonic() + time_limit)
+    return max(0.0, (current_cost - _order_cost(estimate, dist)) / current_cost)
+
+
+def route_total_distance(route, distance_fn: Optional[DistanceFn] = None, gmaps_client=None, cache=None):
     if len(route) < 2:
         return 0
+    if distance_fn is None and cache is not None:
+        # Only the legs of this order matter; don't pay for a full matrix.
+        legs = [(route[i], route[i + 1]) for i in range(len(route) - 1)]
+        return sum(fetch_pair_distances(legs, gmaps_client=gmaps_client, cache=cache))
     distance = distance_fn or make_cached_distance_fn(route, gmaps_client=gmaps_client)
     return sum(distance(route[i], route[i + 1]) for i in range(len(route) - 1))
 
 
 def _nearest_neighbor_path(dist: List[List[float]], start_index: int, end_index: int) -> List[int]:
-    """Greedy nearest-neighbor construction for a fixed start and end; the
-    caller is expected to clean it up with _local_search."""
-    unvisited = set(range(len(dist)))
-    unvisited.remove(start_index)
-    unvisited.remove(end_index)
+    """Greedy nearest-neighbor construction for a fixed start and end (equal
+    for a cycle); the caller is expected to clean it up with _local_search."""
+    unvisited = set(range(len(dist))) - {start_index, end_index}
 
     path = [start_index]
     current = start_index
@@ -0,0 +1,144 @@
+"""
+Geometry helpers: geohashes for keying caches by location cell, great-circle
+distances and Google encoded polylines.
+
+A geohash of length n names a cell of roughly:
+    4  ->  39 km x 19.5 km
+    5  -> 4.9 km x 4.9 km
+    6  -> 1.2 km x 0.6 km
+    8  ->  38 m x 19 m
+Points in the same cell share a prefix, so shorter hashes are coarser cells.
+"""
+import math
+from typing import Any, List, Set, Tuple
+
+EARTH_RADIUS_METERS = 6_371_000
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+_DECODE = {char: index for index, char in enumerate(_BASE32)}
+
+
+def geohash_encode(lat: float, lng: float, precision: int = 6) -> str:
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    value = 0
+    even = True  # bits alternate longitude, latitude, starting with longitude
+    while len(chars) < precision:
+        interval, coordinate = (lng_range, lng) if even else (lat_range, lat)
+        mid = (interval[0] + interval[1]) / 2
+        if coordinate >= mid:
+            value = (value << 1) | 1
+            interval[0] = mid
+        else:
+            value <<= 1
+            interval[1] = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(_BASE32[value])
+            bits = value = 0
+    return "".join(chars)
+
+
+def geohash_bounds(geohash: str) -> Tuple[float, float, float, float]:
+    """(min_lat, min_lng, max_lat, max_lng) of the cell."""
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    even = True
+    for char in geohash:
+        value = _DECODE[char]
+        for shift in range(4, -1, -1):
+            interval = lng_range if even else lat_range
+            mid = (interval[0] + interval[1]) / 2
+            if (value >> shift) & 1:
+                interval[0] = mid
+            else:
+                interval[1] = mid
+            even = not even
+    return lat_range[0], lng_range[0], lat_range[1], lng_range[1]
+
+
+def geohash_center(geohash: str) -> Tuple[float, float]:
+    min_lat, min_lng, max_lat, max_lng = geohash_bounds(geohash)
+    return (min_lat + max_lat) / 2, (min_lng + max_lng) / 2
+
+
+def parse_lat_lng(value: Any) -> Tuple[float, float]:
+    """(lat, lng) from a "lat,lng" string, a {"lat", "lng"} dict or a pair,
+    the forms googlemaps accepts for a location."""
+    if isinstance(value, str):
+        lat, lng = value.split(",")
+        return float(lat), float(lng)
+    if isinstance(value, dict):
+        return float(value["lat"]), float(value["lng"])
+    return float(value[0]), float(value[1])
+
+
+def distance_meters(a: Tuple[float, float], b: Tuple[float, float]) -> float:
+    """Great-circle distance between two (lat, lng) points."""
+    lat1, lng1, lat2, lng2 = map(math.radians, (a[0], a[1], b[0], b[1]))
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_METERS * math.asin(math.sqrt(h))
+
+
+def cells_covering(lat: float, lng: float, radius_meters: float, precision: int) -> Set[str]:
+    """Geohash cells of the given precision that intersect the circle's
+    bounding box."""
+    min_lat, min_lng, max_lat, max_lng = geohash_bounds(geohash_encode(lat, lng, precision))
+    cell_lat, cell_lng = max_lat - min_lat, max_lng - min_lng
+    dlat = math.degrees(radius_meters / EARTH_RADIUS_METERS)
+    dlng = dlat / max(math.cos(math.radians(lat)), 1e-6)
+    cells = set()
+    steps_lat = int(dlat / cell_lat) + 1
+    steps_lng = int(dlng / cell_lng) + 1
+    for i in range(-steps_lat, steps_lat + 1):
+        for j in range(-steps_lng, steps_lng + 1):
+            point_lat = min(90.0, max(-90.0, lat + i * cell_lat))
+            point_lng = (lng + j * cell_lng + 180.0) % 360.0 - 180.0
+            cells.add(geohash_encode(point_lat, point_lng, precision))
+    return cells
+
+
+def decode_polyline(encoded: str) -> List[Tuple[float, float]]:
+    """(lat, lng) points of a Google encoded polyline (e.g. a route's
+    overview_polyline.points)."""
+    points = []
+    index = lat = lng = 0
+    while index < len(encoded):
+        deltas = []
+        for _ in range(2):
+            shift = result = 0
+            while True:
+                byte = ord(encoded[index]) - 63
+                index += 1
+                result |= (byte & 0x1F) << shift
+                shift += 5
+                if byte < 0x20:
+                    break
+            deltas.append(~(result >> 1) if result & 1 else result >> 1)
+        lat += deltas[0]
+        lng += deltas[1]
+        points.append((lat / 1e5, lng / 1e5))
+    return points
+
+
+def sample_path(points: List[Tuple[float, float]], count: int) -> List[Tuple[float, float]]:
+    """count points spaced evenly by distance along the path, excluding its
+    ends (the i-th at fraction i / (count + 1) of the length)."""
+    if len(points) < 2 or count <= 0:
+        return []
+    legs = [distance_meters(a, b) for a, b in zip(points, points[1:])]
+    total = sum(legs)
+    samples = []
+    walked = 0.0
+    leg = 0
+    for i in range(1, count + 1):
+        target = total * i / (count + 1)
+        while leg < len(legs) - 1 and walked + legs[leg] < target:
+            walked += legs[leg]
+            leg += 1
+        fraction = (target - walked) / legs[leg] if legs[leg] else 0.0
+        (lat1, lng1), (lat2, lng2) = points[leg], points[leg + 1]
+        samples.append((lat1 + (lat2 - lat1) * fraction, lng1 + (lng2 - lng1) * fraction))
+    return samples
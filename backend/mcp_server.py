@@ -17,7 +17,9 @@ from mcp.server.fastmcp import FastMCP
 from mcp.server.transport_security import TransportSecuritySettings
 
 from routes.trips import build_share_url, serialize_trip
-from services.trip_service import AuthorizationError, NotFoundError, ValidationError
+from services.job_service import JobNotFoundError
+from services.solver_pool import SolverBusyError, SolverTimeoutError
+from services.trip_service import AuthorizationError, ConflictError, NotFoundError, ValidationError
 
 
 def _transport_security() -> TransportSecuritySettings:
@@ -43,7 +45,7 @@ def _transport_security() -> TransportSecuritySettings:
     )
 
 
-def create_mcp_server(trip_service, gmaps_client) -> FastMCP:
+def create_mcp_server(trip_service, gmaps_client, job_service=None) -> FastMCP:
     mcp = FastMCP(
         "pathwise",
         instructions=(
@@ -83,7 +85,10 @@ def create_mcp_server(trip_service, gmaps_client) -> FastMCP:
         """Map service errors to MCP tool errors with readable messages."""
         try:
             return fn()
-        except (AuthorizationError, NotFoundError, ValidationError, ValueError) as error:
+        except (
+            AuthorizationError, ConflictError, NotFoundError, ValidationError, JobNotFoundError,
+            SolverBusyError, SolverTimeoutError, ValueError,
+        ) as error:
             raise ValueError(str(error))
 
     @mcp.tool()
@@ -208,16 +213,76 @@ def create_mcp_server(trip_service, gmaps_client) -> FastMCP:
         day_id: str,
         start_stop_id: Optional[str] = None,
         end_stop_id: Optional[str] = None,
+        run_async: bool = False,
     ) -> Dict[str, Any]:
         """Optimize a day's visiting order for shortest driving distance
         (Christofides TSP). Returns the day with its new route order and
-        total distance in miles."""
-        return _run(lambda: {"day": trip_service.optimize_day(
-            trip_id, day_id,
-            start_stop_id=start_stop_id,
-            end_stop_id=end_stop_id,
-            claim_token=claim_token,
-        ).to_dict()})
+        total distance in miles. For days with many stops pass run_async=True:
+        the result comes back directly if it is quick, otherwise a job to
+        check with get_job."""
+        def run(report=None):
+            return trip_service.optimize_day(
+                trip_id, day_id,
+                start_stop_id=start_stop_id,
+                end_stop_id=end_stop_id,
+                claim_token=claim_token,
+                progress=report,
+            ).to_dict()
+
+        if not run_async or job_service is None:
+            return _run(lambda: {"day": run()})
+
+        def submit():
+            trip_service.get_trip(trip_id, claim_token=claim_token, write=True)
+            job = job_service.submit("optimize_day", run, trip_id=trip_id, day_id=day_id)
+            job = job_service.wait(job.id, job_service.inline_wait_seconds)
+            if job.status == "failed" and job.exception is not None:
+                raise job.exception
+            if job.status == "succeeded":
+                return {"day": job.result}
+            return {"job": job.to_dict()}
+        return _run(submit)
+
+    @mcp.tool()
+    def get_job(job_id: str, claim_token: Optional[str] = None) -> Dict[str, Any]:
+        """Check a background job from optimize_day(run_async=True): status
+        (queued, running, succeeded, failed, cancelled), progress, and the
+        optimized day as result once it has succeeded."""
+        def action():
+            if job_service is None:
+                raise ValueError("Background jobs are not available")
+            job = job_service.get(job_id)
+            if job.tripId:
+                trip_service.get_trip(job.tripId, claim_token=claim_token)
+            return {"job": job.to_dict()}
+        return _run(action)
+
+    @mcp.tool()
+    def select_stops(
+        trip_id: str,
+        claim_token: str,
+        day_id: str,
+        candidates: List[Dict[str, Any]],
+        budget_minutes: Optional[float] = None,
+        budget_miles: Optional[float] = None,
+        dwell_minutes: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """Choose the best subset of candidate places that fits a day and
+        route it in one call. candidates are search_places results (name,
+        lat, lng, rating; an explicit "score" overrides rating). Give either
+        budget_minutes (driving plus dwell_minutes per stop, default 60) or
+        budget_miles. Stops already on the day are kept and the first one is
+        the start. Selected places are added to the day in visiting order."""
+        def action():
+            result = trip_service.select_stops(
+                trip_id, day_id, candidates,
+                budget_minutes=budget_minutes,
+                budget_miles=budget_miles,
+                dwell_minutes=dwell_minutes,
+                claim_token=claim_token,
+            )
+            return {**result, "day": result["day"].to_dict()}
+        return _run(action)
 
     @mcp.tool()
     def search_places(query: str, near: Optional[str] = None, radius: Optional[int] = None) -> Dict[str, Any]:
@@ -67,7 +67,13 @@ class Route:
     startStopId: Optional[str] = None
     endStopId: Optional[str] = None
     totalDistanceMiles: Optional[float] = None
+    # Path distance of the last optimized order; baseline for manual reorders.
+    optimizedDistanceMiles: Optional[float] = None
     optimizedAt: Optional[str] = None
+    # Solver stats for the last optimize (strategy, lower bound, gap).
+    solver: Optional[Dict[str, Any]] = None
+    # Computed arrival/departure per stop when optimized with time windows.
+    schedule: Optional[List[Dict[str, Any]]] = None
 
     @classmethod
     def from_dict(cls, data: Optional[Dict[str, Any]]) -> Optional["Route"]:
@@ -78,7 +84,10 @@ class Route:
             startStopId=data.get("startStopId"),
             endStopId=data.get("endStopId"),
             totalDistanceMiles=data.get("totalDistanceMiles"),
+            optimizedDistanceMiles=data.get("optimizedDistanceMiles"),
             optimizedAt=data.get("optimizedAt"),
+            solver=data.get("solver"),
+            schedule=data.get("schedule"),
         )
 
     def to_dict(self) -> Dict[str, Any]:
@@ -87,7 +96,10 @@ class Route:
             "startStopId": self.startStopId,
             "endStopId": self.endStopId,
             "totalDistanceMiles": self.totalDistanceMiles,
+            "optimizedDistanceMiles": self.optimizedDistanceMiles,
             "optimizedAt": self.optimizedAt,
+            "solver": self.solver,
+            "schedule": self.schedule,
         }
 
 
@@ -0,0 +1,188 @@
+"""
+Orienteering for Pathwise: choose which candidate places to visit, and in
+what order, so the total score is as high as possible within a budget.
+
+Cost is whatever the matrix measures (driving minutes or miles) plus an
+optional per-place service cost (e.g. dwell minutes). The heuristic is:
+  1. seed the route with the required places (already on the day),
+  2. greedy insertion by score per unit of added cost while the budget holds,
+  3. local search - re-solve the visited set as a TSP to free budget, then
+     re-insert, and swap a visited place for a higher-scoring unvisited one -
+     until no move helps or the time limit is reached.
+"""
+
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional
+
+from christofides import solve_matrix
+
+ORIENTEERING_TIME_LIMIT_SECONDS = 0.5
+
+INF = float("inf")
+
+
+@dataclass
+class OrienteeringResult:
+    order: List[int]
+    score: float
+    cost: float
+    skipped: List[int] = field(default_factory=list)
+    strategy: str = "greedy_insertion+local_search"
+
+    def stats(self, budget: float) -> Dict[str, float]:
+        return {
+            "strategy": self.strategy,
+            "score": round(self.score, 2),
+            "cost": round(self.cost, 1),
+            "budget": budget,
+        }
+
+
+class _Route:
+    def __init__(self, dist, scores, service, order):
+        self.dist = dist
+        self.scores = scores
+        self.service = service
+        self.order = order
+
+    def cost(self, order: Optional[List[int]] = None) -> float:
+        order = self.order if order is None else order
+        travel = sum(self.dist[order[i]][order[i + 1]] for i in range(len(order) - 1))
+        return travel + sum(self.service[node] for node in order[1:-1])
+
+    def cheapest_insertion(self, node: int) -> tuple:
+        """(added cost, position) of the cheapest place to insert node."""
+        best_delta, best_position = INF, None
+        dist, order = self.dist, self.order
+        for position in range(1, len(order)):
+            prev, nxt = order[position - 1], order[position]
+            delta = dist[prev][node] + dist[node][nxt] - dist[prev][nxt]
+            if delta < best_delta:
+                best_delta, best_position = delta, position
+        return best_delta + self.service[node], best_position
+
+    def removal_saving(self, position: int) -> float:
+        order, dist = self.order, self.dist
+        prev, node, nxt = order[position - 1], order[position], order[position + 1]
+        return dist[prev][node] + dist[node][nxt] - dist[prev][nxt] + self.service[node]
+
+
+def solve_orienteering(
+    dist: List[List[float]],
+    scores: List[float],
+    budget: float,
+    start_index: int = 0,
+    end_index: Optional[int] = None,
+    service: Optional[List[float]] = None,
+    required: Iterable[int] = (),
+    time_limit: float = ORIENTEERING_TIME_LIMIT_SECONDS,
+) -> OrienteeringResult:
+    """
+    Best-scoring route from start_index to end_index (back to the start when
+    end_index is None) whose cost stays within budget. Required nodes are
+    always visited, even when they alone exceed the budget.
+    """
+    n = len(dist)
+    end = start_index if end_index is None else end_index
+    service = list(service) if service is not None else [0.0] * n
+    required = [node for node in required if node not in (start_index, end)]
+    deadline = time.monotonic() + time_limit
+
+    route = _Route(dist, scores, service, [start_index, end])
+    for node in required:
+        route.order.insert(route.cheapest_insertion(node)[1], node)
+    _reroute(route, start_index, end_index)
+
+    fixed = {start_index, end, *required}
+    candidates = [node for node in range(n) if node not in fixed and scores[node] > 0]
+    _greedy_fill(route, candidates, budget)
+
+    improved = True
+    while improved and time.monotonic() < deadline:
+        improved = False
+        _reroute(route, start_index, end_index)
+        if _greedy_fill(route, candidates, budget):
+            improved = True
+        if _swap_pass(route, candidates, fixed, budget, deadline):
+            improved = True
+
+    visited = set(route.order)
+    return OrienteeringResult(
+        order=route.order,
+        score=sum(scores[node] for node in visited if node not in (start_index, end)),
+        cost=route.cost(),
+        skipped=[node for node in candidates if node not in visited],
+    )
+
+
+def _reroute(route: _Route, start_index: int, end_index: Optional[int]) -> None:
+    """Re-solve the order of the visited nodes; insertion alone leaves
+    crossings that waste budget."""
+    nodes = route.order[:-1] if end_index is None else route.order
+    if len(nodes) < 4:
+        return
+    sub = [[route.dist[a][b] for b in nodes] for a in nodes]
+    result = solve_matrix(
+        sub,
+        nodes.index(start_index),
+        None if end_index is None else nodes.index(end_index),
+        time_limit=0.05,
+    )
+    order = [nodes[i] for i in result.order]
+    if route.cost(order) < route.cost() - 1e-9:
+        route.order = order
+
+
+def _greedy_fill(route: _Route, candidates: List[int], budget: float) -> bool:
+    """Insert unvisited candidates by best score per added cost while they
+    fit the budget. Returns whether anything was inserted."""
+    inserted = False
+    cost = route.cost()
+    while True:
+        visited = set(route.order)
+        best, best_ratio = None, -1.0
+        for node in candidates:
+            if node in visited:
+                continue
+            delta, position = route.cheapest_insertion(node)
+            if position is None or cost + delta > budget + 1e-9:
+                continue
+            ratio = route.scores[node] / max(delta, 1e-9)
+            if ratio > best_ratio:
+                best, best_ratio = (node, delta, position), ratio
+        if best is None:
+            return inserted
+        node, delta, position = best
+        route.order.insert(position, node)
+        cost += delta
+        inserted = True
+
+
+def _swap_pass(route: _Route, candidates: List[int], fixed: set, budget: float, deadline: float) -> bool:
+    """Replace one visited candidate with an unvisited one that scores higher
+    (or the same for less cost) and still fits the budget."""
+    cost = route.cost()
+    visited = set(route.order)
+    outside = sorted((node for node in candidates if node not in visited), key=lambda node: -route.scores[node])
+    for position in range(1, len(route.order) - 1):
+        removed = route.order[position]
+        if removed in fixed:
+            continue
+        without = route.order[:position] + route.order[position + 1:]
+        base_cost = cost - route.removal_saving(position)
+        trial = _Route(route.dist, route.scores, route.service, without)
+        for node in outside:
+            if route.scores[node] < route.scores[removed]:
+                break
+            delta, insert_at = trial.cheapest_insertion(node)
+            if base_cost + delta > budget + 1e-9:
+                continue
+            if route.scores[node] == route.scores[removed] and base_cost + delta >= cost - 1e-9:
+                continue
+            without.insert(insert_at, node)
+            route.order = without
+            return True
+        if time.monotonic() > deadline:
+            break
+    return False
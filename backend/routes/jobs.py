@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import json
+from typing import Optional
+
+from flask import Blueprint, Response, jsonify, stream_with_context
+
+from auth import claim_token_from_request, current_uid
+from services.job_service import Job, JobNotFoundError, JobService
+from services.trip_service import AuthorizationError, NotFoundError, TripService
+
+
+def job_response(job_service: JobService, job: Job, key: Optional[str] = None):
+    """
+    Answer an async-capable request: if the job finishes within the inline
+    wait, return its result like the synchronous endpoint would (under key,
+    or merged when key is None) plus the job; otherwise 202 with the job.
+    """
+    job = job_service.wait(job.id, job_service.inline_wait_seconds)
+    if job.status == "failed" and job.exception is not None:
+        raise job.exception
+    if job.status == "succeeded":
+        payload = {key: job.result} if key else dict(job.result)
+        payload["job"] = job.to_dict()
+        return jsonify(payload)
+    response = jsonify({"job": job.to_dict()})
+    response.headers["Location"] = f"/api/jobs/{job.id}"
+    return response, 202
+
+
+def create_jobs_blueprint(job_service: JobService, trip_service: TripService) -> Blueprint:
+    bp = Blueprint("jobs", __name__, url_prefix="/api/jobs")
+
+    @bp.errorhandler(JobNotFoundError)
+    @bp.errorhandler(NotFoundError)
+    def handle_not_found(error):
+        return jsonify({"error": str(error)}), 404
+
+    @bp.errorhandler(AuthorizationError)
+    def handle_auth_error(error):
+        return jsonify({"error": str(error)}), 403
+
+    def authorized_job(job_id: str, write: bool = False) -> Job:
+        # Trip jobs need the same access as the trip; other job ids are
+        # unguessable and act as their own capability.
+        job = job_service.get(job_id)
+        if job.tripId:
+            trip_service.get_trip(
+                job.tripId,
+                uid=current_uid(optional=True),
+                claim_token=claim_token_from_request(),
+                write=write,
+            )
+        return job
+
+    @bp.route("/<job_id>", methods=["GET"])
+    def get_job(job_id):
+        return jsonify({"job": authorized_job(job_id).to_dict()})
+
+    @bp.route("/<job_id>", methods=["DELETE"])
+    def cancel_job(job_id):
+        authorized_job(job_id, write=True)
+        return jsonify({"job": job_service.cancel(job_id).to_dict()})
+
+    @bp.route("/<job_id>/events", methods=["GET"])
+    def stream_job(job_id):
+        authorized_job(job_id)
+
+        def generate():
+            for snapshot in job_service.watch(job_id):
+                yield json.dumps(snapshot) + "\n"
+
+        return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+    return bp
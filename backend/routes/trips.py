@@ -1,11 +1,14 @@
 from __future__ import annotations
 
 import os
+from typing import Any, Dict, Optional
 
 from flask import Blueprint, g, jsonify, request
 
 from auth import claim_token_from_request, current_uid, require_user
-from services.trip_service import AuthorizationError, NotFoundError, TripService, ValidationError
+from routes.jobs import job_response
+from services.job_service import JobService
+from services.trip_service import AuthorizationError, ConflictError, NotFoundError, TripService, ValidationError
 
 FRONTEND_BASE_URL = os.getenv("FRONTEND_BASE_URL", "https://pathwise.web.app")
 
@@ -17,7 +20,16 @@ def build_share_url(trip) -> str:
     return url
 
 
-def create_trips_blueprint(trip_service: TripService) -> Blueprint:
+def _optional_number(data: Dict[str, Any], key: str) -> Optional[float]:
+    if data.get(key) is None:
+        return None
+    try:
+        return float(data[key])
+    except (TypeError, ValueError):
+        raise ValidationError(f"{key} must be a number")
+
+
+def create_trips_blueprint(trip_service: TripService, job_service: Optional[JobService] = None) -> Blueprint:
     bp = Blueprint("trips", __name__, url_prefix="/api/trips")
 
     @bp.errorhandler(AuthorizationError)
@@ -32,6 +44,10 @@ def create_trips_blueprint(trip_service: TripService) -> Blueprint:
     def handle_validation(error):
         return jsonify({"error": str(error)}), 400
 
+    @bp.errorhandler(ConflictError)
+    def handle_conflict(error):
+        return jsonify({"error": str(error)}), 409
+
     @bp.route("", methods=["POST"])
     def create_trip():
         data = request.get_json(silent=True) or {}
@@ -151,6 +167,20 @@ def create_trips_blueprint(trip_service: TripService) -> Blueprint:
         )
         return jsonify({"day": day.to_dict()})
 
+    @bp.route("/<trip_id>/days/<day_id>/route-preview", methods=["POST"])
+    def preview_route(trip_id, day_id):
+        data = request.get_json(silent=True) or {}
+        orders = data.get("orders") or ([data["orderedStopIds"]] if data.get("orderedStopIds") else [])
+        return jsonify(
+            trip_service.preview_route(
+                trip_id,
+                day_id,
+                orders,
+                uid=current_uid(optional=True),
+                claim_token=claim_token_from_request(),
+            )
+        )
+
     @bp.route("/<trip_id>/stops/<stop_id>/move", methods=["POST"])
     def move_stop(trip_id, stop_id):
         data = request.get_json(silent=True) or {}
@@ -167,15 +197,47 @@ def create_trips_blueprint(trip_service: TripService) -> Blueprint:
     @bp.route("/<trip_id>/days/<day_id>/optimize", methods=["POST"])
     def optimize_day(trip_id, day_id):
         data = request.get_json(silent=True) or {}
-        day = trip_service.optimize_day(
+        options = dict(
+            start_stop_id=data.get("startStopId"),
+            end_stop_id=data.get("endStopId"),
+            uid=current_uid(optional=True),
+            claim_token=claim_token_from_request(),
+            gap_threshold=_optional_number(data, "maxGap"),
+            precheck_threshold=_optional_number(data, "precheckThreshold"),
+            force=bool(data.get("force")),
+            mode={"timeWindows": "time_windows"}.get(data.get("mode"), data.get("mode")),
+            day_start=data.get("dayStart"),
+            dwell_minutes=_optional_number(data, "dwellMinutes"),
+        )
+        if data.get("async") and job_service is not None:
+            # Check access up front so unauthorized callers get a 403, not a job.
+            trip_service.get_trip(trip_id, uid=options["uid"], claim_token=options["claim_token"], write=True)
+            job = job_service.submit(
+                "optimize_day",
+                lambda report: trip_service.optimize_day(trip_id, day_id, progress=report, **options).to_dict(),
+                trip_id=trip_id,
+                day_id=day_id,
+            )
+            return job_response(job_service, job, key="day")
+        day = trip_service.optimize_day(trip_id, day_id, **options)
+        return jsonify({"day": day.to_dict()})
+
+    @bp.route("/<trip_id>/days/<day_id>/select-stops", methods=["POST"])
+    def select_stops(trip_id, day_id):
+        data = request.get_json(silent=True) or {}
+        result = trip_service.select_stops(
             trip_id,
             day_id,
+            data.get("candidates") or [],
+            budget_minutes=_optional_number(data, "budgetMinutes"),
+            budget_miles=_optional_number(data, "budgetMiles"),
             start_stop_id=data.get("startStopId"),
             end_stop_id=data.get("endStopId"),
+            dwell_minutes=_optional_number(data, "dwellMinutes"),
             uid=current_uid(optional=True),
             claim_token=claim_token_from_request(),
         )
-        return jsonify({"day": day.to_dict()})
+        return jsonify({**result, "day": result["day"].to_dict()})
 
     @bp.route("/<trip_id>/export/google-maps", methods=["GET"])
     def export_google_maps(trip_id):
@@ -188,6 +250,16 @@ def create_trips_blueprint(trip_service: TripService) -> Blueprint:
             )
         )
 
+    @bp.route("/<trip_id>/weather", methods=["GET"])
+    def trip_weather(trip_id):
+        return jsonify(
+            trip_service.trip_weather(
+                trip_id,
+                uid=current_uid(optional=True),
+                claim_token=claim_token_from_request(),
+            )
+        )
+
     return bp
 
 
@@ -0,0 +1,288 @@
+"""
+Time-window-aware day scheduling (TSP with time windows) for Pathwise.
+
+Stops may pin arrivalTime / departureTime (e.g. a dinner reservation). A pinned
+arrivalTime means service starts exactly then - arriving early waits, arriving
+late violates the pin. A pinned departureTime means the stop must be left by
+then. Every other stop gets a default dwell time and no window.
+
+The solver minimizes driving minutes among orders that meet every pin:
+  1. candidates from a plain TSP solve and a deadline-ordered insertion,
+  2. relocate / 2-opt local search that never trades feasibility for travel,
+  3. for small days, an exact depth-first search that prunes with time-window
+     propagation and (visited, last stop) dominance.
+When no order meets every pin, the least-late order is returned with its
+violations so the caller can tell the user which pin cannot be kept.
+"""
+
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from christofides import solve_matrix
+
+DEFAULT_DWELL_MINUTES = 60
+DEFAULT_DAY_START = "09:00"
+# Exact search is attempted up to this many stops, within the time limit.
+EXACT_TW_MAX_STOPS = 12
+TW_TIME_LIMIT_SECONDS = 0.4
+
+INF = float("inf")
+_CLOCK_RE = re.compile(r"(?:\d{4}-\d{2}-\d{2}[T ])?(\d{1,2}):(\d{2})(?::(\d{2}))?")
+
+
+def parse_clock(value: Optional[str]) -> Optional[float]:
+    """Minutes after midnight for 'HH:MM', 'HH:MM:SS' or an ISO datetime."""
+    if not value:
+        return None
+    match = _CLOCK_RE.match(str(value).strip())
+    if not match:
+        return None
+    hours, minutes, seconds = match.groups()
+    return int(hours) * 60 + int(minutes) + int(seconds or 0) / 60
+
+
+def format_clock(minutes: float) -> str:
+    """'HH:MM' for minutes after midnight; hours run past 24 on overflow."""
+    hours, mins = divmod(int(round(minutes)), 60)
+    return f"{hours:02d}:{mins:02d}"
+
+
+@dataclass
+class ScheduleResult:
+    order: List[int]
+    feasible: bool
+    travel_minutes: float
+    late_minutes: float
+    visits: List[Dict[str, Any]] = field(default_factory=list)
+    strategy: str = "insertion"
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "strategy": self.strategy,
+            "feasible": self.feasible,
+            "travelMinutes": round(self.travel_minutes, 1),
+            "lateMinutes": round(self.late_minutes, 1),
+        }
+
+
+def time_windows(stops: List[dict], default_dwell: float = DEFAULT_DWELL_MINUTES) -> Tuple[List[float], List[float], List[float]]:
+    """(ready, due, dwell) per stop: service may start in [ready, due] and
+    lasts dwell minutes."""
+    ready, due, dwell = [], [], []
+    for stop in stops:
+        arrival = parse_clock(stop.get("arrivalTime"))
+        departure = parse_clock(stop.get("departureTime"))
+        stay = departure - arrival if arrival is not None and departure is not None and departure > arrival else default_dwell
+        if arrival is not None:
+            ready.append(arrival)
+            due.append(arrival)
+        elif departure is not None:
+            ready.append(0.0)
+            due.append(departure - stay)
+        else:
+            ready.append(0.0)
+            due.append(INF)
+        dwell.append(stay)
+    return ready, due, dwell
+
+
+class _Problem:
+    def __init__(self, durations, ready, due, dwell, start, end, depart_at):
+        self.durations = durations
+        self.ready = ready
+        self.due = due
+        self.dwell = dwell
+        self.start = start
+        self.end = end
+        self.is_cycle = start == end
+        self.depart_at = depart_at
+
+    def evaluate(self, order: List[int]) -> Tuple[float, float]:
+        """(late minutes, travel minutes) when driving order from depart_at."""
+        clock, travel, late = self.depart_at, 0.0, 0.0
+        last = len(order) - 1
+        for position in range(1, len(order)):
+            node = order[position]
+            leg = self.durations[order[position - 1]][node]
+            travel += leg
+            clock += leg
+            if position == last and self.is_cycle:
+                break
+            clock = max(clock, self.ready[node])
+            if clock > self.due[node]:
+                late += clock - self.due[node]
+            clock += self.dwell[node]
+        return late, travel
+
+    def visits(self, order: List[int]) -> List[Dict[str, Any]]:
+        clock = self.depart_at
+        visits = [{"index": order[0], "arrival": None, "start": None, "departure": clock, "wait": 0.0, "late": 0.0}]
+        last = len(order) - 1
+        for position in range(1, len(order)):
+            node = order[position]
+            arrival = clock + self.durations[order[position - 1]][node]
+            if position == last and self.is_cycle:
+                visits.append({"index": node, "arrival": arrival, "start": arrival, "departure": None, "wait": 0.0, "late": 0.0})
+                break
+            start = max(arrival, self.ready[node])
+            clock = start + self.dwell[node]
+            visits.append({
+                "index": node,
+                "arrival": arrival,
+                "start": start,
+                "departure": clock,
+                "wait": start - arrival,
+                "late": max(0.0, start - self.due[node]),
+            })
+        return visits
+
+
+def solve_time_windows(
+    durations: List[List[float]],
+    ready: List[float],
+    due: List[float],
+    dwell: List[float],
+    start_index: int = 0,
+    end_index: Optional[int] = None,
+    depart_at: float = 9 * 60,
+    time_limit: float = TW_TIME_LIMIT_SECONDS,
+) -> ScheduleResult:
+    """Best order by (late minutes, travel minutes); see the module docstring."""
+    n = len(durations)
+    end = start_index if end_index is None else end_index
+    problem = _Problem(durations, ready, due, dwell, start_index, end, depart_at)
+    deadline = time.monotonic() + time_limit
+
+    if n < 3:
+        order = [start_index] + [i for i in range(n) if i not in (start_index, end)] + [end]
+        return _result(problem, order, "trivial")
+
+    candidates = [_deadline_insertion(problem)]
+    if all(d != INF for row in durations for d in row):
+        candidates.append(solve_matrix(durations, start_index, end_index, time_limit=time_limit / 4).order)
+    best = min(candidates, key=problem.evaluate)
+    best = _feasible_local_search(problem, best, deadline)
+    strategy = "insertion+local_search"
+
+    if n <= EXACT_TW_MAX_STOPS:
+        exact = _exact_search(problem, best, deadline)
+        if exact is not None:
+            best, strategy = exact, "branch_and_bound"
+    return _result(problem, best, strategy)
+
+
+def _result(problem: _Problem, order: List[int], strategy: str) -> ScheduleResult:
+    late, travel = problem.evaluate(order)
+    return ScheduleResult(
+        order=order,
+        feasible=late <= 1e-6,
+        travel_minutes=travel,
+        late_minutes=late,
+        visits=problem.visits(order),
+        strategy=strategy,
+    )
+
+
+def _deadline_insertion(problem: _Problem) -> List[int]:
+    """Insert stops tightest-deadline first, each where it is least late and
+    then cheapest."""
+    others = [i for i in range(len(problem.durations)) if i not in (problem.start, problem.end)]
+    others.sort(key=lambda i: (problem.due[i], problem.ready[i]))
+    order = [problem.start, problem.end]
+    for node in others:
+        best_order, best_score = None, None
+        for position in range(1, len(order)):
+            candidate = order[:position] + [node] + order[position:]
+            score = problem.evaluate(candidate)
+            if best_score is None or score < best_score:
+                best_order, best_score = candidate, score
+        order = best_order
+    return order
+
+
+def _feasible_local_search(problem: _Problem, order: List[int], deadline: float) -> List[int]:
+    """Relocate and 2-opt moves accepted only if (late, travel) improves."""
+    best_score = problem.evaluate(order)
+    improved = True
+    while improved and time.monotonic() < deadline:
+        improved = False
+        for i in range(1, len(order) - 1):
+            for j in range(1, len(order) - 1):
+                if i == j:
+                    continue
+                moved = order[:i] + order[i + 1:]
+                moved.insert(j, order[i])
+                score = problem.evaluate(moved)
+                if score < best_score:
+                    order, best_score, improved = moved, score, True
+        for i in range(1, len(order) - 2):
+            for j in range(i + 1, len(order) - 1):
+                reversed_segment = order[:i] + order[i:j + 1][::-1] + order[j + 1:]
+                score = problem.evaluate(reversed_segment)
+                if score < best_score:
+                    order, best_score, improved = reversed_segment, score, True
+    return order
+
+
+def _exact_search(problem: _Problem, incumbent: List[int], deadline: float) -> Optional[List[int]]:
+    """
+    Depth-first search over feasible orders only. A branch is cut when its
+    travel already reaches the incumbent's, when some unvisited stop could no
+    longer be reached before its due time (time-window propagation), or when
+    another partial route ending at the same stop with the same visited set
+    is both earlier and shorter (dominance). Returns None when nothing better
+    than the incumbent was found before the deadline.
+    """
+    durations, ready, due, dwell = problem.durations, problem.ready, problem.due, problem.dwell
+    late, travel = problem.evaluate(incumbent)
+    best_travel = travel if late <= 1e-6 else INF
+    best_order: List[Optional[List[int]]] = [None]
+    middle = [i for i in range(len(durations)) if i not in (problem.start, problem.end)]
+    full = (1 << len(middle)) - 1
+    labels: Dict[Tuple[int, int], List[Tuple[float, float]]] = {}
+    timed_out = [False]
+
+    def dominated(mask: int, node: int, clock: float, cost: float) -> bool:
+        key = (mask, node)
+        frontier = labels.setdefault(key, [])
+        for other_clock, other_cost in frontier:
+            if other_clock <= clock and other_cost <= cost:
+                return True
+        frontier[:] = [(c, t) for c, t in frontier if not (clock <= c and cost <= t)]
+        frontier.append((clock, cost))
+        return False
+
+    def search(node: int, mask: int, clock: float, cost: float, path: List[int]) -> None:
+        nonlocal best_travel
+        if timed_out[0] or time.monotonic() > deadline:
+            timed_out[0] = True
+            return
+        if mask == full:
+            arrival = clock + durations[node][problem.end]
+            total = cost + durations[node][problem.end]
+            if not problem.is_cycle and max(arrival, ready[problem.end]) > due[problem.end]:
+                return
+            if total < best_travel - 1e-9:
+                best_travel = total
+                best_order[0] = path + [problem.end]
+            return
+        for bit, other in enumerate(middle):
+            if not mask >> bit & 1 and max(clock + durations[node][other], ready[other]) > due[other]:
+                return
+        for bit, other in sorted(enumerate(middle), key=lambda item: durations[node][item[1]]):
+            if mask >> bit & 1:
+                continue
+            leg = durations[node][other]
+            start = max(clock + leg, ready[other])
+            if start > due[other] or cost + leg >= best_travel:
+                continue
+            next_mask = mask | (1 << bit)
+            next_clock = start + dwell[other]
+            if dominated(next_mask, other, next_clock, cost + leg):
+                continue
+            search(other, next_mask, next_clock, cost + leg, path + [other])
+
+    search(problem.start, 0, problem.depart_at, 0.0, [problem.start])
+    return best_order[0]
@@ -0,0 +1,188 @@
+"""
+End-to-end latency benchmark replayed from a cassette (services/cassette.py),
+so changes to get_chat_response and optimize_day can be timed reproducibly
+without network access.
+
+Record once, with real credentials (Maps key; Vertex for the chat flow):
+    python scripts/bench_replay.py record bench.cassette.json.gz
+    python scripts/bench_replay.py record chat.json --flows chat --messages turns.json
+
+Replay as often as needed, offline:
+    python scripts/bench_replay.py replay bench.cassette.json.gz --repeat 5
+    python scripts/bench_replay.py replay bench.cassette.json.gz --speed 0   # own time only
+
+Flows:
+    optimize   a three-day trip (one stop per day geocoded by name) optimized day by day
+    chat       one agent turn per --messages entry, against a stored trip
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from collections import Counter
+from typing import Dict, List
+
+# christofides builds a module-level Maps client at import; replay never
+# calls it, but the key must look valid. Recording needs the real key.
+os.environ.setdefault("NEXT_PUBLIC_GOOGLE_MAPS_API_KEY", "AIza-offline-benchmark")
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from agent import get_chat_response  # noqa: E402
+from christofides import make_maps_client  # noqa: E402
+from services.cassette import RECORD, REPLAY, Cassette  # noqa: E402
+from services.distance_cache import DistanceCache  # noqa: E402
+from services.trip_repository import InMemoryTripRepository  # noqa: E402
+from services.trip_service import TripService  # noqa: E402
+
+OWNER = "bench_user"
+DAYS = [
+    [
+        {"name": "Empire State Building", "lat": 40.7484, "lng": -73.9857},
+        {"name": "Central Park", "lat": 40.7829, "lng": -73.9654},
+        {"name": "Statue of Liberty", "lat": 40.6892, "lng": -74.0445},
+        {"name": "The Metropolitan Museum of Art", "lat": 40.7794, "lng": -73.9632},
+        {"name": "Katz's Delicatessen", "lat": 40.7223, "lng": -73.9874},
+        {"name": "Brooklyn Bridge", "lat": 40.7061, "lng": -73.9969},
+        {"name": "Grand Central Terminal, New York"},
+    ],
+    [
+        {"name": "Liberty Bell", "lat": 39.9496, "lng": -75.1503},
+        {"name": "Reading Terminal Market", "lat": 39.9533, "lng": -75.1592},
+        {"name": "Philadelphia Museum of Art", "lat": 39.9656, "lng": -75.1810},
+        {"name": "Rittenhouse Square", "lat": 39.9495, "lng": -75.1718},
+        {"name": "Eastern State Penitentiary, Philadelphia"},
+    ],
+    [
+        {"name": "Faneuil Hall", "lat": 42.3600, "lng": -71.0568},
+        {"name": "Boston Common", "lat": 42.3551, "lng": -71.0657},
+        {"name": "Fenway Park", "lat": 42.3467, "lng": -71.0972},
+        {"name": "Harvard Square", "lat": 42.3736, "lng": -71.1190},
+        {"name": "Museum of Fine Arts", "lat": 42.3394, "lng": -71.0940},
+        {"name": "USS Constitution Museum, Boston"},
+    ],
+]
+DEFAULT_MESSAGES = [
+    "Find two coffee shops near Central Park and add the best rated one to day 1, then optimize day 1.",
+]
+
+
+def make_service(cassette: Cassette, live_client) -> TripService:
+    return TripService(
+        InMemoryTripRepository(),
+        gmaps_client=cassette.maps(live_client),
+        distance_cache=DistanceCache(),
+    )
+
+
+def optimize_flow(cassette: Cassette, live_client, messages: List[str]) -> None:
+    service = make_service(cassette, live_client)
+    trip = service.create_trip(owner_id=OWNER, title="Bench", days=[{"stops": stops} for stops in DAYS])
+    for day in trip.days:
+        service.optimize_day(trip.id, day.id, uid=OWNER, force=True)
+
+
+def chat_flow(cassette: Cassette, live_client, messages: List[str]) -> None:
+    service = make_service(cassette, live_client)
+    trip = service.create_trip(owner_id=OWNER, title="Bench", days=[{"stops": DAYS[0][:3]}])
+    history = [{"role": "system", "content": "You are Pathwise, a trip planning assistant."}]
+    for message in messages:
+        history.append({"role": "user", "content": message})
+        reply = ""
+        for event in get_chat_response(
+            history, service.gmaps, trip_service=service, trip_id=trip.id, uid=OWNER, cassette=cassette
+        ):
+            if event.get("type") == "text":
+                reply += event.get("delta") or ""
+        history.append({"role": "assistant", "content": reply})
+
+
+FLOWS = {"optimize": optimize_flow, "chat": chat_flow}
+
+
+def run_flows(cassette: Cassette, flows: List[str], messages: List[str], live_client=None) -> Dict[str, float]:
+    timings = {}
+    for name in flows:
+        started = time.perf_counter()
+        FLOWS[name](cassette, live_client, messages)
+        timings[name] = time.perf_counter() - started
+    return timings
+
+
+def record(args) -> None:
+    cassette = Cassette(args.cassette, mode=RECORD)
+    timings = run_flows(cassette, args.flows, load_messages(args.messages), live_client=make_maps_client())
+    cassette.save()
+    calls = Counter(interaction["kind"] for interaction in cassette.interactions)
+    print(f"Recorded {len(cassette.interactions)} interactions to {args.cassette}: {dict(calls)}")
+    for name, seconds in timings.items():
+        print(f"{name:>10} {seconds:8.3f}s (live)")
+
+
+def replay(args) -> dict:
+    runs: Dict[str, List[float]] = {name: [] for name in args.flows}
+    recorded = None
+    for _ in range(args.repeat):
+        # Replay consumes interactions, so every run gets a fresh cassette.
+        cassette = Cassette(args.cassette, mode=REPLAY, speed=args.speed)
+        recorded = recorded or cassette.interactions
+        for name, seconds in run_flows(cassette, args.flows, load_messages(args.messages)).items():
+            runs[name].append(seconds)
+
+    service_seconds = Counter()
+    for interaction in recorded:
+        service_seconds[interaction["kind"]] += interaction.get("latency", 0.0)
+    report = {
+        "cassette": args.cassette,
+        "speed": args.speed,
+        "repeat": args.repeat,
+        "flows": {
+            name: {"medianSeconds": round(statistics.median(seconds), 4), "runs": [round(s, 4) for s in seconds]}
+            for name, seconds in runs.items()
+        },
+        "recordedServiceSeconds": {kind: round(seconds, 3) for kind, seconds in sorted(service_seconds.items())},
+    }
+    for name, result in report["flows"].items():
+        print(f"{name:>10} median {result['medianSeconds']:8.3f}s over {args.repeat} run(s) at speed {args.speed}")
+    print(f"recorded external time: {report['recordedServiceSeconds']}")
+    if args.output:
+        with open(args.output, "w") as handle:
+            json.dump(report, handle, indent=2)
+    return report
+
+
+def load_messages(path) -> List[str]:
+    if not path:
+        return DEFAULT_MESSAGES
+    with open(path) as handle:
+        return json.load(handle)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Record or replay end-to-end flows against a cassette.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    for name in ("record", "replay"):
+        command = commands.add_parser(name)
+        command.add_argument("cassette", help="cassette path; .gz is compressed")
+        command.add_argument("--flows", nargs="+", choices=sorted(FLOWS), default=["optimize"])
+        command.add_argument("--messages", help="JSON list of user messages for the chat flow")
+    commands.choices["replay"].add_argument("--repeat", type=int, default=3)
+    commands.choices["replay"].add_argument("--speed", type=float, default=1.0,
+                                            help="multiplier on recorded latencies; 0 measures our own time")
+    commands.choices["replay"].add_argument("--output", help="write the JSON report here")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> None:
+    args = parse_args(argv)
+    if args.command == "record":
+        record(args)
+    else:
+        replay(args)
+
+
+if __name__ == "__main__":
+    main()
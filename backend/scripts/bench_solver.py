@@ -0,0 +1,297 @@
+"""
+Offline benchmark for the route solver: latency, peak memory and tour
+quality per strategy on seeded synthetic layouts. Distances are straight-line
+miles, so no Maps API calls are made.
+
+Run from backend/:
+    python scripts/bench_solver.py                         # default suite
+    python scripts/bench_solver.py --sizes 20 50 --layouts uniform clustered
+    python scripts/bench_solver.py --output bench.json
+    python scripts/bench_solver.py --compare before.json --output after.json
+
+Strategies:
+    construction       Christofides (cycles) / nearest neighbor (paths) only
+    local_search       construction + 2-opt / Or-opt to convergence
+    solve_matrix       the production pipeline (bounds, restarts, time limit)
+    held_karp          exact optimum, only up to EXACT_SOLVE_MAX_STOPS stops
+
+Gap is measured against the Held-Karp optimum where it is computable and
+against the Held-Karp 1-tree lower bound otherwise ("reference" says which).
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+# christofides builds a module-level Maps client at import; it is never
+# called here, but the key must look valid.
+os.environ.setdefault("NEXT_PUBLIC_GOOGLE_MAPS_API_KEY", "AIza-offline-benchmark")
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from christofides import (  # noqa: E402
+    EXACT_SOLVE_MAX_STOPS,
+    _christofides_cycle,
+    _held_karp,
+    _local_search,
+    _nearest_neighbor_path,
+    _order_cost,
+    held_karp_lower_bound,
+    solve_matrix,
+    straight_line_miles,
+)
+
+DEFAULT_SIZES = [20, 50, 200, 1000]
+DEFAULT_LAYOUTS = ["uniform", "clustered", "corridor", "duplicates"]
+DEFAULT_STRATEGIES = ["construction", "local_search", "solve_matrix", "held_karp"]
+DEFAULT_SEED = 7
+
+# Christofides' matching step grows far faster than the rest of the solver;
+# cycle strategies that construct with it are skipped above this size so the
+# default suite finishes. Raise it with --max-christofides-stops.
+DEFAULT_MAX_CHRISTOFIDES_STOPS = 200
+# The 1-tree bound is O(n^2) per iteration; above this size it is skipped.
+MAX_LOWER_BOUND_STOPS = 1000
+# Time budget for each reference bound; it keeps tightening until then.
+LOWER_BOUND_SECONDS = 10.0
+
+# Roughly a 60 x 60 mile metro area centred on Manhattan.
+CENTER = (40.75, -73.98)
+SPAN_DEGREES = 0.9
+
+
+def uniform(n: int, rng: random.Random) -> List[dict]:
+    return [
+        {"lat": CENTER[0] + rng.uniform(-SPAN_DEGREES, SPAN_DEGREES) / 2, "lng": CENTER[1] + rng.uniform(-SPAN_DEGREES, SPAN_DEGREES) / 2}
+        for _ in range(n)
+    ]
+
+
+def clustered(n: int, rng: random.Random) -> List[dict]:
+    """Neighborhoods: a few tight clusters of stops a few miles across."""
+    centers = uniform(max(2, n // 15), rng)
+    stops = []
+    for _ in range(n):
+        center = rng.choice(centers)
+        stops.append({"lat": rng.gauss(center["lat"], 0.02), "lng": rng.gauss(center["lng"], 0.02)})
+    return stops
+
+
+def corridor(n: int, rng: random.Random) -> List[dict]:
+    """A road trip: stops strung along a ~600 mile line with small detours."""
+    stops = []
+    for _ in range(n):
+        t = rng.random()
+        stops.append({"lat": 40.7 + t * 1.2 + rng.gauss(0, 0.05), "lng": -74.0 - t * 9.5 + rng.gauss(0, 0.05)})
+    return stops
+
+
+def duplicates(n: int, rng: random.Random) -> List[dict]:
+    """Uniform, but about a third of the stops repeat an earlier coordinate
+    (e.g. a hotel visited several times, or the same place added twice)."""
+    stops = uniform(max(1, n - n // 3), rng)
+    while len(stops) < n:
+        stops.append(dict(rng.choice(stops)))
+    rng.shuffle(stops)
+    return stops
+
+
+LAYOUTS: Dict[str, Callable[[int, random.Random], List[dict]]] = {
+    "uniform": uniform,
+    "clustered": clustered,
+    "corridor": corridor,
+    "duplicates": duplicates,
+}
+
+
+def distance_matrix(locations: List[dict]) -> List[List[float]]:
+    n = len(locations)
+    dist = [[0.0] * n for _ in range(n)]
+    for i in range(n):
+        for j in range(i + 1, n):
+            dist[i][j] = dist[j][i] = straight_line_miles(locations[i], locations[j])
+    return dist
+
+
+def construction(dist: List[List[float]], start: int, end: int) -> List[int]:
+    if start == end:
+        return _christofides_cycle(dist, start)
+    return _nearest_neighbor_path(dist, start, end)
+
+
+STRATEGIES: Dict[str, Callable[[List[List[float]], int, int], List[int]]] = {
+    "construction": construction,
+    "local_search": lambda dist, start, end: _local_search(construction(dist, start, end), dist),
+    "solve_matrix": lambda dist, start, end: solve_matrix(dist, start, None if start == end else end).order,
+    "held_karp": lambda dist, start, end: _held_karp(dist, start, end),
+}
+
+
+def skip_reason(strategy: str, n: int, is_cycle: bool, max_christofides_stops: int) -> Optional[str]:
+    if strategy == "held_karp" and n > EXACT_SOLVE_MAX_STOPS:
+        return f"exact only up to {EXACT_SOLVE_MAX_STOPS} stops"
+    if is_cycle and strategy != "held_karp" and n > max_christofides_stops:
+        return f"Christofides construction capped at {max_christofides_stops} stops"
+    return None
+
+
+def measure(fn: Callable[[], List[int]], track_memory: bool):
+    started = time.perf_counter()
+    order = fn()
+    seconds = time.perf_counter() - started
+    peak_kib = None
+    if track_memory:
+        # Separate traced run: tracemalloc slows the solver down noticeably.
+        tracemalloc.start()
+        fn()
+        peak_kib = tracemalloc.get_traced_memory()[1] / 1024
+        tracemalloc.stop()
+    return order, seconds, peak_kib
+
+
+def run_instance(layout: str, n: int, mode: str, args) -> List[dict]:
+    rng = random.Random(f"{args.seed}:{layout}:{n}")
+    locations = LAYOUTS[layout](n, rng)
+    dist = distance_matrix(locations)
+    start = 0
+    end = 0 if mode == "cycle" else n - 1
+
+    results = []
+    for strategy in args.strategies:
+        reason = skip_reason(strategy, n, mode == "cycle", args.max_christofides_stops)
+        row = {"layout": layout, "stops": n, "mode": mode, "strategy": strategy}
+        if reason:
+            results.append({**row, "skipped": reason})
+            continue
+        order, seconds, peak_kib = measure(lambda: STRATEGIES[strategy](dist, start, end), not args.no_memory)
+        assert sorted(set(order)) == list(range(n)), f"{strategy} returned an invalid tour"
+        results.append({
+            **row,
+            "seconds": round(seconds, 4),
+            "peakKiB": round(peak_kib, 1) if peak_kib is not None else None,
+            "cost": round(_order_cost(order, dist), 3),
+        })
+
+    measured = [row for row in results if "cost" in row]
+    if not measured:
+        return results
+    optimum = next((row["cost"] for row in measured if row["strategy"] == "held_karp"), None)
+    if optimum is not None:
+        reference, reference_kind = optimum, "optimum"
+    elif n <= MAX_LOWER_BOUND_STOPS:
+        best = min(row["cost"] for row in measured)
+        deadline = time.monotonic() + LOWER_BOUND_SECONDS
+        reference, reference_kind = held_karp_lower_bound(dist, start, end, best, deadline=deadline), "lower_bound"
+    else:
+        reference, reference_kind = None, None
+    for row in measured:
+        row["reference"] = reference_kind
+        row["referenceCost"] = round(reference, 3) if reference is not None else None
+        row["gap"] = round((row["cost"] - reference) / reference, 4) if reference else None
+    return results
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(args) -> dict:
+    results = []
+    for layout in args.layouts:
+        for n in args.sizes:
+            for mode in args.modes:
+                print(f"{layout:>10} n={n:<5} {mode}", file=sys.stderr)
+                results.extend(run_instance(layout, n, mode, args))
+    return {
+        "revision": git_revision(),
+        "createdAt": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "config": {
+            "seed": args.seed,
+            "sizes": args.sizes,
+            "layouts": args.layouts,
+            "modes": args.modes,
+            "strategies": args.strategies,
+            "maxChristofidesStops": args.max_christofides_stops,
+        },
+        "results": results,
+    }
+
+
+def compare(before: dict, after: dict) -> List[str]:
+    """One line per result present in both reports, with time and cost deltas."""
+    def key(row):
+        return (row["layout"], row["stops"], row["mode"], row["strategy"])
+
+    previous = {key(row): row for row in before["results"] if "cost" in row}
+    lines = [f"{'layout':>10} {'n':>5} {'mode':>5} {'strategy':>13} {'seconds':>17} {'cost':>23}"]
+    for row in after["results"]:
+        old = previous.get(key(row))
+        if "cost" not in row or old is None:
+            continue
+        time_change = (row["seconds"] - old["seconds"]) / old["seconds"] if old["seconds"] else 0.0
+        cost_change = (row["cost"] - old["cost"]) / old["cost"] if old["cost"] else 0.0
+        lines.append(
+            f"{row['layout']:>10} {row['stops']:>5} {row['mode']:>5} {row['strategy']:>13} "
+            f"{old['seconds']:>7.3f}->{row['seconds']:<7.3f}{time_change:>+4.0%} "
+            f"{old['cost']:>9.1f}->{row['cost']:<9.1f}{cost_change:>+5.1%}"
+        )
+    return lines
+
+
+def summary(report: dict) -> List[str]:
+    lines = [f"{'layout':>10} {'n':>5} {'mode':>5} {'strategy':>13} {'seconds':>9} {'peakKiB':>9} {'cost':>10} {'gap':>8}"]
+    for row in report["results"]:
+        head = f"{row['layout']:>10} {row['stops']:>5} {row['mode']:>5} {row['strategy']:>13}"
+        if "skipped" in row:
+            lines.append(f"{head}  skipped: {row['skipped']}")
+            continue
+        gap = f"{row['gap']:.2%}" if row.get("gap") is not None else "-"
+        peak = f"{row['peakKiB']:.0f}" if row["peakKiB"] is not None else "-"
+        lines.append(f"{head} {row['seconds']:>9.3f} {peak:>9} {row['cost']:>10.1f} {gap:>8}")
+    return lines
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the route solver on synthetic layouts.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--layouts", nargs="+", choices=sorted(LAYOUTS), default=DEFAULT_LAYOUTS)
+    parser.add_argument("--modes", nargs="+", choices=["cycle", "path"], default=["cycle", "path"])
+    parser.add_argument("--strategies", nargs="+", choices=sorted(STRATEGIES), default=DEFAULT_STRATEGIES)
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--max-christofides-stops", type=int, default=DEFAULT_MAX_CHRISTOFIDES_STOPS)
+    parser.add_argument("--no-memory", action="store_true", help="skip the traced run for peak memory")
+    parser.add_argument("--output", help="write the JSON report here")
+    parser.add_argument("--compare", help="earlier JSON report to diff against")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> dict:
+    args = parse_args(argv)
+    report = run_suite(args)
+    print("\n".join(summary(report)))
+    if args.compare:
+        with open(args.compare) as handle:
+            print("\n".join(["", f"Compared with {args.compare}:"] + compare(json.load(handle), report)))
+    if args.output:
+        with open(args.output, "w") as handle:
+            json.dump(report, handle, indent=2)
+    return report
+
+
+if __name__ == "__main__":
+    main()
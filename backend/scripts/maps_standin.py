@@ -0,0 +1,527 @@
+"""
+Local stand-in for the Google Maps and Weather APIs, for deterministic load
+and latency testing without a network or an API bill.
+
+Implements the subset the backend uses: Distance Matrix, Geocoding (forward
+and reverse), Places text search, Directions and the Weather days:lookup
+endpoint. Places come from a gazetteer file; anything it doesn't know is
+synthesized deterministically from the query, so repeated runs see the same
+answers. Road distances are straight-line distance times a per-pair detour
+factor, and enforce the real Distance Matrix request limits.
+
+Run from backend/:
+    python scripts/maps_standin.py --port 8765 --latency-ms 80 --error-rate 0.02
+
+Then point the app at it (the googlemaps client insists on an AIza... key):
+    GOOGLE_MAPS_BASE_URL=http://localhost:8765 \\
+    WEATHER_API_BASE_URL=http://localhost:8765 \\
+    NEXT_PUBLIC_GOOGLE_MAPS_API_KEY=AIza-standin python app.py
+
+Accounting and runtime knobs:
+    GET  /_standin/stats     requests, elements and injected errors per API
+    POST /_standin/reset     zero the counters
+    POST /_standin/config    {"latencyMs": 50, "jitterMs": 10, "errorRate": 0.1, "errorStatus": 503}
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import random
+import re
+import threading
+import time
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from flask import Flask, jsonify, request
+
+DEFAULT_GAZETTEER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "gazetteer.json")
+DEFAULT_PORT = 8765
+# Unknown queries are placed within this box around the center.
+DEFAULT_CENTER = (40.75, -73.98)
+SYNTHETIC_SPAN_DEGREES = 1.0
+
+# Distance Matrix request limits, as enforced by Google.
+MAX_DIMENSION = 25
+MAX_ELEMENTS = 100
+
+EARTH_RADIUS_METERS = 6_371_000
+# A locality claims reverse-geocoded points within this radius.
+LOCALITY_RADIUS_METERS = 60_000
+DEFAULT_SEARCH_RADIUS_METERS = 50_000
+PLACES_PAGE_SIZE = 5
+
+LAT_LNG = re.compile(r"^\s*(-?\d+(?:\.\d+)?)\s*,\s*(-?\d+(?:\.\d+)?)\s*$")
+CONDITIONS = [
+    ("CLEAR", "Sunny"),
+    ("PARTLY_CLOUDY", "Partly cloudy"),
+    ("CLOUDY", "Cloudy"),
+    ("LIGHT_RAIN", "Light rain"),
+    ("RAIN", "Rain"),
+    ("THUNDERSTORM", "Thunderstorms"),
+]
+
+Point = Tuple[float, float]
+
+
+def unit_hash(*parts: Any) -> float:
+    """Deterministic value in [0, 1) for the given parts."""
+    digest = hashlib.sha256("|".join(str(part) for part in parts).encode()).digest()
+    return int.from_bytes(digest[:8], "big") / 2 ** 64
+
+
+def place_id(name: str) -> str:
+    return "standin-" + hashlib.sha1(name.lower().encode()).hexdigest()[:16]
+
+
+def haversine_meters(a: Point, b: Point) -> float:
+    lat1, lng1, lat2, lng2 = map(math.radians, (a[0], a[1], b[0], b[1]))
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_METERS * math.asin(math.sqrt(h))
+
+
+def road_distance(a: Point, b: Point) -> Tuple[int, int]:
+    """(meters, seconds) by road: straight line times a 1.2-1.45 detour
+    factor fixed per unordered pair, at town speeds for short hops rising to
+    highway speeds for long ones."""
+    crow = haversine_meters(a, b)
+    if crow < 1:
+        return 0, 0
+    ends = sorted([(round(a[0], 5), round(a[1], 5)), (round(b[0], 5), round(b[1], 5))])
+    meters = crow * (1.2 + 0.25 * unit_hash("detour", *ends))
+    meters_per_second = 11 + 16 * min(1.0, meters / 100_000)
+    return round(meters), round(meters / meters_per_second)
+
+
+def encode_polyline(points: List[Point]) -> str:
+    """Google's encoded polyline format."""
+    encoded = []
+    previous = (0, 0)
+    for lat, lng in points:
+        current = (round(lat * 1e5), round(lng * 1e5))
+        for delta in (current[0] - previous[0], current[1] - previous[1]):
+            value = ~(delta << 1) if delta < 0 else delta << 1
+            while value >= 0x20:
+                encoded.append(chr((0x20 | (value & 0x1F)) + 63))
+                value >>= 5
+            encoded.append(chr(value + 63))
+        previous = current
+    return "".join(encoded)
+
+
+def _distance_text(meters: int) -> str:
+    return f"{meters / 1609.344:.1f} mi"
+
+
+def _duration_text(seconds: int) -> str:
+    minutes = max(1, round(seconds / 60))
+    if minutes < 60:
+        return f"{minutes} mins"
+    return f"{minutes // 60} hours {minutes % 60} mins"
+
+
+class Gazetteer:
+    """Known places plus deterministic synthetic ones for everything else."""
+
+    def __init__(self, places: List[Dict[str, Any]], center: Point = DEFAULT_CENTER):
+        self.places = places
+        self.center = center
+        self.localities = [place for place in places if "locality" in place.get("types", [])]
+
+    @classmethod
+    def load(cls, path: str, center: Point = DEFAULT_CENTER) -> "Gazetteer":
+        with open(path) as handle:
+            return cls(json.load(handle), center)
+
+    def find(self, query: str) -> Optional[Dict[str, Any]]:
+        wanted = query.strip().lower()
+        if not wanted:
+            return None
+        for place in self.places:
+            if place["name"].lower() == wanted:
+                return place
+        # "Boston, MA" or "Liberty Bell Philadelphia": the longest known name
+        # mentioned in the query wins.
+        mentioned = [place for place in self.places if place["name"].lower() in wanted]
+        return max(mentioned, key=lambda place: len(place["name"]), default=None)
+
+    def synthetic(self, query: str) -> Dict[str, Any]:
+        lat = self.center[0] + (unit_hash("lat", query.lower()) - 0.5) * SYNTHETIC_SPAN_DEGREES
+        lng = self.center[1] + (unit_hash("lng", query.lower()) - 0.5) * SYNTHETIC_SPAN_DEGREES
+        return {"name": query.strip(), "types": ["point_of_interest"], "lat": round(lat, 6), "lng": round(lng, 6)}
+
+    def resolve(self, query: str) -> Dict[str, Any]:
+        return self.find(query) or self.synthetic(query)
+
+    def locality_at(self, point: Point) -> Dict[str, Any]:
+        nearest = min(self.localities, key=lambda place: haversine_meters(point, (place["lat"], place["lng"])), default=None)
+        if nearest is not None and haversine_meters(point, (nearest["lat"], nearest["lng"])) <= LOCALITY_RADIUS_METERS:
+            return nearest
+        cell = (round(point[0], 1), round(point[1], 1))
+        return {
+            "name": f"Township {int(unit_hash('town', *cell) * 900) + 100}",
+            "types": ["locality", "political"],
+            "lat": cell[0],
+            "lng": cell[1],
+            "county": f"County {int(unit_hash('county', *cell) * 90) + 10}",
+            "state": nearest["state"] if nearest else "NY",
+        }
+
+    def address_of(self, place: Dict[str, Any]) -> str:
+        if place.get("address"):
+            return f"{place['address']}, USA"
+        locality = place if "locality" in place.get("types", []) else self.locality_at((place["lat"], place["lng"]))
+        if locality is place:
+            return f"{place['name']}, {place['state']}, USA"
+        return f"{place['name']}, {locality['name']}, {locality['state']}, USA"
+
+    def components_at(self, point: Point) -> List[Dict[str, Any]]:
+        locality = self.locality_at(point)
+        return [
+            {"long_name": locality["name"], "short_name": locality["name"], "types": ["locality", "political"]},
+            {"long_name": locality["county"], "short_name": locality["county"], "types": ["administrative_area_level_2", "political"]},
+            {"long_name": locality["state"], "short_name": locality["state"], "types": ["administrative_area_level_1", "political"]},
+            {"long_name": "United States", "short_name": "US", "types": ["country", "political"]},
+        ]
+
+    def geocode_result(self, place: Dict[str, Any]) -> Dict[str, Any]:
+        point = (place["lat"], place["lng"])
+        return {
+            "formatted_address": self.address_of(place),
+            "geometry": {"location": {"lat": place["lat"], "lng": place["lng"]}, "location_type": "APPROXIMATE"},
+            "place_id": place_id(place["name"]),
+            "address_components": self.components_at(point),
+            "types": place.get("types", []),
+        }
+
+    def search(self, query: str, center: Optional[Point], radius: float) -> List[Dict[str, Any]]:
+        """Text search: gazetteer places whose name or type matches, nearest
+        first, padded with synthetic places around the center."""
+        topic, _, near = query.lower().partition(" in ")
+        if center is None and near:
+            place = self.resolve(near)
+            center = (place["lat"], place["lng"])
+        topic = topic.strip()
+        stem = topic[:-1] if topic.endswith("s") else topic
+
+        def matches(place):
+            labels = [place["name"].lower()] + [kind.replace("_", " ") for kind in place.get("types", [])]
+            return any(stem and stem in label for label in labels)
+
+        found = [place for place in self.places if matches(place)]
+        if center is None:
+            place = found[0] if found else self.resolve(query)
+            center = (place["lat"], place["lng"])
+        found = sorted(
+            (place for place in found if haversine_meters(center, (place["lat"], place["lng"])) <= radius),
+            key=lambda place: haversine_meters(center, (place["lat"], place["lng"])),
+        )
+        spread = radius / 2 / 111_000
+        for index in range(PLACES_PAGE_SIZE - len(found)):
+            seed = (topic, round(center[0], 3), round(center[1], 3), index)
+            found.append({
+                "name": f"{topic.title() or 'Place'} {index + 1}",
+                "types": ["point_of_interest", "establishment"],
+                "lat": round(center[0] + (unit_hash("lat", *seed) - 0.5) * spread, 6),
+                "lng": round(center[1] + (unit_hash("lng", *seed) - 0.5) * spread, 6),
+                "rating": round(3.5 + 1.5 * unit_hash("rating", *seed), 1),
+            })
+        return [
+            {
+                "name": place["name"],
+                "formatted_address": self.address_of(place),
+                "place_id": place_id(f"{place['name']}@{place['lat']},{place['lng']}"),
+                "rating": place.get("rating"),
+                "geometry": {"location": {"lat": place["lat"], "lng": place["lng"]}},
+                "types": place.get("types", []),
+            }
+            for place in found
+        ]
+
+
+class MapsStandin:
+    """Request accounting, latency/error injection and the API handlers."""
+
+    def __init__(
+        self,
+        gazetteer: Gazetteer,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = 503,
+        seed: int = 0,
+    ):
+        self.gazetteer = gazetteer
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    # -- accounting ---------------------------------------------------------
+
+    def record(self, api: str, **counts: int) -> None:
+        with self._lock:
+            entry = self._stats.setdefault(api, {"requests": 0, "elements": 0, "errors": 0})
+            for name, value in counts.items():
+                entry[name] += value
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            apis = {api: dict(entry) for api, entry in sorted(self._stats.items())}
+        return {
+            "apis": apis,
+            "totalRequests": sum(entry["requests"] for entry in apis.values()),
+            "totalElements": sum(entry["elements"] for entry in apis.values()),
+        }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+    def configure(self, options: Dict[str, Any]) -> None:
+        self.latency_ms = float(options.get("latencyMs", self.latency_ms))
+        self.jitter_ms = float(options.get("jitterMs", self.jitter_ms))
+        self.error_rate = float(options.get("errorRate", self.error_rate))
+        self.error_status = int(options.get("errorStatus", self.error_status))
+
+    def config(self) -> Dict[str, Any]:
+        return {
+            "latencyMs": self.latency_ms,
+            "jitterMs": self.jitter_ms,
+            "errorRate": self.error_rate,
+            "errorStatus": self.error_status,
+        }
+
+    def delay_and_fail(self) -> bool:
+        """Sleep the configured latency; True when this request should fail."""
+        with self._lock:
+            jitter = self._random.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0.0
+            fail = self._random.random() < self.error_rate
+        delay = max(0.0, self.latency_ms + jitter) / 1000
+        if delay:
+            time.sleep(delay)
+        return fail
+
+    # -- APIs ---------------------------------------------------------------
+
+    def point(self, value: str) -> Tuple[Point, Dict[str, Any]]:
+        """Coordinates for a 'lat,lng' or address parameter, and its place."""
+        match = LAT_LNG.match(value)
+        if match:
+            point = (float(match.group(1)), float(match.group(2)))
+            locality = self.gazetteer.locality_at(point)
+            return point, {**locality, "lat": point[0], "lng": point[1]}
+        place = self.gazetteer.resolve(value)
+        return (place["lat"], place["lng"]), place
+
+    def distance_matrix(self, args) -> Dict[str, Any]:
+        origins = [value for value in args.get("origins", "").split("|") if value]
+        destinations = [value for value in args.get("destinations", "").split("|") if value]
+        if not origins or not destinations:
+            return {"status": "INVALID_REQUEST"}
+        if len(origins) > MAX_DIMENSION or len(destinations) > MAX_DIMENSION:
+            return {"status": "MAX_DIMENSIONS_EXCEEDED"}
+        if len(origins) * len(destinations) > MAX_ELEMENTS:
+            return {"status": "MAX_ELEMENTS_EXCEEDED"}
+        self.record("distance_matrix", elements=len(origins) * len(destinations))
+        resolved_origins = [self.point(value) for value in origins]
+        resolved_destinations = [self.point(value) for value in destinations]
+        rows = []
+        for origin, _ in resolved_origins:
+            elements = []
+            for destination, _ in resolved_destinations:
+                meters, seconds = road_distance(origin, destination)
+                elements.append({
+                    "status": "OK",
+                    "distance": {"text": _distance_text(meters), "value": meters},
+                    "duration": {"text": _duration_text(seconds), "value": seconds},
+                })
+            rows.append({"elements": elements})
+        return {
+            "status": "OK",
+            "origin_addresses": [self.gazetteer.address_of(place) for _, place in resolved_origins],
+            "destination_addresses": [self.gazetteer.address_of(place) for _, place in resolved_destinations],
+            "rows": rows,
+        }
+
+    def geocode(self, args) -> Dict[str, Any]:
+        if args.get("latlng"):
+            point, place = self.point(args["latlng"])
+            result = self.gazetteer.geocode_result(place)
+            result["geometry"]["location"] = {"lat": point[0], "lng": point[1]}
+            return {"status": "OK", "results": [result]}
+        query = args.get("address", "").strip()
+        if not query:
+            return {"status": "INVALID_REQUEST", "results": []}
+        return {"status": "OK", "results": [self.gazetteer.geocode_result(self.gazetteer.resolve(query))]}
+
+    def places(self, args) -> Dict[str, Any]:
+        query = args.get("query", "").strip()
+        if not query:
+            return {"status": "INVALID_REQUEST", "results": []}
+        center = self.point(args["location"])[0] if args.get("location") else None
+        radius = float(args.get("radius") or DEFAULT_SEARCH_RADIUS_METERS)
+        return {"status": "OK", "results": self.gazetteer.search(query, center, radius)}
+
+    def directions(self, args) -> Dict[str, Any]:
+        if not args.get("origin") or not args.get("destination"):
+            return {"status": "INVALID_REQUEST", "routes": []}
+        start, start_place = self.point(args["origin"])
+        end, end_place = self.point(args["destination"])
+        step_count = max(1, min(40, math.ceil(haversine_meters(start, end) / 25_000)))
+        points = [
+            (start[0] + (end[0] - start[0]) * k / step_count, start[1] + (end[1] - start[1]) * k / step_count)
+            for k in range(step_count + 1)
+        ]
+        steps = []
+        for a, b in zip(points, points[1:]):
+            meters, seconds = road_distance(a, b)
+            steps.append({
+                "distance": {"text": _distance_text(meters), "value": meters},
+                "duration": {"text": _duration_text(seconds), "value": seconds},
+                "start_location": {"lat": a[0], "lng": a[1]},
+                "end_location": {"lat": b[0], "lng": b[1]},
+                "html_instructions": f"Continue toward {end_place['name']}",
+                "polyline": {"points": encode_polyline([a, b])},
+                "travel_mode": "DRIVING",
+            })
+        meters = sum(step["distance"]["value"] for step in steps)
+        seconds = sum(step["duration"]["value"] for step in steps)
+        leg = {
+            "distance": {"text": _distance_text(meters), "value": meters},
+            "duration": {"text": _duration_text(seconds), "value": seconds},
+            "start_address": self.gazetteer.address_of(start_place),
+            "end_address": self.gazetteer.address_of(end_place),
+            "start_location": {"lat": start[0], "lng": start[1]},
+            "end_location": {"lat": end[0], "lng": end[1]},
+            "steps": steps,
+        }
+        return {
+            "status": "OK",
+            "routes": [{
+                "summary": "Stand-in route",
+                "legs": [leg],
+                "overview_polyline": {"points": encode_polyline(points)},
+                "warnings": [],
+                "waypoint_order": [],
+            }],
+        }
+
+    def forecast_days(self, args) -> Dict[str, Any]:
+        lat = float(args.get("location.latitude", 0))
+        lng = float(args.get("location.longitude", 0))
+        days = max(1, min(10, int(args.get("days", 7))))
+        cell = (round(lat, 1), round(lng, 1))
+        forecast = []
+        for offset in range(days):
+            day = date.today() + timedelta(days=offset)
+            # Warmer toward the equator and in midsummer, colder inland north.
+            season = math.cos(2 * math.pi * (day.timetuple().tm_yday - 200) / 365)
+            base = 28 - abs(lat) * 0.4 + 10 * season * (1 if lat >= 0 else -1)
+            swing = 6 + 4 * unit_hash("swing", *cell, day)
+            high = round(base + 3 * (unit_hash("temp", *cell, day) - 0.5), 1)
+            kind, text = CONDITIONS[int(unit_hash("sky", *cell, day) * len(CONDITIONS))]
+            wet = kind in ("LIGHT_RAIN", "RAIN", "THUNDERSTORM")
+            forecast.append({
+                "displayDate": {"year": day.year, "month": day.month, "day": day.day},
+                "maxTemperature": {"degrees": high, "unit": "CELSIUS"},
+                "minTemperature": {"degrees": round(high - swing, 1), "unit": "CELSIUS"},
+                "daytimeForecast": {
+                    "weatherCondition": {
+                        "type": kind,
+                        "description": {"text": text, "languageCode": "en"},
+                        "iconBaseUri": f"https://maps.gstatic.com/weather/v1/{kind.lower()}",
+                    },
+                    "precipitation": {"probability": {
+                        "percent": int(40 + 60 * unit_hash("rain", *cell, day)) if wet else int(20 * unit_hash("rain", *cell, day)),
+                        "type": "RAIN" if wet else "NONE",
+                    }},
+                },
+            })
+        return {"forecastDays": forecast, "timeZone": {"id": "America/New_York"}}
+
+
+# Path -> (api name, handler name); geocode with latlng is counted as reverse.
+ROUTES = {
+    "/maps/api/distancematrix/json": ("distance_matrix", "distance_matrix"),
+    "/maps/api/geocode/json": ("geocode", "geocode"),
+    "/maps/api/place/textsearch/json": ("places", "places"),
+    "/maps/api/directions/json": ("directions", "directions"),
+    "/v1/forecast/days:lookup": ("weather", "forecast_days"),
+}
+
+
+def create_app(standin: MapsStandin) -> Flask:
+    app = Flask(__name__)
+    app.config["STANDIN"] = standin
+
+    def serve(path: str):
+        api, handler = ROUTES[path]
+        if api == "geocode" and request.args.get("latlng"):
+            api = "reverse_geocode"
+        standin.record(api, requests=1)
+        if not request.args.get("key"):
+            if api == "weather":
+                return jsonify({"error": {"code": 403, "message": "API key missing", "status": "PERMISSION_DENIED"}}), 403
+            return jsonify({"status": "REQUEST_DENIED", "error_message": "You must use an API key."})
+        if standin.delay_and_fail():
+            standin.record(api, errors=1)
+            return jsonify({"error": {"code": standin.error_status, "message": "Injected failure"}}), standin.error_status
+        return jsonify(getattr(standin, handler)(request.args))
+
+    for path in ROUTES:
+        app.add_url_rule(path, endpoint=ROUTES[path][0], view_func=lambda path=path: serve(path))
+
+    @app.route("/_standin/stats", methods=["GET"])
+    def stats():
+        return jsonify({**standin.stats(), "config": standin.config()})
+
+    @app.route("/_standin/reset", methods=["POST"])
+    def reset():
+        standin.reset()
+        return jsonify(standin.stats())
+
+    @app.route("/_standin/config", methods=["POST"])
+    def configure():
+        standin.configure(request.get_json(silent=True) or {})
+        return jsonify(standin.config())
+
+    return app
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Serve a local stand-in for the Google Maps and Weather APIs.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--gazetteer", default=DEFAULT_GAZETTEER, help="JSON list of known places")
+    parser.add_argument("--center", type=float, nargs=2, default=DEFAULT_CENTER, metavar=("LAT", "LNG"),
+                        help="where unknown queries are placed")
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests that fail")
+    parser.add_argument("--error-status", type=int, default=503, help="HTTP status of injected failures")
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> None:
+    args = parse_args(argv)
+    standin = MapsStandin(
+        Gazetteer.load(args.gazetteer, tuple(args.center)),
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        seed=args.seed,
+    )
+    create_app(standin).run(host=args.host, port=args.port, threaded=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from concurrent.futures import Future
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Optional, Tuple
+
+DEFAULT_MAX_ENTRIES = 10_000
+
+
+class CacheStore(ABC):
+    """Key/value cache for JSON-serializable values with per-entry TTLs."""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Any]:
+        pass
+
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl_seconds: float) -> None:
+        pass
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        pass
+
+
+class InMemoryCacheStore(CacheStore):
+    """Process-local LRU bounded to max_entries."""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if time.monotonic() >= expires_at:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl_seconds: float) -> None:
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class FirestoreCacheStore(CacheStore):
+    """
+    Persists entries in a Firestore collection so they survive restarts and
+    are shared by every instance, behind a bounded in-memory front.
+
+    Values are stored as JSON strings (Firestore rejects nested arrays).
+    Expired documents are ignored on read; enable a Firestore TTL policy on
+    the collection's expiresAt field to delete them, which is what bounds
+    the collection's size. Firestore errors degrade to cache misses.
+    """
+
+    def __init__(self, db, collection: str, max_local_entries: int = DEFAULT_MAX_ENTRIES):
+        self.collection = db.collection(collection)
+        self.local = InMemoryCacheStore(max_local_entries)
+
+    @staticmethod
+    def _doc_id(key: str) -> str:
+        # Keys are free text (queries, addresses); document ids may not be.
+        return hashlib.sha256(key.encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        value = self.local.get(key)
+        if value is not None:
+            return value
+        try:
+            doc = self.collection.document(self._doc_id(key)).get()
+        except Exception as error:
+            print(f"Cache read failed for {self.collection.id}: {error}")
+            return None
+        if not doc.exists:
+            return None
+        data = doc.to_dict() or {}
+        expires_at = data.get("expiresAt")
+        remaining = (expires_at - datetime.now(timezone.utc)).total_seconds() if expires_at else 0
+        if remaining <= 0:
+            return None
+        value = json.loads(data["value"])
+        self.local.set(key, value, remaining)
+        return value
+
+    def set(self, key: str, value: Any, ttl_seconds: float) -> None:
+        self.local.set(key, value, ttl_seconds)
+        try:
+            self.collection.document(self._doc_id(key)).set({
+                "key": key,
+                "value": json.dumps(value, separators=(",", ":")),
+                "expiresAt": datetime.now(timezone.utc) + timedelta(seconds=ttl_seconds),
+            })
+        except Exception as error:
+            print(f"Cache write failed for {self.collection.id}: {error}")
+
+    def delete(self, key: str) -> None:
+        self.local.delete(key)
+        try:
+            self.collection.document(self._doc_id(key)).delete()
+        except Exception as error:
+            print(f"Cache delete failed for {self.collection.id}: {error}")
+
+
+class SingleFlight:
+    """Collapses concurrent calls for the same key into one: the first
+    caller runs fn, the rest wait for its result (or exception)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, Future] = {}
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """(result, shared); shared is True for callers that waited."""
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+        if not leader:
+            return future.result(), True
+        try:
+            result = fn()
+        except Exception as error:
+            future.set_exception(error)
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+
+def cache_store_for(db, collection: str, max_entries: int = DEFAULT_MAX_ENTRIES) -> CacheStore:
+    """Firestore-backed when a client is available, process-local otherwise."""
+    if db is None:
+        return InMemoryCacheStore(max_entries)
+    return FirestoreCacheStore(db, collection, max_entries)
@@ -0,0 +1,239 @@
+from __future__ import annotations
+
+import gzip
+import json
+import re
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+CASSETTE_VERSION = 1
+RECORD = "record"
+REPLAY = "replay"
+
+# API keys never reach the cassette file.
+_KEY_PARAM = re.compile(r"([?&]key=)[^&]*")
+
+
+class CassetteMissError(LookupError):
+    """Replay asked for an interaction the cassette does not contain."""
+
+
+class RecordedError(Exception):
+    """An exception raised by the recorded call, re-raised on replay."""
+
+    def __init__(self, error_type: str, message: str):
+        super().__init__(f"{error_type}: {message}")
+        self.error_type = error_type
+
+
+def _canonical(value: Any) -> str:
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), default=str)
+
+
+def _plain(value: Any) -> Any:
+    """JSON-safe copy of call arguments (tuples become lists, etc.)."""
+    return json.loads(json.dumps(value, default=str))
+
+
+class Cassette:
+    """
+    Request/response pairs captured from external services, for replaying
+    production-shaped sessions offline.
+
+    In record mode each wrapped call goes through to the real service and is
+    appended with its latency. In replay mode calls are answered from the
+    file, after sleeping the recorded latency times `speed` (0 replays as
+    fast as possible). Maps and HTTP calls are matched on their arguments,
+    first-recorded first-served for repeats, so concurrent callers may
+    replay in a different order. Vertex chat turns are matched in order,
+    since their requests embed tool results that need not be byte-identical.
+    """
+
+    def __init__(self, path: str, mode: str = REPLAY, speed: float = 1.0):
+        if mode not in (RECORD, REPLAY):
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        self.path = path
+        self.mode = mode
+        self.speed = speed
+        self.interactions: List[Dict[str, Any]] = []
+        self._queues: Dict[tuple, Deque[Dict[str, Any]]] = defaultdict(deque)
+        self._lock = threading.Lock()
+        if mode == REPLAY:
+            self.interactions = self._read(path)
+            for interaction in self.interactions:
+                self._queues[(interaction["kind"], interaction.get("key"))].append(interaction)
+
+    @property
+    def recording(self) -> bool:
+        return self.mode == RECORD
+
+    @staticmethod
+    def _read(path: str) -> List[Dict[str, Any]]:
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rt") as handle:
+            data = json.load(handle)
+        if data.get("version") != CASSETTE_VERSION:
+            raise ValueError(f"Unsupported cassette version: {data.get('version')}")
+        return data["interactions"]
+
+    def save(self) -> None:
+        opener = gzip.open if self.path.endswith(".gz") else open
+        with self._lock:
+            data = {"version": CASSETTE_VERSION, "interactions": list(self.interactions)}
+        with opener(self.path, "wt") as handle:
+            json.dump(data, handle, separators=(",", ":"))
+
+    def call(self, kind: str, request: Any, send: Callable[[], Any], encode=None, decode=None, keyed: bool = True):
+        """
+        Record or replay one interaction. `send` performs the real call;
+        encode/decode convert its result to and from JSON-safe data.
+        """
+        key = _canonical(request) if keyed else None
+        if not self.recording:
+            return self._replay(kind, key, decode)
+
+        started = time.perf_counter()
+        interaction: Dict[str, Any] = {"kind": kind, "key": key}
+        try:
+            result = send()
+        except Exception as error:
+            interaction["error"] = {"type": type(error).__name__, "message": str(error)}
+            raise
+        else:
+            interaction["response"] = encode(result) if encode else result
+            return result
+        finally:
+            interaction["latency"] = round(time.perf_counter() - started, 4)
+            if not keyed:
+                interaction["request"] = request
+            with self._lock:
+                self.interactions.append(interaction)
+
+    def _replay(self, kind: str, key: Optional[str], decode):
+        with self._lock:
+            queue = self._queues.get((kind, key))
+            if not queue:
+                raise CassetteMissError(f"No recorded {kind} interaction for {key or 'the next turn'}")
+            interaction = queue.popleft()
+        if self.speed and interaction.get("latency"):
+            time.sleep(interaction["latency"] * self.speed)
+        if "error" in interaction:
+            raise RecordedError(interaction["error"]["type"], interaction["error"]["message"])
+        response = interaction["response"]
+        return decode(response) if decode else response
+
+    # -- wrappers -----------------------------------------------------------
+
+    def maps(self, client=None) -> "CassetteMapsClient":
+        return CassetteMapsClient(self, client)
+
+    def http(self, session=None) -> "CassetteHttp":
+        return CassetteHttp(self, session)
+
+    def chat(self, start_chat: Callable[[], Any]) -> "CassetteChatSession":
+        """Wrap the ChatSession that start_chat() creates. On replay
+        start_chat is never called, so no Vertex credentials are needed."""
+        return CassetteChatSession(self, start_chat() if self.recording else None)
+
+
+class CassetteMapsClient:
+    """googlemaps.Client stand-in: every method call is recorded or replayed."""
+
+    def __init__(self, cassette: Cassette, client=None):
+        self.cassette = cassette
+        self.client = client
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+
+        def method(*args, **kwargs):
+            request = {"method": name, "args": _plain(list(args)), "kwargs": _plain(kwargs)}
+            return self.cassette.call(
+                f"maps.{name}", request, lambda: getattr(self.client, name)(*args, **kwargs), encode=_plain
+            )
+
+        return method
+
+
+class RecordedResponse:
+    """The parts of requests.Response that callers here use."""
+
+    def __init__(self, status_code: int, body: Any, text: str, url: str):
+        self.status_code = status_code
+        self._body = body
+        self.text = text
+        self.url = url
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code < 400
+
+    def json(self):
+        if self._body is None:
+            raise ValueError("Recorded response has no JSON body")
+        return self._body
+
+    def raise_for_status(self) -> None:
+        if not self.ok:
+            import requests
+
+            raise requests.HTTPError(f"{self.status_code} Error for url: {self.url}", response=self)
+
+
+class CassetteHttp:
+    """Records or replays GETs made through a requests-style session."""
+
+    def __init__(self, cassette: Cassette, session=None):
+        self.cassette = cassette
+        if session is None:
+            import requests as session
+        self.session = session
+
+    def get(self, url: str, **kwargs):
+        clean_url = _KEY_PARAM.sub(r"\1", url)
+        request = {"method": "GET", "url": clean_url, "params": _plain(kwargs.get("params"))}
+        return self.cassette.call("http", request, lambda: self.session.get(url, **kwargs), encode=self._encode, decode=self._decode)
+
+    @staticmethod
+    def _encode(response) -> Dict[str, Any]:
+        try:
+            body, text = response.json(), None
+        except ValueError:
+            body, text = None, response.text
+        return {"status": response.status_code, "body": body, "text": text, "url": _KEY_PARAM.sub(r"\1", response.url)}
+
+    @staticmethod
+    def _decode(data: Dict[str, Any]) -> RecordedResponse:
+        text = data["text"] if data["text"] is not None else json.dumps(data["body"])
+        return RecordedResponse(data["status"], data["body"], text, data["url"])
+
+
+class CassetteChatSession:
+    """vertexai ChatSession wrapper recording send_message turns in order."""
+
+    def __init__(self, cassette: Cassette, chat=None):
+        self.cassette = cassette
+        self.chat = chat
+        # agent.get_chat_response prunes malformed turns from _history.
+        self._history = chat._history if chat is not None else []
+
+    def send_message(self, content, **kwargs):
+        from vertexai.generative_models import GenerationResponse
+
+        return self.cassette.call(
+            "vertex.send_message",
+            self._describe(content),
+            lambda: self.chat.send_message(content, **kwargs),
+            encode=lambda response: response.to_dict(),
+            decode=GenerationResponse.from_dict,
+            keyed=False,
+        )
+
+    @staticmethod
+    def _describe(content) -> Any:
+        if isinstance(content, str):
+            return content
+        return [part.to_dict() if hasattr(part, "to_dict") else str(part) for part in content]
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+LocationKey = Tuple[float, float]
+
+
+def location_key(location: dict) -> LocationKey:
+    return (round(float(location["lat"]), 6), round(float(location["lng"]), 6))
+
+
+class DistanceCache:
+    """
+    Process-wide driving-distance cache keyed by rounded coordinate pairs.
+
+    Entries are directed (origin -> destination) but lookups fall back to the
+    reverse direction, matching the solver's symmetric treatment of the
+    matrix. Failed elements (inf) are never stored so they get retried.
+    """
+
+    def __init__(self, max_entries: int = 50_000, ttl_seconds: float = 7 * 24 * 3600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Tuple[LocationKey, LocationKey], Tuple[float, Optional[float], float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, origin: dict, destination: dict) -> Optional[float]:
+        entry = self.get_entry(origin, destination)
+        return entry[0] if entry else None
+
+    def get_entry(self, origin: dict, destination: dict) -> Optional[Tuple[float, Optional[float]]]:
+        """(miles, minutes) for the pair; minutes is None when the provider
+        returned no duration."""
+        origin_key, destination_key = location_key(origin), location_key(destination)
+        if origin_key == destination_key:
+            return (0.0, 0.0)
+        with self._lock:
+            for key in ((origin_key, destination_key), (destination_key, origin_key)):
+                entry = self._entries.get(key)
+                if entry is None:
+                    continue
+                miles, minutes, stored_at = entry
+                if time.monotonic() - stored_at > self.ttl_seconds:
+                    del self._entries[key]
+                    continue
+                self._entries.move_to_end(key)
+                return (miles, minutes)
+        return None
+
+    def put(self, origin: dict, destination: dict, miles: float, minutes: Optional[float] = None) -> None:
+        if miles == float("inf"):
+            return
+        key = (location_key(origin), location_key(destination))
+        with self._lock:
+            self._entries[key] = (miles, minutes, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import threading
+from collections import Counter
+from typing import Dict, List, Tuple
+
+from christofides import build_matrix_lookup, fetch_pair_distances
+from services.distance_cache import DistanceCache, location_key
+
+DEFAULT_PREFETCH_DELAY_SECONDS = 2.0
+# Larger days are left to the optimize call itself (and its async job path).
+DEFAULT_PREFETCH_MAX_STOPS = 60
+
+
+class DistancePrefetcher:
+    """
+    Warms the distance cache for a day in the background after its stops
+    change, so the optimize that usually follows finds the matrix cached.
+
+    Requests are debounced per (trip, day): a burst of edits schedules one
+    fetch, delay_seconds after the last edit, for the day's latest stops.
+    Only pairs missing from the cache are fetched.
+    """
+
+    def __init__(
+        self,
+        gmaps_client,
+        cache: DistanceCache,
+        delay_seconds: float = DEFAULT_PREFETCH_DELAY_SECONDS,
+        max_stops: int = DEFAULT_PREFETCH_MAX_STOPS,
+    ):
+        self.gmaps = gmaps_client
+        self.cache = cache
+        self.delay_seconds = delay_seconds
+        self.max_stops = max_stops
+        self._pending: Dict[Tuple[str, str], List[dict]] = {}
+        self._timers: Dict[Tuple[str, str], threading.Timer] = {}
+        self._lock = threading.Lock()
+
+    def schedule(self, trip_id: str, day_id: str, locations: List[dict]) -> None:
+        locations = [location for location in locations if location.get("lat") is not None and location.get("lng") is not None]
+        if len(locations) < 2 or len(locations) > self.max_stops:
+            return
+        key = (trip_id, day_id)
+        with self._lock:
+            self._pending[key] = locations
+            timer = self._timers.pop(key, None)
+            if timer is not None:
+                timer.cancel()
+            timer = threading.Timer(self.delay_seconds, self._run, args=(key,))
+            timer.daemon = True
+            self._timers[key] = timer
+            timer.start()
+
+    def flush(self) -> None:
+        """Fetch everything pending now, on the calling thread."""
+        with self._lock:
+            keys = list(self._pending)
+            for timer in self._timers.values():
+                timer.cancel()
+            self._timers.clear()
+        for key in keys:
+            self._run(key)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            for timer in self._timers.values():
+                timer.cancel()
+            self._timers.clear()
+            self._pending.clear()
+
+    def _run(self, key: Tuple[str, str]) -> None:
+        with self._lock:
+            self._timers.pop(key, None)
+            locations = self._pending.pop(key, None)
+        if locations:
+            try:
+                self.warm(locations)
+            except Exception as error:
+                print(f"Distance prefetch failed for day {key[1]}: {error}")
+
+    def warm(self, locations: List[dict]) -> int:
+        """Fetch the pairs among locations that are not cached yet; returns
+        how many were missing."""
+        missing = self.missing_pairs(locations)
+        if not missing:
+            return 0
+        n = len({location_key(location) for location in locations})
+        if len(missing) > n * (n - 1) // 4:
+            # Mostly cold: the batched square matrix needs far fewer requests.
+            build_matrix_lookup(locations, gmaps_client=self.gmaps, cache=self.cache)
+        else:
+            # A few new stops: one row per new stop, and only the missing
+            # direction, since cache lookups fall back to the reverse pair.
+            fetch_pair_distances(missing, gmaps_client=self.gmaps, cache=self.cache)
+        return len(missing)
+
+    def missing_pairs(self, locations: List[dict]) -> List[Tuple[dict, dict]]:
+        unique = list({location_key(location): location for location in locations}.values())
+        missing = [
+            (unique[i], unique[j])
+            for i in range(len(unique))
+            for j in range(i + 1, len(unique))
+            if self.cache.get_entry(unique[i], unique[j]) is None
+        ]
+        # Orient each pair from its busier end so the new stop becomes the
+        # single origin of one request.
+        degree = Counter(location_key(location) for pair in missing for location in pair)
+        return [
+            (a, b) if degree[location_key(a)] >= degree[location_key(b)] else (b, a)
+            for a, b in missing
+        ]
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from geo import geohash_center, geohash_encode
+from services.cache_store import CacheStore, InMemoryCacheStore, SingleFlight
+
+# Forecasts are requested for the center of a ~4.9 km cell; nearby trips
+# share it, and the forecast grid is coarser than that anyway.
+FORECAST_PRECISION = 5
+# Google Weather refreshes forecasts hourly, so an entry is fresh until the
+# top of the next hour. After that it is served for up to this long while a
+# background refresh runs.
+FORECAST_REFRESH_SECONDS = 3600
+FORECAST_STALE_SECONDS = 6 * 3600
+FORECAST_MAX_ENTRIES = 5_000
+
+ForecastFn = Callable[[float, float, int], List[Dict[str, Any]]]
+
+
+class ForecastCache:
+    """
+    Stale-while-revalidate cache in front of a forecast fetch, keyed by
+    geohash cell and number of days.
+
+    get() returns a fresh entry, or a stale one (scheduling one background
+    refresh for it), or fetches and waits on a miss; concurrent misses for
+    the same key share one request. Failures are not cached.
+    """
+
+    def __init__(
+        self,
+        fetch: ForecastFn,
+        store: Optional[CacheStore] = None,
+        precision: int = FORECAST_PRECISION,
+        refresh_seconds: float = FORECAST_REFRESH_SECONDS,
+        stale_seconds: float = FORECAST_STALE_SECONDS,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.fetch = fetch
+        self.store = store if store is not None else InMemoryCacheStore(FORECAST_MAX_ENTRIES)
+        self.precision = precision
+        self.refresh_seconds = refresh_seconds
+        self.stale_seconds = stale_seconds
+        self.clock = clock
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._flight = SingleFlight()
+        self._refreshing: Set[str] = set()
+        self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="forecast-refresh")
+
+    def get(self, lat: float, lng: float, days: int = 7) -> List[Dict[str, Any]]:
+        cell = geohash_encode(lat, lng, self.precision)
+        key = f"forecast:{cell}:{days}"
+        entry = self.store.get(key)
+        if entry is not None:
+            if self.clock() < entry["freshUntil"]:
+                self._count("hits")
+                return entry["forecast"]
+            self._count("stale_hits")
+            self._refresh_in_background(key, cell, days)
+            return entry["forecast"]
+        forecast, shared = self._flight.do(key, lambda: self._fetch_and_store(key, cell, days))
+        self._count("hits" if shared else "misses")
+        return forecast
+
+    def _fetch_and_store(self, key: str, cell: str, days: int) -> List[Dict[str, Any]]:
+        lat, lng = geohash_center(cell)
+        forecast = self.fetch(lat, lng, days)
+        now = self.clock()
+        # Aligned to the provider's refresh boundary, not to when we asked.
+        fresh_until = (now // self.refresh_seconds + 1) * self.refresh_seconds
+        self.store.set(
+            key,
+            {"forecast": forecast, "freshUntil": fresh_until},
+            fresh_until - now + self.stale_seconds,
+        )
+        return forecast
+
+    def _refresh_in_background(self, key: str, cell: str, days: int) -> None:
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                self._flight.do(key, lambda: self._fetch_and_store(key, cell, days))
+            except Exception as error:
+                print(f"Forecast refresh failed for {cell}: {error}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        self._executor.submit(refresh)
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from geo import geohash_center, geohash_encode, parse_lat_lng
+from services.cache_store import CacheStore, InMemoryCacheStore, SingleFlight
+
+# Google allows caching geocoded coordinates for up to 30 days.
+GEOCODE_TTL_SECONDS = 30 * 24 * 3600
+# Queries that found nothing are retried sooner (typos get fixed upstream,
+# new places get added).
+GEOCODE_MISS_TTL_SECONDS = 24 * 3600
+# Batch lookups: parallel requests, and a request rate kept under the
+# Geocoding API's 50 QPS limit.
+DEFAULT_GEOCODE_CONCURRENCY = 8
+DEFAULT_GEOCODE_MAX_QPS = 40.0
+# Reverse geocodes are cached per geohash cell and requested at the cell's
+# center, so every point in a cell gets the same answer. City-level callers
+# (weather region names, plan_trip waypoint cities) share ~5 km cells;
+# anything that needs a street address should pass ADDRESS_PRECISION.
+REGION_PRECISION = 5
+ADDRESS_PRECISION = 8
+
+# Shared by every Geocoder (services build their own when none is passed),
+# so batch lookups don't leave a thread pool behind per instance.
+_executor = ThreadPoolExecutor(max_workers=DEFAULT_GEOCODE_CONCURRENCY, thread_name_prefix="geocode")
+
+
+def normalize_query(query: str) -> str:
+    """'  Empire State Building ,NYC. ' and 'empire state building, nyc'
+    share a cache entry."""
+    text = re.sub(r"\s+", " ", query.strip().lower())
+    text = re.sub(r"\s*,\s*", ", ", text)
+    return text.strip(" .,;")
+
+
+@dataclass
+class GeocodeOutcome:
+    query: str
+    results: List[Dict[str, Any]] = field(default_factory=list)
+    error: Optional[Exception] = None
+
+
+class Geocoder:
+    """
+    Caching front for gmaps.geocode, shared by every call site that turns a
+    name or address into coordinates (/geocode, PlaceService, TripService
+    stop creation and the agent/MCP tools that go through it).
+
+    geocode() keeps the googlemaps return shape, a list of results, trimmed
+    to the first result since that is all callers use. Results are cached by
+    normalized query, and each result's placeId is indexed to its
+    coordinates so stops that arrive with only a placeId resolve without a
+    request.
+
+    Concurrent lookups of the same query share one request, and
+    geocode_many() resolves a batch in parallel under max_qps.
+    reverse_geocode() is cached per geohash cell of reverse_precision.
+    Every other client method passes straight through, so a Geocoder can
+    stand in for the Maps client it wraps.
+    """
+
+    def __init__(
+        self,
+        gmaps_client,
+        store: Optional[CacheStore] = None,
+        ttl_seconds: float = GEOCODE_TTL_SECONDS,
+        miss_ttl_seconds: float = GEOCODE_MISS_TTL_SECONDS,
+        max_qps: Optional[float] = DEFAULT_GEOCODE_MAX_QPS,
+        reverse_precision: int = REGION_PRECISION,
+    ):
+        self.gmaps = gmaps_client
+        self.store = store if store is not None else InMemoryCacheStore()
+        self.ttl_seconds = ttl_seconds
+        self.miss_ttl_seconds = miss_ttl_seconds
+        self.max_qps = max_qps
+        self.reverse_precision = reverse_precision
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._flight = SingleFlight()
+        self._next_slot = 0.0
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.gmaps, name)
+
+    def geocode(self, query: str) -> List[Dict[str, Any]]:
+        key = normalize_query(query or "")
+        if not key:
+            return []
+        return self._lookup(f"query:{key}", lambda: self._fetch(query))
+
+    def reverse_geocode(self, latlng, precision: Optional[int] = None, **options) -> List[Dict[str, Any]]:
+        """googlemaps reverse_geocode, answered for the center of the
+        point's geohash cell and cached per cell. A center with no address
+        (offshore, in a park) falls back to the point itself, so a cell is
+        only cached as a miss when neither has one."""
+        lat, lng = parse_lat_lng(latlng)
+        cell = geohash_encode(lat, lng, precision or self.reverse_precision)
+        suffix = "".join(f":{name}={options[name]}" for name in sorted(options))
+
+        def fetch():
+            results = self._request(lambda: self.gmaps.reverse_geocode(geohash_center(cell), **options))
+            if results:
+                return results
+            return self._request(lambda: self.gmaps.reverse_geocode((lat, lng), **options))
+
+        return self._lookup(f"reverse:{cell}{suffix}", fetch)
+
+    def _lookup(self, key: str, fetch: Callable[[], List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        cached = self.store.get(key)
+        if cached is not None:
+            self._count(hit=True)
+            return cached
+
+        def fetch_and_store():
+            results = fetch()
+            self.store.set(key, results, self.ttl_seconds if results else self.miss_ttl_seconds)
+            return results
+
+        results, shared = self._flight.do(key, fetch_and_store)
+        self._count(hit=shared)
+        return results
+
+    def geocode_many(self, queries: Iterable[str]) -> List[GeocodeOutcome]:
+        """
+        Geocode a batch concurrently, one request per distinct normalized
+        query. Outcomes come back in input order; a failed lookup sets that
+        item's error instead of failing the batch.
+        """
+        queries = list(queries)
+        distinct: Dict[str, Future] = {}
+        for query in queries:
+            key = normalize_query(query or "")
+            if key and key not in distinct:
+                distinct[key] = _executor.submit(self.geocode, query)
+        outcomes = []
+        for query in queries:
+            future = distinct.get(normalize_query(query or ""))
+            if future is None:
+                outcomes.append(GeocodeOutcome(query))
+                continue
+            try:
+                outcomes.append(GeocodeOutcome(query, future.result()))
+            except Exception as error:
+                outcomes.append(GeocodeOutcome(query, error=error))
+        return outcomes
+
+    def _request(self, call: Callable[[], Any]) -> List[Dict[str, Any]]:
+        self._throttle()
+        return list(call() or [])[:1]
+
+    def _fetch(self, query: str) -> List[Dict[str, Any]]:
+        results = self._request(lambda: self.gmaps.geocode(query))
+        if results and results[0].get("place_id"):
+            location = results[0].get("geometry", {}).get("location", {})
+            self.store.set(
+                f"place:{results[0]['place_id']}",
+                {"lat": location.get("lat"), "lng": location.get("lng"), "address": results[0].get("formatted_address")},
+                self.ttl_seconds,
+            )
+        return results
+
+    def place_location(self, place_id: str) -> Optional[Dict[str, Any]]:
+        """{lat, lng, address} for a placeId seen in an earlier result."""
+        if not place_id:
+            return None
+        return self.store.get(f"place:{place_id}")
+
+    def _throttle(self) -> None:
+        """Space request starts at least 1 / max_qps apart."""
+        if not self.max_qps:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + 1 / self.max_qps
+        if slot > now:
+            time.sleep(slot - now)
+
+    def _count(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import os
+from typing import Any, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Connect quickly or give up; reads get longer since Distance Matrix and
+# Directions responses can take a few seconds to compute.
+DEFAULT_CONNECT_TIMEOUT_SECONDS = 3.05
+DEFAULT_READ_TIMEOUT_SECONDS = 10.0
+# Hosts kept pooled (maps, weather, ...) and keep-alive connections per host,
+# sized for the geocoder and prefetcher thread pools running at once.
+DEFAULT_POOL_HOSTS = 8
+DEFAULT_POOL_CONNECTIONS_PER_HOST = 32
+
+
+class PooledSession(requests.Session):
+    """
+    requests.Session with per-host connection pools and a default
+    (connect, read) timeout on every request. The adapter does not retry;
+    retries belong to services.maps_gateway.
+    """
+
+    def __init__(
+        self,
+        connect_timeout: float = DEFAULT_CONNECT_TIMEOUT_SECONDS,
+        read_timeout: float = DEFAULT_READ_TIMEOUT_SECONDS,
+        pool_hosts: int = DEFAULT_POOL_HOSTS,
+        connections_per_host: int = DEFAULT_POOL_CONNECTIONS_PER_HOST,
+    ):
+        super().__init__()
+        self.timeout = (connect_timeout, read_timeout)
+        adapter = HTTPAdapter(pool_connections=pool_hosts, pool_maxsize=connections_per_host, max_retries=0)
+        self.mount("https://", adapter)
+        self.mount("http://", adapter)
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        return super().request(method, url, **kwargs)
+
+
+class Http2Session:
+    """
+    requests-style get() over an httpx HTTP/2 client, so concurrent calls
+    to one host multiplex over a single connection. Responses and errors
+    are translated to their requests equivalents so callers, the gateway
+    and the cassette can't tell the difference.
+    """
+
+    def __init__(
+        self,
+        connect_timeout: float = DEFAULT_CONNECT_TIMEOUT_SECONDS,
+        read_timeout: float = DEFAULT_READ_TIMEOUT_SECONDS,
+        connections_per_host: int = DEFAULT_POOL_CONNECTIONS_PER_HOST,
+    ):
+        import httpx
+
+        self._httpx = httpx
+        self.client = httpx.Client(
+            http2=True,
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            limits=httpx.Limits(max_connections=connections_per_host, max_keepalive_connections=connections_per_host),
+        )
+
+    def get(self, url: str, params: Optional[Any] = None, headers: Optional[Any] = None, timeout: Optional[Any] = None, **kwargs):
+        """timeout is a requests-style number or (connect, read) pair and
+        defaults to the client's; other requests options are not supported."""
+        if kwargs:
+            raise TypeError(f"Http2Session.get() got unsupported arguments: {', '.join(sorted(kwargs))}")
+        options = {} if timeout is None else {"timeout": self._timeout(timeout)}
+        try:
+            response = self.client.get(url, params=params, headers=headers, **options)
+        except self._httpx.TimeoutException as error:
+            raise requests.Timeout(str(error)) from error
+        except self._httpx.TransportError as error:
+            raise requests.ConnectionError(str(error)) from error
+        return Http2Response(response)
+
+    def _timeout(self, timeout):
+        if isinstance(timeout, tuple):
+            connect, read = timeout
+            return self._httpx.Timeout(read, connect=connect)
+        return self._httpx.Timeout(timeout)
+
+
+class Http2Response:
+    def __init__(self, response):
+        self.status_code = response.status_code
+        self.url = str(response.url)
+        self.headers = response.headers
+        self.content = response.content
+        self.text = response.text
+        self._response = response
+
+    def json(self):
+        return self._response.json()
+
+    def raise_for_status(self) -> None:
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} Error for url: {self.url}", response=self)
+
+
+def make_http_session(http2: bool = False):
+    """Http2Session when asked for and httpx[http2] is installed,
+    PooledSession otherwise."""
+    if http2:
+        try:
+            import h2  # noqa: F401
+            import httpx  # noqa: F401
+        except ImportError:
+            print("Warning: PATHWISE_HTTP2 is set but httpx[http2] is not installed; using HTTP/1.1 keep-alive.")
+        else:
+            return Http2Session()
+    return PooledSession()
+
+
+# Shared by every Maps client (googlemaps needs a requests.Session) and, unless
+# PATHWISE_HTTP2=1 gives them their own HTTP/2 client, the raw API calls.
+maps_session = PooledSession()
+api_session = make_http_session(http2=True) if os.getenv("PATHWISE_HTTP2") == "1" else maps_session
@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, Optional
+from uuid import uuid4
+
+from models import now_iso
+
+# Optimize requests that opt into async still answer inline when the job
+# finishes within this many seconds.
+DEFAULT_INLINE_WAIT_SECONDS = 2.0
+DEFAULT_JOB_TTL_SECONDS = 3600
+# An event stream holds a request thread, so it ends after this long; clients
+# reconnect or poll GET /api/jobs/<id> for longer jobs.
+DEFAULT_WATCH_SECONDS = 30.0
+
+TERMINAL_STATUSES = {"succeeded", "failed", "cancelled"}
+
+# fn(report) -> result, where report(progress_fields) publishes progress and
+# raises JobCancelledError once the job has been cancelled.
+JobFn = Callable[[Callable[[Dict[str, Any]], None]], Any]
+
+
+class JobNotFoundError(Exception):
+    pass
+
+
+class JobCancelledError(Exception):
+    pass
+
+
+@dataclass
+class Job:
+    id: str
+    kind: str
+    tripId: Optional[str] = None
+    dayId: Optional[str] = None
+    status: str = "queued"
+    progress: Dict[str, Any] = field(default_factory=dict)
+    result: Any = None
+    error: Optional[str] = None
+    createdAt: str = field(default_factory=now_iso)
+    updatedAt: str = field(default_factory=now_iso)
+    # The exception a failed job raised, re-raised when the caller is still
+    # waiting inline so the usual error handlers map it to a status code.
+    exception: Optional[BaseException] = field(default=None, repr=False)
+    version: int = 0
+    finished_at: Optional[float] = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in TERMINAL_STATUSES
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {
+            "id": self.id,
+            "kind": self.kind,
+            "tripId": self.tripId,
+            "dayId": self.dayId,
+            "status": self.status,
+            "progress": dict(self.progress),
+            "createdAt": self.createdAt,
+            "updatedAt": self.updatedAt,
+        }
+        if self.status == "succeeded":
+            data["result"] = self.result
+        if self.error:
+            data["error"] = self.error
+        return data
+
+
+class JobService:
+    """
+    In-process background jobs for long optimizations. Jobs run on a small
+    thread pool (the CPU-heavy part is already offloaded to the SolverPool),
+    publish progress through the report callback, and are kept for
+    ttl_seconds after they finish so clients can collect the result.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 4,
+        ttl_seconds: float = DEFAULT_JOB_TTL_SECONDS,
+        inline_wait_seconds: float = DEFAULT_INLINE_WAIT_SECONDS,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.inline_wait_seconds = inline_wait_seconds
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._jobs: Dict[str, Job] = {}
+        self._changed = threading.Condition()
+
+    def submit(self, kind: str, fn: JobFn, trip_id: Optional[str] = None, day_id: Optional[str] = None) -> Job:
+        job = Job(id=f"job_{uuid4().hex}", kind=kind, tripId=trip_id, dayId=day_id)
+        with self._changed:
+            self._expire()
+            self._jobs[job.id] = job
+        self._executor.submit(self._run, job, fn)
+        return job
+
+    def get(self, job_id: str) -> Job:
+        with self._changed:
+            job = self._jobs.get(job_id)
+            if job is None:
+                raise JobNotFoundError("Job not found")
+            return job
+
+    def wait(self, job_id: str, timeout: float) -> Job:
+        """The job once it finishes, or as it stands after timeout seconds."""
+        deadline = time.monotonic() + timeout
+        with self._changed:
+            job = self.get(job_id)
+            while not job.done and time.monotonic() < deadline:
+                self._changed.wait(deadline - time.monotonic())
+            return job
+
+    def watch(self, job_id: str, timeout: float = DEFAULT_WATCH_SECONDS) -> Iterator[Dict[str, Any]]:
+        """Yield a snapshot of the job on every change until it finishes or
+        timeout seconds pass."""
+        deadline = time.monotonic() + timeout
+        seen = -1
+        while time.monotonic() < deadline:
+            with self._changed:
+                job = self.get(job_id)
+                if job.version == seen:
+                    self._changed.wait(deadline - time.monotonic())
+                    continue
+                seen = job.version
+                snapshot = job.to_dict()
+            yield snapshot
+            if snapshot["status"] in TERMINAL_STATUSES:
+                return
+
+    def cancel(self, job_id: str) -> Job:
+        """Queued jobs never start; running ones stop at their next progress
+        report."""
+        with self._changed:
+            job = self.get(job_id)
+            if not job.done:
+                self._update(job, status="cancelled")
+            return job
+
+    def _run(self, job: Job, fn: JobFn) -> None:
+        with self._changed:
+            if job.done:
+                return
+            self._update(job, status="running")
+
+        def report(progress: Dict[str, Any]) -> None:
+            with self._changed:
+                if job.status == "cancelled":
+                    raise JobCancelledError("Job was cancelled")
+                self._update(job, progress={**job.progress, **progress})
+
+        try:
+            result = fn(report)
+        except JobCancelledError:
+            return
+        except Exception as error:
+            with self._changed:
+                job.exception = error
+                self._update(job, status="failed", error=str(error))
+            return
+        with self._changed:
+            if job.status != "cancelled":
+                self._update(job, status="succeeded", result=result)
+
+    def _update(self, job: Job, **changes: Any) -> None:
+        """Apply changes and wake waiters; caller holds the condition."""
+        for key, value in changes.items():
+            setattr(job, key, value)
+        job.version += 1
+        job.updatedAt = now_iso()
+        if job.done:
+            job.finished_at = time.monotonic()
+        self._changed.notify_all()
+
+    def _expire(self) -> None:
+        cutoff = time.monotonic() - self.ttl_seconds
+        for job_id in [job_id for job_id, job in self._jobs.items() if job.finished_at and job.finished_at < cutoff]:
+            del self._jobs[job_id]
@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Tuple
+
+# Distance Matrix request limits.
+MAX_ORIGINS = 25
+MAX_DESTINATIONS = 25
+MAX_ELEMENTS = 100
+
+DEFAULT_WINDOW_SECONDS = 0.01
+
+PairKey = Tuple[str, str, Tuple[Tuple[str, Any], ...]]
+
+
+def _place(value: Any) -> str:
+    """The string form googlemaps sends for a location."""
+    if isinstance(value, str):
+        return value
+    if isinstance(value, dict):
+        return f"{value['lat']},{value['lng']}"
+    return f"{value[0]},{value[1]}"
+
+
+def _as_list(value: Any) -> List[Any]:
+    return value if isinstance(value, list) else [value]
+
+
+class BatchingMapsClient:
+    """
+    Drop-in wrapper for a googlemaps client that merges concurrent
+    distance_matrix calls.
+
+    Each call is split into (origin, destination) pairs and parked for up to
+    window_seconds. The dispatcher then packs everything pending into as few
+    requests as the 25 origin / 25 destination / 100 element limits allow
+    and fans the elements back to each caller in its own row/column order.
+    Identical pairs requested by several callers at once are fetched once.
+    Every other client method passes straight through.
+    """
+
+    def __init__(self, client, window_seconds: float = DEFAULT_WINDOW_SECONDS, max_concurrent_requests: int = 4):
+        self.client = client
+        self.window_seconds = window_seconds
+        self.requests_sent = 0
+        # Pairs waiting for the next dispatch, and pairs already sent; both
+        # are joined by later callers instead of being requested again.
+        self._pending: Dict[PairKey, Future] = {}
+        self._inflight: Dict[PairKey, Future] = {}
+        self._cond = threading.Condition()
+        self._dispatcher = None
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrent_requests, thread_name_prefix="maps-batch")
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+    def distance_matrix(self, origins, destinations, mode: str = "driving", **options) -> Dict[str, Any]:
+        origin_places = [_place(origin) for origin in _as_list(origins)]
+        destination_places = [_place(destination) for destination in _as_list(destinations)]
+        extra = tuple(sorted({"mode": mode, **options}.items()))
+        futures: Dict[PairKey, Future] = {}
+        with self._cond:
+            for origin in origin_places:
+                for destination in destination_places:
+                    key = (origin, destination, extra)
+                    future = self._pending.get(key) or self._inflight.get(key)
+                    if future is None:
+                        future = self._pending[key] = Future()
+                    futures[key] = future
+            if self._dispatcher is None or not self._dispatcher.is_alive():
+                self._dispatcher = threading.Thread(target=self._dispatch_forever, name="maps-batcher", daemon=True)
+                self._dispatcher.start()
+            self._cond.notify()
+        rows = [
+            {"elements": [futures[(origin, destination, extra)].result() for destination in destination_places]}
+            for origin in origin_places
+        ]
+        return {"status": "OK", "rows": rows}
+
+    def _dispatch_forever(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+            # Let concurrent callers add their pairs before packing.
+            time.sleep(self.window_seconds)
+            with self._cond:
+                batch, self._pending = self._pending, {}
+                self._inflight.update(batch)
+            for options, pairs in _group_by_options(batch).items():
+                for block in pack_blocks(pairs):
+                    self._executor.submit(self._send, block, options, batch)
+
+    def _send(self, block: Tuple[List[str], List[str]], options, batch: Dict[PairKey, Future]) -> None:
+        origins, destinations = block
+        keys = [(origin, destination, options) for origin in origins for destination in destinations]
+        try:
+            with self._cond:
+                self.requests_sent += 1
+            response = self.client.distance_matrix(origins, destinations, **dict(options))
+            rows = response.get("rows", [])
+            outcome = {}
+            for row_index, origin in enumerate(origins):
+                elements = rows[row_index].get("elements", []) if row_index < len(rows) else []
+                for col_index, destination in enumerate(destinations):
+                    element = elements[col_index] if col_index < len(elements) else {"status": "UNKNOWN_ERROR"}
+                    outcome[(origin, destination, options)] = element
+            error = None
+        except Exception as raised:
+            outcome, error = {}, raised
+        with self._cond:
+            for key in keys:
+                future = batch.get(key)
+                if future is None or future.done():
+                    continue
+                self._inflight.pop(key, None)
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(outcome[key])
+
+
+def _group_by_options(batch: Dict[PairKey, Future]) -> Dict[Tuple, List[Tuple[str, str]]]:
+    grouped: Dict[Tuple, List[Tuple[str, str]]] = {}
+    for origin, destination, options in batch:
+        grouped.setdefault(options, []).append((origin, destination))
+    return grouped
+
+
+def pack_blocks(pairs: Iterable[Tuple[str, str]]) -> List[Tuple[List[str], List[str]]]:
+    """
+    Cover every (origin, destination) pair with origins x destinations
+    blocks inside the request limits, without billing any element nobody
+    asked for. Greedy: seed a block with the origin that has the most
+    uncovered destinations, then add the origins that share the most of
+    them, shrinking the destinations to what every origin in the block
+    wants, as long as that covers more elements.
+    """
+    rows: Dict[str, List[str]] = {}
+    for origin, destination in pairs:
+        row = rows.setdefault(origin, [])
+        if destination not in row:
+            row.append(destination)
+    blocks = []
+    while rows:
+        seed = max(rows, key=lambda origin: len(rows[origin]))
+        destinations = rows[seed][:MAX_DESTINATIONS]
+        origins = [seed]
+        others = sorted(
+            (origin for origin in rows if origin != seed),
+            key=lambda origin: -len(set(destinations).intersection(rows[origin])),
+        )
+        for origin in others:
+            if len(origins) == MAX_ORIGINS:
+                break
+            shared = [destination for destination in destinations if destination in rows[origin]]
+            elements = (len(origins) + 1) * len(shared)
+            if elements <= MAX_ELEMENTS and elements > len(origins) * len(destinations):
+                origins.append(origin)
+                destinations = shared
+        if len(origins) * len(destinations) > MAX_ELEMENTS:
+            destinations = destinations[:MAX_ELEMENTS // len(origins)]
+        covered = set(destinations)
+        for origin in origins:
+            rows[origin] = [destination for destination in rows[origin] if destination not in covered]
+            if not rows[origin]:
+                del rows[origin]
+        blocks.append((origins, destinations))
+    return blocks
@@ -0,0 +1,277 @@
+from __future__ import annotations
+
+import json
+import os
+import random
+import threading
+import time
+from typing import Any, Callable, Optional
+
+from services.cache_store import SingleFlight
+
+# Shared by every outbound Google call (Maps client methods and the raw
+# Weather/Geocoding HTTP requests), kept under the per-project quota.
+DEFAULT_GATEWAY_QPS = 50.0
+DEFAULT_GATEWAY_BURST = 50
+# A call that would wait longer than this for a token fails instead.
+DEFAULT_GATEWAY_MAX_WAIT_SECONDS = 2.0
+DEFAULT_GATEWAY_ATTEMPTS = 3
+DEFAULT_GATEWAY_BACKOFF_SECONDS = 0.2
+DEFAULT_GATEWAY_MAX_BACKOFF_SECONDS = 2.0
+# Consecutive 429/5xx/transport failures that open the circuit, and how long
+# it stays open before a single trial call is let through.
+DEFAULT_CIRCUIT_FAILURES = 5
+DEFAULT_CIRCUIT_RESET_SECONDS = 30.0
+
+_RETRYABLE_API_STATUSES = {"OVER_QUERY_LIMIT", "UNKNOWN_ERROR"}
+_RETRYABLE_ERROR_NAMES = {"Timeout", "TransportError", "ConnectionError", "ConnectTimeout", "ReadTimeout"}
+
+
+class MapsUnavailableError(RuntimeError):
+    """Raised without contacting Google when the circuit is open or the rate
+    limit would keep the call waiting too long."""
+
+
+def is_retryable(error: Exception) -> bool:
+    """429s, 5xx, OVER_QUERY_LIMIT and network failures; not client errors
+    such as INVALID_REQUEST or a 404."""
+    status_code = getattr(error, "status_code", None)
+    if status_code is None:
+        status_code = getattr(getattr(error, "response", None), "status_code", None)
+    if status_code is not None:
+        return status_code == 429 or status_code >= 500
+    if getattr(error, "status", None) in _RETRYABLE_API_STATUSES:
+        return True
+    return type(error).__name__ in _RETRYABLE_ERROR_NAMES
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, max_wait: float) -> bool:
+        """Take a token, sleeping until one is available. False (and nothing
+        taken) if that would take longer than max_wait."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            wait = (1 - self._tokens) / self.rate if self._tokens < 1 else 0.0
+            if wait > max_wait:
+                return False
+            # Reserve the token now; waiters queue up behind each other.
+            self._tokens -= 1
+        if wait:
+            time.sleep(wait)
+        return True
+
+
+class CircuitBreaker:
+    """Closed until failure_threshold consecutive failures, then open for
+    reset_seconds, then half-open: one trial call decides which way it goes."""
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at >= self.reset_seconds:
+                return "half-open"
+            return "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_seconds or self._trial_running:
+                return False
+            self._trial_running = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self._opened_at = None
+            self._trial_running = False
+
+    def release_trial(self) -> None:
+        """Give up a half-open trial that never reached Google."""
+        with self._lock:
+            self._trial_running = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self._trial_running or self.failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._trial_running = False
+
+
+class MapsGateway:
+    """
+    The one path out to Google. Every call takes a token from a shared
+    bucket, is retried with full-jitter exponential backoff on retryable
+    errors, and shares the result of an identical call already in flight.
+    Retryable failures feed a circuit breaker; while it is open calls raise
+    MapsUnavailableError immediately and callers take their existing
+    fallbacks (inf distances, missing weather) instead of waiting on
+    timeouts.
+
+    client() and http() wrap a googlemaps.Client and a requests-style
+    session respectively.
+    """
+
+    def __init__(
+        self,
+        qps: float = DEFAULT_GATEWAY_QPS,
+        burst: int = DEFAULT_GATEWAY_BURST,
+        max_wait_seconds: float = DEFAULT_GATEWAY_MAX_WAIT_SECONDS,
+        attempts: int = DEFAULT_GATEWAY_ATTEMPTS,
+        backoff_seconds: float = DEFAULT_GATEWAY_BACKOFF_SECONDS,
+        max_backoff_seconds: float = DEFAULT_GATEWAY_MAX_BACKOFF_SECONDS,
+        circuit_failures: int = DEFAULT_CIRCUIT_FAILURES,
+        circuit_reset_seconds: float = DEFAULT_CIRCUIT_RESET_SECONDS,
+    ):
+        self.bucket = TokenBucket(qps, burst)
+        self.breaker = CircuitBreaker(circuit_failures, circuit_reset_seconds)
+        self.max_wait_seconds = max_wait_seconds
+        self.attempts = attempts
+        self.backoff_seconds = backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self.requests = 0
+        self.retries = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+        self._flight = SingleFlight()
+
+    @classmethod
+    def from_env(cls) -> "MapsGateway":
+        """MAPS_GATEWAY_QPS, MAPS_GATEWAY_BURST, MAPS_GATEWAY_ATTEMPTS,
+        MAPS_CIRCUIT_FAILURES and MAPS_CIRCUIT_RESET_SECONDS."""
+        return cls(
+            qps=float(os.getenv("MAPS_GATEWAY_QPS", DEFAULT_GATEWAY_QPS)),
+            burst=int(os.getenv("MAPS_GATEWAY_BURST", DEFAULT_GATEWAY_BURST)),
+            attempts=int(os.getenv("MAPS_GATEWAY_ATTEMPTS", DEFAULT_GATEWAY_ATTEMPTS)),
+            circuit_failures=int(os.getenv("MAPS_CIRCUIT_FAILURES", DEFAULT_CIRCUIT_FAILURES)),
+            circuit_reset_seconds=float(os.getenv("MAPS_CIRCUIT_RESET_SECONDS", DEFAULT_CIRCUIT_RESET_SECONDS)),
+        )
+
+    def client(self, gmaps_client) -> "GatewayMapsClient":
+        return GatewayMapsClient(self, gmaps_client)
+
+    def http(self, session) -> "GatewayHttp":
+        return GatewayHttp(self, session)
+
+    def call(self, key: Optional[str], fn: Callable[[], Any]) -> Any:
+        """fn() under the gateway's policies; calls with the same non-None
+        key that overlap share one execution."""
+        if key is None:
+            return self._call(fn)
+        return self._flight.do(key, lambda: self._call(fn))[0]
+
+    def _call(self, fn: Callable[[], Any]) -> Any:
+        for attempt in range(self.attempts):
+            if not self.breaker.allow():
+                self._count("rejected")
+                raise MapsUnavailableError("Google Maps circuit is open")
+            settled = False
+            try:
+                if not self.bucket.acquire(self.max_wait_seconds):
+                    self._count("rejected")
+                    raise MapsUnavailableError("Google Maps rate limit exceeded")
+                self._count("requests")
+                try:
+                    result = fn()
+                except Exception as error:
+                    settled = True
+                    if not is_retryable(error):
+                        # The service answered; the request was bad.
+                        self.breaker.record_success()
+                        raise
+                    self.breaker.record_failure()
+                    if attempt == self.attempts - 1:
+                        raise
+                else:
+                    settled = True
+                    self.breaker.record_success()
+                    return result
+            finally:
+                if not settled:
+                    # Rate-limited or interrupted before Google answered: no
+                    # verdict, so a half-open trial must not stay claimed.
+                    self.breaker.release_trial()
+            self._count("retries")
+            cap = min(self.max_backoff_seconds, self.backoff_seconds * 2 ** attempt)
+            time.sleep(random.uniform(0, cap))
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+
+def _call_key(target, name: str, args, kwargs) -> str:
+    # Clients with different keys or base URLs must not share results.
+    return json.dumps([id(target), name, args, kwargs], sort_keys=True, default=str)
+
+
+class GatewayMapsClient:
+    """googlemaps.Client whose methods all go through a MapsGateway."""
+
+    def __init__(self, gateway: MapsGateway, gmaps_client):
+        self.gateway = gateway
+        self.gmaps = gmaps_client
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        attribute = getattr(self.gmaps, name)
+        if not callable(attribute):
+            return attribute
+
+        def call(*args, **kwargs):
+            return self.gateway.call(_call_key(self.gmaps, name, args, kwargs), lambda: attribute(*args, **kwargs))
+
+        return call
+
+
+class GatewayHttp:
+    """requests-style get() through a MapsGateway. 429 and 5xx responses
+    are retried; the last one is returned for the caller to check."""
+
+    def __init__(self, gateway: MapsGateway, session):
+        self.gateway = gateway
+        self.session = session
+
+    def get(self, url: str, **kwargs):
+        def fetch():
+            response = self.session.get(url, **kwargs)
+            if is_retryable(response):
+                raise _RetryableResponse(response)
+            return response
+
+        try:
+            return self.gateway.call(_call_key(self.session, "GET", [url], kwargs), fetch)
+        except _RetryableResponse as error:
+            return error.response
+
+
+class _RetryableResponse(Exception):
+    def __init__(self, response):
+        super().__init__(f"HTTP {response.status_code}")
+        self.response = response
+        self.status_code = response.status_code
+
+
+default_gateway = MapsGateway.from_env()
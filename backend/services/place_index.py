@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+
+from geo import cells_covering, distance_meters, geohash_encode
+
+# Index cells are ~1.2 km x 0.6 km, so a 2 km "nearby" query touches a few
+# dozen cells at most.
+INDEX_PRECISION = 6
+# Places seen, and areas searched, older than this are stale: they no longer
+# count towards coverage and are not served.
+INDEX_TTL_SECONDS = 24 * 3600
+INDEX_MAX_PLACES = 50_000
+# Searches remembered per category; older ones stop counting as coverage.
+INDEX_MAX_SEARCHES_PER_CATEGORY = 500
+# A covered area with fewer matching places than this is too sparse to
+# answer from (the agent shows 5).
+INDEX_MIN_RESULTS = 5
+# Text search returns at most this many results, by prominence. A full page
+# is a sample of the area, not a listing of it.
+TEXT_SEARCH_PAGE_SIZE = 20
+# A full-page search still counts as coverage for queries at least this
+# fraction of its radius, whose top results it mostly shares.
+INDEX_COMPARABLE_RADIUS = 0.75
+
+
+class PlaceIndex:
+    """
+    Process-local spatial index of every place result we have fetched,
+    bucketed by geohash cell and tagged with the (normalized) search
+    categories each place was returned for.
+
+    nearby() answers a category search around a point from the index when
+    the whole search circle lies inside a fresh earlier search for the same
+    category and enough matching places fall within it. Otherwise it returns
+    None and the caller goes to Google, whose answer is fed back via add().
+
+    Only searches that listed their area exhaustively count as coverage of
+    smaller circles inside it: fewer than 20 results. A full page holds just
+    the 20 most prominent places, so a 5 km "restaurants" search says little
+    about a 1 km circle inside it. It covers only queries of comparable
+    radius (INDEX_COMPARABLE_RADIUS).
+    """
+
+    def __init__(
+        self,
+        precision: int = INDEX_PRECISION,
+        ttl_seconds: float = INDEX_TTL_SECONDS,
+        max_places: int = INDEX_MAX_PLACES,
+        min_results: int = INDEX_MIN_RESULTS,
+    ):
+        self.precision = precision
+        self.ttl_seconds = ttl_seconds
+        self.max_places = max_places
+        self.min_results = min_results
+        self._places: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._cells: Dict[str, Set[str]] = {}
+        # category -> (lat, lng, radius, seen, exhaustive)
+        self._searches: Dict[str, Deque[Tuple[float, float, float, float, bool]]] = {}
+        self._lock = threading.Lock()
+
+    def add(
+        self,
+        category: str,
+        results: List[Dict[str, Any]],
+        center: Optional[Tuple[float, float]] = None,
+        radius: Optional[float] = None,
+    ) -> None:
+        """Index a search's results. With a center and radius the search
+        also counts as coverage of that circle for the category."""
+        now = time.monotonic()
+        with self._lock:
+            for result in results or []:
+                location = (result.get("geometry") or {}).get("location") or {}
+                if location.get("lat") is None or location.get("lng") is None:
+                    continue
+                point = (float(location["lat"]), float(location["lng"]))
+                place_id = result.get("place_id") or f"{result.get('name')}@{point[0]:.6f},{point[1]:.6f}"
+                entry = self._places.pop(place_id, None)
+                if entry is not None and entry["cell"] != geohash_encode(*point, self.precision):
+                    self._unlink(place_id, entry["cell"])
+                    entry = None
+                if entry is None:
+                    entry = {"categories": set(), "cell": geohash_encode(*point, self.precision)}
+                    self._cells.setdefault(entry["cell"], set()).add(place_id)
+                entry.update(result=result, point=point, seen=now)
+                entry["categories"].add(category)
+                self._places[place_id] = entry
+            while len(self._places) > self.max_places:
+                place_id, entry = self._places.popitem(last=False)
+                self._unlink(place_id, entry["cell"])
+            if center is not None and radius:
+                searches = self._searches.setdefault(category, deque(maxlen=INDEX_MAX_SEARCHES_PER_CATEGORY))
+                exhaustive = len(results or []) < TEXT_SEARCH_PAGE_SIZE
+                searches.append((center[0], center[1], float(radius), now, exhaustive))
+
+    def nearby(self, category: str, lat: float, lng: float, radius: float) -> Optional[List[Dict[str, Any]]]:
+        """Results for category within radius meters of (lat, lng), highest
+        rated first, or None when the area is not covered well enough."""
+        fresh_after = time.monotonic() - self.ttl_seconds
+        with self._lock:
+            if not self._covered(category, lat, lng, radius, fresh_after):
+                return None
+            matches = []
+            for cell in cells_covering(lat, lng, radius, self.precision):
+                for place_id in self._cells.get(cell, ()):
+                    entry = self._places[place_id]
+                    if entry["seen"] < fresh_after or category not in entry["categories"]:
+                        continue
+                    distance = distance_meters((lat, lng), entry["point"])
+                    if distance <= radius:
+                        matches.append((-(entry["result"].get("rating") or 0), distance, entry["result"]))
+        if len(matches) < self.min_results:
+            return None
+        matches.sort(key=lambda match: match[:2])
+        return [result for _, _, result in matches]
+
+    def _covered(self, category: str, lat: float, lng: float, radius: float, fresh_after: float) -> bool:
+        return any(
+            seen >= fresh_after
+            and (exhaustive or radius >= search_radius * INDEX_COMPARABLE_RADIUS)
+            and distance_meters((lat, lng), (search_lat, search_lng)) + radius <= search_radius
+            for search_lat, search_lng, search_radius, seen, exhaustive in self._searches.get(category, ())
+        )
+
+    def _unlink(self, place_id: str, cell: str) -> None:
+        members = self._cells.get(cell)
+        if members is not None:
+            members.discard(place_id)
+            if not members:
+                del self._cells[cell]
+
+    def __len__(self) -> int:
+        return len(self._places)
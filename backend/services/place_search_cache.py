@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import threading
+from typing import Any, Dict, Optional
+
+from geo import geohash_center, geohash_encode, parse_lat_lng
+from services.cache_store import CacheStore, InMemoryCacheStore, SingleFlight
+from services.geocoder import normalize_query
+from services.place_index import PlaceIndex
+
+# Place listings change (hours, closures), so hits only live briefly; the
+# point is to absorb repeats within and across chat turns.
+PLACES_TTL_SECONDS = 60 * 60
+PLACES_MAX_ENTRIES = 2_000
+# Radii are rounded up to one of these. For text search, location and
+# radius only bias results, so nearby variants can share an answer.
+RADIUS_BUCKETS_METERS = (500, 1000, 2000, 3000, 5000, 10000, 15000, 20000, 30000, 50000)
+
+
+def radius_bucket(radius: Optional[float]) -> Optional[int]:
+    if not radius:
+        return None
+    return next((bucket for bucket in RADIUS_BUCKETS_METERS if bucket >= radius), RADIUS_BUCKETS_METERS[-1])
+
+
+def cell_precision(radius: Optional[float]) -> int:
+    """Geohash length whose cells are at most about a third of the search
+    radius across, so snapping to the cell center barely moves the bias."""
+    if radius and radius < 3_600:
+        return 7
+    if radius and radius < 14_700:
+        return 6
+    return 5
+
+
+class PlaceSearchCache:
+    """
+    Caching front for gmaps.places (text search), used by the agent's
+    search_places and plan_trip tools and the MCP search_places tool.
+
+    Requests are keyed by normalized query text, the location's geohash cell
+    and the radius bucket, and are sent with the cell center and bucketed
+    radius so every request sharing a key gets the same answer. Concurrent
+    identical searches share one request. Every other client method passes
+    straight through.
+
+    Results are also fed to a PlaceIndex, which answers searches around
+    coordinates that fall inside an area already searched for the same
+    query (index_hits) without a request.
+    """
+
+    def __init__(
+        self,
+        gmaps_client,
+        store: Optional[CacheStore] = None,
+        ttl_seconds: float = PLACES_TTL_SECONDS,
+        index: Optional[PlaceIndex] = None,
+    ):
+        self.gmaps = gmaps_client
+        self.store = store if store is not None else InMemoryCacheStore(PLACES_MAX_ENTRIES)
+        self.ttl_seconds = ttl_seconds
+        self.index = index if index is not None else PlaceIndex()
+        self.hits = 0
+        self.misses = 0
+        self.index_hits = 0
+        self._lock = threading.Lock()
+        self._flight = SingleFlight()
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.gmaps, name)
+
+    def places(self, query: Optional[str] = None, location=None, radius: Optional[int] = None, **options) -> Dict[str, Any]:
+        text = normalize_query(query or "")
+        if not text or options.get("page_token"):
+            return self.gmaps.places(query=query, location=location, radius=radius, **options)
+        request: Dict[str, Any] = {"query": query}
+        key = [text]
+        point = None
+        bucket = radius_bucket(radius)
+        if location is not None:
+            try:
+                lat, lng = parse_lat_lng(location)
+            except (TypeError, ValueError, KeyError, IndexError):
+                # Not coordinates (e.g. a place name from the agent): keyed
+                # and sent as given.
+                request["location"] = location
+                key.append(normalize_query(str(location)))
+            else:
+                point = (lat, lng)
+                cell = geohash_encode(lat, lng, cell_precision(bucket))
+                center = geohash_center(cell)
+                request["location"] = f"{center[0]:.6f},{center[1]:.6f}"
+                key.append(cell)
+        if bucket:
+            request["radius"] = bucket
+            key.append(str(bucket))
+        options = {name: value for name, value in options.items() if value is not None}
+        request.update(options)
+        key.extend(f"{name}={options[name]}" for name in sorted(options))
+        cache_key = "places:" + "|".join(key)
+
+        cached = self.store.get(cache_key)
+        if cached is not None:
+            self._count(hit=True)
+            return cached
+
+        # Filters (type, open_now, ...) are not tracked per place, so only
+        # plain searches around a point are answered from the index.
+        indexable = point is not None and bucket is not None and not options
+        if indexable:
+            results = self.index.nearby(text, point[0], point[1], radius)
+            if results is not None:
+                with self._lock:
+                    self.index_hits += 1
+                return {"status": "OK", "results": results}
+
+        def fetch():
+            response = self.gmaps.places(**request)
+            self.store.set(cache_key, response, self.ttl_seconds)
+            # Coverage is recorded for the caller's circle, which the
+            # snapped, bucketed request contains up to the snapping offset.
+            self.index.add(
+                text,
+                (response or {}).get("results") or [],
+                point if indexable else None,
+                radius if indexable else None,
+            )
+            return response
+
+        response, shared = self._flight.do(cache_key, fetch)
+        self._count(hit=shared)
+        return response
+
+    def _count(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
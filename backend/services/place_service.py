@@ -2,15 +2,25 @@ from __future__ import annotations
 
 from typing import Any, Dict, List, Optional
 
+from services.geocoder import Geocoder
+from services.place_search_cache import PlaceSearchCache
+
 
 class PlaceService:
-    def __init__(self, gmaps_client):
+    def __init__(
+        self,
+        gmaps_client,
+        geocoder: Optional[Geocoder] = None,
+        place_search: Optional[PlaceSearchCache] = None,
+    ):
         self.gmaps = gmaps_client
+        self.geocoder = geocoder if geocoder is not None else Geocoder(gmaps_client)
+        self.place_search = place_search if place_search is not None else PlaceSearchCache(gmaps_client)
 
     def geocode(self, query: str) -> Optional[Dict[str, Any]]:
         if not query:
             return None
-        results = self.gmaps.geocode(query)
+        results = self.geocoder.geocode(query)
         if not results:
             return None
         first = results[0]
@@ -29,7 +39,7 @@ class PlaceService:
             kwargs["location"] = near
         if radius:
             kwargs["radius"] = radius
-        response = self.gmaps.places(**kwargs)
+        response = self.place_search.places(**kwargs)
         places = []
         for result in response.get("results", [])[:5]:
             places.append(
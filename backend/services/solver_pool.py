@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional
+
+# Days up to this many stops solve in well under 50 ms, less than the round
+# trip to a worker process, so they stay on the request thread.
+DEFAULT_INLINE_MAX_STOPS = 20
+DEFAULT_TIMEOUT_SECONDS = 30.0
+DEFAULT_RETRY_AFTER_SECONDS = 5
+
+
+class SolverBusyError(Exception):
+    """Every worker is busy and the wait queue is full."""
+
+    def __init__(self, retry_after: int = DEFAULT_RETRY_AFTER_SECONDS):
+        super().__init__("Route solver is busy, try again shortly")
+        self.retry_after = retry_after
+
+
+class SolverTimeoutError(Exception):
+    pass
+
+
+class SolverPool:
+    """
+    Runs CPU-bound solver calls in worker processes so they don't hold the
+    GIL of the single uvicorn process that also serves CRUD and /mcp.
+
+    At most max_workers jobs run and max_queue more wait; beyond that run()
+    raises SolverBusyError instead of queueing without bound. A job that
+    exceeds timeout_seconds raises SolverTimeoutError: it is cancelled if it
+    has not started, otherwise its result is discarded (solvers bound their
+    own improvement phase, so the worker frees up shortly after) and it keeps
+    its slot until it does. A worker that dies mid-solve also raises
+    SolverTimeoutError, and the pool is replaced.
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        max_queue: Optional[int] = None,
+        timeout_seconds: float = DEFAULT_TIMEOUT_SECONDS,
+        inline_max_stops: int = DEFAULT_INLINE_MAX_STOPS,
+        retry_after_seconds: int = DEFAULT_RETRY_AFTER_SECONDS,
+    ):
+        self.max_workers = max(1, (os.cpu_count() or 2) - 1) if max_workers is None else max_workers
+        self.max_queue = 2 * self.max_workers if max_queue is None else max_queue
+        self.timeout_seconds = timeout_seconds
+        self.inline_max_stops = inline_max_stops
+        self.retry_after_seconds = retry_after_seconds
+        self._slots = threading.BoundedSemaphore(self.max_workers + self.max_queue) if self.max_workers else None
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "SolverPool":
+        """SOLVER_WORKERS (0 solves inline), SOLVER_QUEUE_SIZE,
+        SOLVER_TIMEOUT_SECONDS and SOLVER_INLINE_MAX_STOPS."""
+        workers = os.getenv("SOLVER_WORKERS")
+        queue = os.getenv("SOLVER_QUEUE_SIZE")
+        return cls(
+            max_workers=int(workers) if workers else None,
+            max_queue=int(queue) if queue else None,
+            timeout_seconds=float(os.getenv("SOLVER_TIMEOUT_SECONDS", DEFAULT_TIMEOUT_SECONDS)),
+            inline_max_stops=int(os.getenv("SOLVER_INLINE_MAX_STOPS", DEFAULT_INLINE_MAX_STOPS)),
+        )
+
+    def run(self, fn: Callable[..., Any], *args: Any, size: int = 0, **kwargs: Any) -> Any:
+        """Call fn(*args, **kwargs) in a worker and wait for the result.
+        fn must be a module-level function; size is the number of stops."""
+        if not self.max_workers or size <= self.inline_max_stops:
+            return fn(*args, **kwargs)
+        if not self._slots.acquire(blocking=False):
+            raise SolverBusyError(self.retry_after_seconds)
+        try:
+            executor, future = self._submit(fn, args, kwargs)
+        except BaseException:
+            self._slots.release()
+            raise
+        # The slot is held until the worker is really free, not just until
+        # this caller stops waiting, so timed-out solves still count.
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout_seconds)
+        except FutureTimeoutError:
+            future.cancel()
+            raise SolverTimeoutError(f"Route solver timed out after {self.timeout_seconds:g}s")
+        except BrokenProcessPool:
+            # The worker died mid-solve (e.g. OOM-killed).
+            self._replace_broken(executor)
+            raise SolverTimeoutError("Route solver worker stopped unexpectedly, try again")
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def _submit(self, fn, args, kwargs):
+        with self._lock:
+            if self._executor is None:
+                self._executor = self._new_executor()
+            try:
+                return self._executor, self._executor.submit(fn, *args, **kwargs)
+            except BrokenProcessPool:
+                # A worker died (e.g. OOM); start a fresh pool once.
+                self._executor = self._new_executor()
+                return self._executor, self._executor.submit(fn, *args, **kwargs)
+
+    def _replace_broken(self, executor: ProcessPoolExecutor) -> None:
+        with self._lock:
+            if self._executor is executor:
+                executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = self._new_executor()
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        # spawn, not fork: the parent runs uvicorn, gRPC and HTTP client
+        # threads whose locks must not be copied mid-use.
+        return ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
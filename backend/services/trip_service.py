@@ -1,11 +1,28 @@
 from __future__ import annotations
 
 import secrets
-from typing import Any, Dict, List, Optional
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
-from christofides import route_total_distance, tsp
+from christofides import (
+    DEFAULT_GAP_THRESHOLD,
+    build_distance_matrix,
+    build_duration_matrix,
+    make_cached_distance_fn,
+    predicted_improvement,
+    route_total_distance,
+    solve,
+)
 from models import Day, Route, Stop, Trip, new_day_id, now_iso
+from orienteering import solve_orienteering
+from scheduling import DEFAULT_DAY_START, DEFAULT_DWELL_MINUTES, format_clock, parse_clock, solve_time_windows, time_windows
+import weather
+from services.cache_store import CacheStore, InMemoryCacheStore
+from services.distance_cache import DistanceCache
+from services.distance_prefetcher import DistancePrefetcher
 from services.export_service import export_google_maps
+from services.geocoder import Geocoder
+from services.solver_pool import SolverPool
 from services.trip_repository import TripRepository
 
 
@@ -21,10 +38,75 @@ class ValidationError(Exception):
     pass
 
 
+class ConflictError(Exception):
+    pass
+
+
+# optimize_day keeps the current order without fetching a driving matrix when
+# a straight-line solve predicts less than this fractional improvement.
+DEFAULT_PRECHECK_THRESHOLD = 0.03
+# Larger days skip the pre-check: its straight-line matrix alone grows with
+# the square of the stop count, and big days rarely arrive near-optimal.
+PRECHECK_MAX_STOPS = 150
+# Assembled trip weather is cached per trip version until the forecasts it
+# was built from refresh, at the top of the hour.
+TRIP_WEATHER_REFRESH_SECONDS = 3600
+TRIP_WEATHER_MAX_ENTRIES = 1_000
+
+
+def _matrix_progress(progress: Optional[Callable[[Dict[str, Any]], None]]):
+    if progress is None:
+        return None
+    return lambda done, total: progress({"phase": "matrix", "batchesDone": done, "batchesTotal": total})
+
+
+def _solve_progress(progress: Optional[Callable[[Dict[str, Any]], None]]):
+    if progress is None:
+        return None
+    return lambda cost, lower_bound: progress({
+        "phase": "solving",
+        "bestCostMiles": round(cost, 1),
+        "lowerBoundMiles": round(lower_bound, 1) if lower_bound is not None else None,
+    })
+
+
+def _non_negative(value: Any, name: str) -> Optional[float]:
+    """value as a float, None when not given; ValidationError otherwise."""
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not value >= 0:
+        raise ValidationError(f"{name} must be a non-negative number")
+    return float(value)
+
+
+def _stop_positions(day: Day) -> List[Tuple[str, Optional[float], Optional[float]]]:
+    return [(stop.id, stop.lat, stop.lng) for stop in day.stops]
+
+
 class TripService:
-    def __init__(self, repository: TripRepository, gmaps_client=None):
+    def __init__(
+        self,
+        repository: TripRepository,
+        gmaps_client=None,
+        distance_cache: Optional[DistanceCache] = None,
+        precheck_threshold: float = DEFAULT_PRECHECK_THRESHOLD,
+        solver_pool: Optional[SolverPool] = None,
+        prefetcher: Optional[DistancePrefetcher] = None,
+        geocoder: Optional[Geocoder] = None,
+        weather_cache: Optional[CacheStore] = None,
+    ):
         self.repository = repository
         self.gmaps = gmaps_client
+        # Share one geocoder (and its persistent store) across services.
+        if geocoder is None and gmaps_client is not None:
+            geocoder = Geocoder(gmaps_client)
+        self.geocoder = geocoder
+        self.distance_cache = distance_cache if distance_cache is not None else DistanceCache()
+        self.precheck_threshold = precheck_threshold
+        self.solver_pool = solver_pool
+        # Warms the distance cache after stop edits; should share distance_cache.
+        self.prefetcher = prefetcher
+        self.weather_cache = weather_cache if weather_cache is not None else InMemoryCacheStore(TRIP_WEATHER_MAX_ENTRIES)
 
     def create_trip(
         self,
@@ -51,14 +133,14 @@ class TripService:
             chatSessionId=chat_session_id,
             createdBy=created_by,
         )
-        for day in trip.days:
-            for index, stop in enumerate(day.stops):
-                day.stops[index] = self._geocode_stop_if_needed(stop)
+        # One concurrent batch for every stop of every day.
+        self._geocode_stops([stop for day in trip.days for stop in day.stops])
         created = self.repository.create(trip)
         # The repository strips the claim token from the stored document;
         # restore it on the returned object so the create response can hand
         # it to the caller exactly once.
         created.claimToken = trip.claimToken
+        self._prefetch(created, *created.days)
         return created
 
     def get_trip(self, trip_id: str, uid: Optional[str] = None, claim_token: Optional[str] = None, write: bool = False) -> Trip:
@@ -80,6 +162,7 @@ class TripService:
             trip.days = [Day.from_dict(day) for day in patch["days"] or []]
             if not trip.days:
                 trip.days = [Day(id=new_day_id(), label="Day 1")]
+            self._prefetch(trip, *trip.days)
         return self.repository.update(trip)
 
     def delete_trip(self, trip_id: str, uid: Optional[str] = None, claim_token: Optional[str] = None) -> None:
@@ -130,6 +213,7 @@ class TripService:
         day.stops.append(stop)
         day.route = None
         self.repository.update(trip)
+        self._prefetch(trip, day)
         return stop
 
     def update_stop(
@@ -149,6 +233,8 @@ class TripService:
                 setattr(stop, field_name, patch[field_name])
         day.normalize_route()
         self.repository.update(trip)
+        if "lat" in patch or "lng" in patch:
+            self._prefetch(trip, day)
         return stop
 
     def remove_stop(
@@ -179,10 +265,50 @@ class TripService:
         if set(ordered_stop_ids) != set(by_id):
             raise ValidationError("ordered_stop_ids must include each stop exactly once")
         day.stops = [by_id[stop_id] for stop_id in ordered_stop_ids]
-        day.route = Route(order=ordered_stop_ids, optimizedAt=now_iso())
+        total_distance = self._order_distance(day.stops)
+        previous = day.route
+        day.route = Route(
+            order=ordered_stop_ids,
+            totalDistanceMiles=round(total_distance, 1) if total_distance is not None else None,
+            optimizedDistanceMiles=previous.optimizedDistanceMiles if previous else None,
+            optimizedAt=now_iso(),
+        )
         self.repository.update(trip)
         return day
 
+    def preview_route(
+        self,
+        trip_id: str,
+        day_id: str,
+        orders: List[List[str]],
+        uid: Optional[str] = None,
+        claim_token: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Cost candidate stop orders against the distance cache without saving
+        anything. Legs missing from the cache are fetched individually, so
+        after an optimize every preview for the day is served from memory.
+        """
+        trip = self.get_trip(trip_id, uid=uid, claim_token=claim_token, write=False)
+        day = self._require_day(trip, day_id)
+        by_id = {stop.id: stop for stop in day.stops}
+        baseline = day.route.optimizedDistanceMiles if day.route else None
+        previews = []
+        for ordered_stop_ids in orders:
+            if set(ordered_stop_ids) != set(by_id) or len(ordered_stop_ids) != len(by_id):
+                raise ValidationError("Each order must include each stop exactly once")
+            total_distance = self._order_distance([by_id[stop_id] for stop_id in ordered_stop_ids])
+            total_distance = round(total_distance, 1) if total_distance is not None else None
+            previews.append({
+                "orderedStopIds": ordered_stop_ids,
+                "totalDistanceMiles": total_distance,
+                "deltaMiles": (
+                    round(total_distance - baseline, 1)
+                    if total_distance is not None and baseline is not None else None
+                ),
+            })
+        return {"optimizedDistanceMiles": baseline, "previews": previews}
+
     def move_stop(
         self,
         trip_id: str,
@@ -209,7 +335,9 @@ class TripService:
         insert_at = len(target_day.stops) if position is None else max(0, min(position, len(target_day.stops)))
         target_day.stops.insert(insert_at, stop)
         target_day.route = None
-        return self.repository.update(trip)
+        updated = self.repository.update(trip)
+        self._prefetch(trip, target_day)
+        return updated
 
     def optimize_day(
         self,
@@ -219,7 +347,21 @@ class TripService:
         end_stop_id: Optional[str] = None,
         uid: Optional[str] = None,
         claim_token: Optional[str] = None,
+        gap_threshold: Optional[float] = None,
+        precheck_threshold: Optional[float] = None,
+        force: bool = False,
+        mode: Optional[str] = None,
+        day_start: Optional[str] = None,
+        dwell_minutes: Optional[float] = None,
+        progress: Optional[Callable[[Dict[str, Any]], None]] = None,
     ) -> Day:
+        """
+        Optimize a day's visiting order. mode "distance" minimizes driving
+        miles; mode "time_windows" honors pinned stop arrival/departure times
+        and stores a computed schedule. By default time windows are used
+        whenever any stop on the day has a pinned time. progress, when given,
+        receives matrix batch counts and the best cost found so far.
+        """
         trip = self.get_trip(trip_id, uid=uid, claim_token=claim_token, write=True)
         day = self._require_day(trip, day_id)
         if len(day.stops) < 2:
@@ -227,21 +369,311 @@ class TripService:
         stop_ids = [stop.id for stop in day.stops]
         start_index = stop_ids.index(start_stop_id) if start_stop_id in stop_ids else 0
         end_index = stop_ids.index(end_stop_id) if end_stop_id in stop_ids else None
+        if end_index == start_index:
+            end_index = None
         stop_dicts = [stop.to_dict() for stop in day.stops]
-        optimized = tsp(stop_dicts, start_index=start_index, end_index=end_index, gmaps_client=self.gmaps)
+
+        if mode is None:
+            pinned = any(stop.arrivalTime or stop.departureTime for stop in day.stops)
+            mode = "time_windows" if pinned else "distance"
+        if mode == "time_windows":
+            self._schedule_day(day, start_index, end_index, day_start, dwell_minutes, progress)
+            return self._save_route(trip_id, day, progress)
+        if mode != "distance":
+            raise ValidationError("mode must be 'distance' or 'time_windows'")
+
+        precheck = None
+        if not force:
+            threshold = self.precheck_threshold if precheck_threshold is None else precheck_threshold
+            checked = self._precheck_current_order(day, start_index, end_index, threshold)
+            if checked:
+                precheck, current_ids = checked
+                if precheck["skippedMatrix"]:
+                    self._keep_current_order(day, current_ids, end_index is None, precheck)
+                    return self._save_route(trip_id, day, progress)
+
+        distance_fn = make_cached_distance_fn(
+            stop_dicts,
+            gmaps_client=self.gmaps,
+            cache=self.distance_cache,
+            on_progress=_matrix_progress(progress),
+        )
+        if progress is not None:
+            progress({"phase": "solving"})
+        result = solve(
+            stop_dicts,
+            start_index=start_index,
+            end_index=end_index,
+            distance_fn=distance_fn,
+            gap_threshold=DEFAULT_GAP_THRESHOLD if gap_threshold is None else gap_threshold,
+            pool=self.solver_pool,
+            on_improve=_solve_progress(progress),
+        )
+        optimized = result.route
         order = [stop["id"] for stop in optimized]
         if len(order) > 1 and order[0] == order[-1]:
             order = order[:-1]
-        total_distance = route_total_distance(optimized, gmaps_client=self.gmaps)
+        total_distance = route_total_distance(optimized, distance_fn=distance_fn)
+        by_id = {stop.id: stop for stop in day.stops}
+        path_distance = self._order_distance([by_id[stop_id] for stop_id in order])
         day.route = Route(
             order=order,
             startStopId=order[0] if order else None,
             endStopId=order[-1] if order else None,
             totalDistanceMiles=round(total_distance, 1),
+            optimizedDistanceMiles=round(path_distance, 1) if path_distance is not None else None,
             optimizedAt=now_iso(),
+            solver={**result.stats(), **({"precheck": precheck} if precheck else {})},
         )
+        return self._save_route(trip_id, day, progress)
+
+    def _save_route(self, trip_id: str, day: Day, progress: Optional[Callable[[Dict[str, Any]], None]]) -> Day:
+        """
+        Store an optimized day.route on the trip as it is now, not as it was
+        when the solve started, so edits made meanwhile survive. Fails with a
+        ConflictError if the day's stops changed under the solve.
+        """
+        if progress is not None:
+            # A cancelled job stops here instead of writing its route.
+            progress({"phase": "saving"})
+        trip = self._require_trip(trip_id)
+        current = next((candidate for candidate in trip.days if candidate.id == day.id), None)
+        if current is None or _stop_positions(current) != _stop_positions(day):
+            raise ConflictError("The day's stops changed while it was being optimized; optimize it again")
+        current.route = day.route
         self.repository.update(trip)
-        return day
+        return current
+
+    def select_stops(
+        self,
+        trip_id: str,
+        day_id: str,
+        candidates: List[Dict[str, Any]],
+        budget_minutes: Optional[float] = None,
+        budget_miles: Optional[float] = None,
+        start_stop_id: Optional[str] = None,
+        end_stop_id: Optional[str] = None,
+        dwell_minutes: Optional[float] = None,
+        uid: Optional[str] = None,
+        claim_token: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Pick the candidate places that fit a day and route them in one call.
+        Candidates are scored by "score", else "rating", else 1 (a rating of
+        0 scores 0). The budget is either driving plus dwell minutes or
+        driving miles; stops already on the day are always kept. Selected
+        places are added as stops in visiting order and the chosen order is
+        stored as the day's route.
+        """
+        if (budget_minutes is None) == (budget_miles is None):
+            raise ValidationError("Provide exactly one of budgetMinutes or budgetMiles")
+        budget_minutes = _non_negative(budget_minutes, "budgetMinutes")
+        budget_miles = _non_negative(budget_miles, "budgetMiles")
+        dwell_minutes = _non_negative(dwell_minutes, "dwellMinutes")
+        trip = self.get_trip(trip_id, uid=uid, claim_token=claim_token, write=True)
+        day = self._require_day(trip, day_id)
+        if not day.stops:
+            raise ValidationError("Add a starting stop to the day before selecting places")
+        if any(stop.lat is None or stop.lng is None for stop in day.stops):
+            raise ValidationError("Every stop on the day needs coordinates to select places")
+
+        new_stops, scores, unplaced = [], [], []
+        geocoded = self._geocode_stops([Stop.from_dict(data) for data in candidates])
+        for stop, data in zip(geocoded, candidates):
+            if stop.lat is None or stop.lng is None:
+                unplaced.append(stop.name)
+                continue
+            new_stops.append(stop)
+            score = data.get("score")
+            if score is None:
+                score = data.get("rating")
+            try:
+                scores.append(1.0 if score is None else float(score))
+            except (TypeError, ValueError):
+                raise ValidationError(f"Score or rating for {stop.name} must be a number")
+
+        stops = day.stops + new_stops
+        existing = len(day.stops)
+        stop_dicts = [stop.to_dict() for stop in stops]
+        stop_ids = [stop.id for stop in stops]
+        start_index = stop_ids.index(start_stop_id) if start_stop_id in stop_ids[:existing] else 0
+        end_index = stop_ids.index(end_stop_id) if end_stop_id in stop_ids[:existing] else None
+        if end_index == start_index:
+            end_index = None
+
+        if budget_minutes is not None:
+            matrix = build_duration_matrix(stop_dicts, gmaps_client=self.gmaps, cache=self.distance_cache)
+            dwell = DEFAULT_DWELL_MINUTES if dwell_minutes is None else dwell_minutes
+            service, budget, unit = [dwell] * len(stops), budget_minutes, "minutes"
+        else:
+            matrix = build_distance_matrix(stop_dicts, gmaps_client=self.gmaps, cache=self.distance_cache)
+            service, budget, unit = None, budget_miles, "miles"
+        result = self._run_solver(
+            solve_orienteering,
+            matrix,
+            [0.0] * existing + scores,
+            budget,
+            start_index=start_index,
+            end_index=end_index,
+            service=service,
+            required=list(range(existing)),
+        )
+
+        order_indices = result.order[:-1] if end_index is None else result.order
+        selected = [stops[index] for index in order_indices if index >= existing]
+        selected_ids = {stop.id for stop in selected}
+        day.stops.extend(selected)
+        order = [stop_ids[index] for index in order_indices]
+        by_id = {stop.id: stop for stop in day.stops}
+        ordered = [by_id[stop_id] for stop_id in order]
+        path_distance = self._order_distance(ordered)
+        total_distance = self._order_distance(ordered + [ordered[0]]) if end_index is None else path_distance
+        day.route = Route(
+            order=order,
+            startStopId=order[0],
+            endStopId=order[-1],
+            totalDistanceMiles=round(total_distance, 1) if total_distance is not None else None,
+            optimizedDistanceMiles=round(path_distance, 1) if path_distance is not None else None,
+            optimizedAt=now_iso(),
+            solver={**result.stats(budget), "budgetUnit": unit},
+        )
+        self.repository.update(trip)
+        return {
+            "day": day,
+            "selected": [stop.name for stop in selected],
+            "skipped": [stop.name for stop in new_stops if stop.id not in selected_ids] + unplaced,
+            "score": result.score,
+            "cost": round(result.cost, 1),
+            "budgetUnit": unit,
+        }
+
+    def _schedule_day(
+        self,
+        day: Day,
+        start_index: int,
+        end_index: Optional[int],
+        day_start: Optional[str],
+        dwell_minutes: Optional[float],
+        progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ) -> None:
+        """Solve the day as a TSP with time windows on driving durations and
+        store the order plus computed arrival/departure times."""
+        _non_negative(dwell_minutes, "dwellMinutes")
+        if day_start and parse_clock(day_start) is None:
+            raise ValidationError("dayStart must be a time such as '09:00'")
+        if any(stop.lat is None or stop.lng is None for stop in day.stops):
+            raise ValidationError("Every stop needs coordinates to build a schedule")
+        stop_dicts = [stop.to_dict() for stop in day.stops]
+        durations = build_duration_matrix(
+            stop_dicts,
+            gmaps_client=self.gmaps,
+            cache=self.distance_cache,
+            on_progress=_matrix_progress(progress),
+        )
+        if progress is not None:
+            progress({"phase": "solving"})
+        ready, due, dwell = time_windows(stop_dicts, DEFAULT_DWELL_MINUTES if dwell_minutes is None else dwell_minutes)
+        start = day.stops[start_index]
+        depart_at = next(
+            minutes
+            for minutes in map(parse_clock, (start.departureTime, start.arrivalTime, day_start, DEFAULT_DAY_START))
+            if minutes is not None
+        )
+        result = self._run_solver(solve_time_windows, durations, ready, due, dwell, start_index, end_index, depart_at=depart_at)
+
+        visits = result.visits[:-1] if end_index is None else result.visits
+        schedule = []
+        for visit in visits:
+            stop = day.stops[visit["index"]]
+            schedule.append({
+                "stopId": stop.id,
+                "arrivalTime": format_clock(visit["start"]) if visit["start"] is not None else None,
+                "departureTime": format_clock(visit["departure"]) if visit["departure"] is not None else None,
+                "waitMinutes": round(visit["wait"], 1),
+                "lateMinutes": round(visit["late"], 1),
+            })
+        order = [entry["stopId"] for entry in schedule]
+        distance_fn = make_cached_distance_fn(stop_dicts, gmaps_client=self.gmaps, cache=self.distance_cache)
+        total_distance = route_total_distance([stop_dicts[i] for i in result.order], distance_fn=distance_fn)
+        by_id = {stop.id: stop for stop in day.stops}
+        path_distance = self._order_distance([by_id[stop_id] for stop_id in order])
+        stats = result.stats()
+        if end_index is None:
+            stats["returnTime"] = format_clock(result.visits[-1]["arrival"])
+        day.route = Route(
+            order=order,
+            startStopId=order[0],
+            endStopId=order[-1],
+            totalDistanceMiles=round(total_distance, 1) if total_distance != float("inf") else None,
+            optimizedDistanceMiles=round(path_distance, 1) if path_distance is not None else None,
+            optimizedAt=now_iso(),
+            solver=stats,
+            schedule=schedule,
+        )
+
+    def _precheck_current_order(
+        self, day: Day, start_index: int, end_index: Optional[int], threshold: float
+    ) -> Optional[Tuple[Dict[str, Any], List[str]]]:
+        """
+        Decide on straight-line distances whether the day's current order is
+        already close enough to optimal that the driving matrix can be skipped.
+        Returns None when the check does not apply: more than
+        PRECHECK_MAX_STOPS stops, missing coordinates, an order that violates
+        the requested endpoints, or a matrix that is already fully cached
+        (the real solve is then free anyway). Otherwise
+        returns the report and the current order rotated onto the start.
+        """
+        if len(day.stops) > PRECHECK_MAX_STOPS or any(stop.lat is None or stop.lng is None for stop in day.stops):
+            return None
+        stop_ids = [stop.id for stop in day.stops]
+        current_ids = day.route.order if day.route and len(day.route.order) == len(stop_ids) else stop_ids
+        start_id = stop_ids[start_index]
+        if end_index is None:
+            # Cycles cost the same from any rotation; rotate onto the start.
+            position = current_ids.index(start_id)
+            current_ids = current_ids[position:] + current_ids[:position]
+        elif current_ids[0] != start_id or current_ids[-1] != stop_ids[end_index]:
+            return None
+
+        stop_dicts = [stop.to_dict() for stop in day.stops]
+        if all(
+            self.distance_cache.get(origin, destination) is not None
+            for origin in stop_dicts for destination in stop_dicts
+        ):
+            return None
+
+        position_by_id = {stop_id: index for index, stop_id in enumerate(stop_ids)}
+        improvement = predicted_improvement(
+            stop_dicts,
+            [position_by_id[stop_id] for stop_id in current_ids],
+            start_index=start_index,
+            end_index=end_index,
+        )
+        skipped = improvement <= threshold
+        report = {
+            "skippedMatrix": skipped,
+            "predictedImprovement": round(improvement, 4),
+            "threshold": threshold,
+            "matrixElementsSaved": len(stop_ids) ** 2 if skipped else 0,
+        }
+        return report, current_ids
+
+    def _keep_current_order(self, day: Day, order: List[str], round_trip: bool, precheck: Dict[str, Any]) -> None:
+        """Store the current order as the optimized route ("already optimal"),
+        costing only its legs instead of a full matrix."""
+        by_id = {stop.id: stop for stop in day.stops}
+        ordered = [by_id[stop_id] for stop_id in order]
+        path_distance = self._order_distance(ordered)
+        total_distance = self._order_distance(ordered + [ordered[0]]) if round_trip else path_distance
+        day.route = Route(
+            order=order,
+            startStopId=order[0],
+            endStopId=order[-1],
+            totalDistanceMiles=round(total_distance, 1) if total_distance is not None else None,
+            optimizedDistanceMiles=round(path_distance, 1) if path_distance is not None else None,
+            optimizedAt=now_iso(),
+            solver={"strategy": "already_optimal", "precheck": precheck},
+        )
 
     def export_google_maps(
         self,
@@ -255,6 +687,35 @@ class TripService:
             self._require_day(trip, day_id)
         return export_google_maps(trip, day_id=day_id)
 
+    def trip_weather(self, trip_id: str, uid: Optional[str] = None, claim_token: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Forecasts for the regions each dated day visits, on those dates (see
+        weather.get_weather_for_visits). The result is cached by the trip's
+        updatedAt, so every viewer of an unchanged shared trip gets the same
+        answer without refetching, and an edit invalidates it. Entries expire
+        at the top of the hour, which is also when each region's local date
+        rolls over.
+        """
+        trip = self.get_trip(trip_id, uid=uid, claim_token=claim_token, write=False)
+        key = f"trip-weather:{trip.id}:{trip.updatedAt}"
+        cached = self.weather_cache.get(key)
+        if cached is not None:
+            return cached
+        visits = [
+            {"name": stop.name, "lat": stop.lat, "lng": stop.lng, "dayId": day.id, "date": day.date}
+            for day in trip.days
+            for stop in day.stops
+            if stop.lat is not None and stop.lng is not None
+        ]
+        result = {
+            "tripId": trip.id,
+            "version": str(trip.updatedAt) if trip.updatedAt is not None else None,
+            **weather.get_weather_for_visits(visits, geocoder=self.geocoder),
+        }
+        if not any(region.get("error") for region in result["regions"]):
+            self.weather_cache.set(key, result, TRIP_WEATHER_REFRESH_SECONDS - time.time() % TRIP_WEATHER_REFRESH_SECONDS)
+        return result
+
     def authorize(self, trip: Trip, uid: Optional[str], claim_token: Optional[str], write: bool) -> None:
         if uid and trip.ownerId == uid:
             return
@@ -284,17 +745,60 @@ class TripService:
                 return stop
         raise NotFoundError("Stop not found")
 
+    def _prefetch(self, trip: Trip, *days: Day) -> None:
+        if self.prefetcher is None:
+            return
+        for day in days:
+            self.prefetcher.schedule(trip.id, day.id, [stop.to_dict() for stop in day.stops])
+
+    def _run_solver(self, fn, matrix: List[List[float]], *args, **kwargs):
+        """Run a matrix solver on the pool when one is configured."""
+        if self.solver_pool is None:
+            return fn(matrix, *args, **kwargs)
+        return self.solver_pool.run(fn, matrix, *args, size=len(matrix), **kwargs)
+
+    def _order_distance(self, stops: List[Stop]) -> Optional[float]:
+        """Driving miles along stops in the given order, or None when a leg
+        has no coordinates or could not be resolved."""
+        if any(stop.lat is None or stop.lng is None for stop in stops):
+            return None
+        total_distance = route_total_distance(
+            [stop.to_dict() for stop in stops],
+            gmaps_client=self.gmaps,
+            cache=self.distance_cache,
+        )
+        return total_distance if total_distance != float("inf") else None
+
     def _geocode_stop_if_needed(self, stop: Stop) -> Stop:
-        if (stop.lat is not None and stop.lng is not None) or not self.gmaps:
-            return stop
-        query = stop.address or stop.name
-        if not query:
-            return stop
-        result = self.gmaps.geocode(query)
-        if result:
-            location = result[0].get("geometry", {}).get("location", {})
-            stop.lat = location.get("lat")
-            stop.lng = location.get("lng")
-            stop.address = stop.address or result[0].get("formatted_address")
-            stop.placeId = stop.placeId or result[0].get("place_id")
-        return stop
+        return self._geocode_stops([stop])[0]
+
+    def _geocode_stops(self, stops: List[Stop]) -> List[Stop]:
+        """Fill in coordinates for stops that lack them, in place. Lookups
+        run as one deduplicated concurrent batch; the first failure is
+        raised once the batch is done."""
+        if not self.geocoder:
+            return stops
+        pending = []
+        for stop in stops:
+            if stop.lat is not None and stop.lng is not None:
+                continue
+            known = self.geocoder.place_location(stop.placeId)
+            if known:
+                stop.lat, stop.lng = known["lat"], known["lng"]
+                stop.address = stop.address or known.get("address")
+            elif stop.address or stop.name:
+                pending.append(stop)
+        if not pending:
+            return stops
+        outcomes = self.geocoder.geocode_many([stop.address or stop.name for stop in pending])
+        for stop, outcome in zip(pending, outcomes):
+            if outcome.error is not None:
+                raise outcome.error
+            if outcome.results:
+                result = outcome.results[0]
+                location = result.get("geometry", {}).get("location", {})
+                stop.lat = location.get("lat")
+                stop.lng = location.get("lng")
+                stop.address = stop.address or result.get("formatted_address")
+                stop.placeId = stop.placeId or result.get("place_id")
+        return stops
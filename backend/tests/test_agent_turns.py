@@ -0,0 +1,182 @@
+import os
+import sys
+import threading
+import time
+import types
+import unittest
+from unittest import mock
+
+os.environ.setdefault("NEXT_PUBLIC_GOOGLE_MAPS_API_KEY", "test-key")
+sys.modules.setdefault(
+    "googlemaps",
+    types.SimpleNamespace(Client=lambda key, **options: None),
+)
+
+import agent
+from geo import decode_polyline, sample_path
+
+
+def function_call(name, **args):
+    return types.SimpleNamespace(function_call=types.SimpleNamespace(name=name, args=args), text="")
+
+
+def turn(*parts):
+    return types.SimpleNamespace(candidates=[types.SimpleNamespace(content=types.SimpleNamespace(parts=list(parts)))])
+
+
+class ScriptedChat:
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.sent = []
+
+    def send_message(self, message, stream=False):
+        self.sent.append(message)
+        return self.responses.pop(0)
+
+
+class SlowPlacesClient:
+    def __init__(self):
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def places(self, query, **kwargs):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(0.2)
+        with self.lock:
+            self.active -= 1
+        return {"results": [{"name": f"{query} place", "place_id": query}]}
+
+
+class RecordingExecutor:
+    def __init__(self, calls):
+        self.calls = calls
+
+    def add_stops(self, stops, day_id=None):
+        self.calls.append(("add_stops", [stop["name"] for stop in stops]))
+        return "added"
+
+    def optimize_day(self, day_id=None):
+        self.calls.append(("optimize_day", day_id))
+        return "optimized"
+
+
+class AgentTurnTest(unittest.TestCase):
+    def run_turn(self, chat, client, executor=None):
+        with mock.patch.object(agent, "GenerativeModel") as model, \
+                mock.patch.object(agent, "TripToolExecutor", return_value=executor):
+            model.return_value.start_chat.return_value = chat
+            return list(agent.get_chat_response(
+                [{"role": "user", "content": "plan it"}],
+                client,
+                trip_service=object() if executor else None,
+                trip_id="trip_1" if executor else None,
+            ))
+
+    def test_searches_in_one_turn_run_concurrently_in_declared_order(self):
+        client = SlowPlacesClient()
+        chat = ScriptedChat(
+            turn(*(function_call("search_places", query=query) for query in ("coffee", "tacos", "museum"))),
+            turn(types.SimpleNamespace(function_call=None, text="Done.")),
+        )
+
+        events = self.run_turn(chat, client)
+
+        self.assertEqual(client.peak, 3)
+        self.assertEqual([event["places"][0]["name"] for event in events[:3]], ["coffee place", "tacos place", "museum place"])
+        self.assertEqual([part.function_response.name for part in chat.sent[1]], ["search_places"] * 3)
+        self.assertEqual(events[-1], {"type": "text", "delta": "Done."})
+
+    def test_mutating_tools_run_in_order_between_read_only_results(self):
+        calls = []
+        chat = ScriptedChat(
+            turn(
+                function_call("search_places", query="coffee"),
+                function_call("add_stops", stops=[{"name": "Blue Bottle"}]),
+                function_call("optimize_day"),
+                function_call("search_places", query="dinner"),
+            ),
+            turn(types.SimpleNamespace(function_call=None, text="Added and optimized.")),
+        )
+
+        events = self.run_turn(chat, SlowPlacesClient(), RecordingExecutor(calls))
+
+        self.assertEqual(calls, [("add_stops", ["Blue Bottle"]), ("optimize_day", None)])
+        self.assertEqual([event["type"] for event in events], ["places", "trip_updated", "trip_updated", "places", "text"])
+        self.assertEqual(
+            [part.function_response.name for part in chat.sent[1]],
+            ["search_places", "add_stops", "optimize_day", "search_places"],
+        )
+
+
+class SlowRoadTripClient:
+    """Boston to Albany along one straight polyline, 100 ms per request."""
+
+    def __init__(self):
+        self.requests = []
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def record(self, kind, value):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(0.1)
+        with self.lock:
+            self.active -= 1
+            self.requests.append((kind, value))
+
+    def directions(self, origin, destination, mode="driving"):
+        return [{
+            # (42.36, -71.06) -> (42.65, -73.76)
+            "overview_polyline": {"points": "_mpaG~{upLosw@~inO"},
+            "legs": [{
+                "distance": {"value": 1_000_000},
+                "duration": {"value": 36_000},
+                "start_address": "Boston, MA, USA",
+                "end_address": "Albany, NY, USA",
+                "start_location": {"lat": 42.36, "lng": -71.06},
+                "end_location": {"lat": 42.65, "lng": -73.76},
+                "steps": [],
+            }],
+        }]
+
+    def reverse_geocode(self, latlng):
+        self.record("reverse_geocode", latlng)
+        return [{"address_components": [{"long_name": f"Town {latlng[1]:.2f}", "types": ["locality"]}]}]
+
+    def places(self, query, **kwargs):
+        self.record("places", query)
+        return {"results": [{"name": f"{query} #{kwargs['location']}", "place_id": f"{query}@{kwargs['location']}"}]}
+
+
+class PlanTripTest(unittest.TestCase):
+    def test_waypoints_are_sampled_along_the_polyline_and_searched_concurrently(self):
+        client = SlowRoadTripClient()
+
+        plan = agent.plan_trip("Boston", "Albany", gmaps_client=client)
+
+        # 4 names and 18 searches in two rounds, not 22 requests in a row.
+        self.assertEqual(len(client.requests), 22)
+        self.assertEqual(client.peak, 8)
+        waypoints = plan["waypoints"]
+        self.assertEqual([waypoint["type"] for waypoint in waypoints], ["origin"] + ["waypoint"] * 4 + ["destination"])
+        self.assertEqual(
+            [waypoint["city"] for waypoint in waypoints],
+            ["Boston", "Town -71.60", "Town -72.14", "Town -72.68", "Town -73.22", "Albany"],
+        )
+        self.assertEqual(len(plan["places_found"]), 18)
+        self.assertEqual(plan["places_found"][0]["stop_type"], "attractions")
+        self.assertIn("tourist attractions in Town -71.60", [query for kind, query in client.requests])
+
+    def test_polyline_decoding_and_sampling(self):
+        self.assertEqual(decode_polyline("_p~iF~ps|U_ulLnnqC_mqNvxq`@"), [(38.5, -120.2), (40.7, -120.95), (43.252, -126.453)])
+        self.assertEqual(sample_path([(0, 0), (0, 1), (0, 3)], 2), [(0.0, 1.0), (0.0, 2.0)])
+        self.assertEqual(sample_path([(0, 0)], 3), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
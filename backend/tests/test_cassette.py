@@ -0,0 +1,97 @@
+import os
+import sys
+import tempfile
+import types
+import unittest
+
+os.environ.setdefault("NEXT_PUBLIC_GOOGLE_MAPS_API_KEY", "test-key")
+sys.modules.setdefault(
+    "googlemaps",
+    types.SimpleNamespace(Client=lambda key, **options: None),
+)
+
+from agent import get_chat_response
+from services.cassette import RECORD, REPLAY, Cassette, CassetteMissError, RecordedError
+
+
+class FakeMapsClient:
+    def __init__(self):
+        self.calls = 0
+
+    def geocode(self, query):
+        self.calls += 1
+        if query == "nowhere":
+            raise RuntimeError("ZERO_RESULTS")
+        return [{"geometry": {"location": {"lat": 42.36, "lng": -71.06}}, "formatted_address": query}]
+
+
+class FakeResponse:
+    status_code = 200
+    url = "https://weather.example/v1?key=secret&days=3"
+    text = '{"forecastDays": []}'
+
+    def json(self):
+        return {"forecastDays": []}
+
+
+class FakeSession:
+    def get(self, url, **kwargs):
+        return FakeResponse()
+
+
+class CassetteTest(unittest.TestCase):
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), "session.json.gz")
+
+    def test_maps_calls_replay_without_the_client(self):
+        recorder = Cassette(self.path, mode=RECORD)
+        maps = recorder.maps(FakeMapsClient())
+        live = maps.geocode("Boston")
+        with self.assertRaises(RuntimeError):
+            maps.geocode("nowhere")
+        recorder.save()
+
+        replay = Cassette(self.path, mode=REPLAY, speed=0).maps()
+        self.assertEqual(replay.geocode("Boston"), live)
+        with self.assertRaises(RecordedError):
+            replay.geocode("nowhere")
+        with self.assertRaises(CassetteMissError):
+            replay.geocode("Boston")
+
+    def test_http_responses_replay_without_api_keys(self):
+        recorder = Cassette(self.path, mode=RECORD)
+        recorder.http(FakeSession()).get("https://weather.example/v1?key=secret&days=3")
+        recorder.save()
+
+        response = Cassette(self.path, mode=REPLAY, speed=0).http().get("https://weather.example/v1?key=other&days=3")
+
+        self.assertEqual(response.json(), {"forecastDays": []})
+        response.raise_for_status()
+        with open(self.path, "rb") as handle:
+            self.assertNotIn(b"secret", handle.read())
+
+    def test_chat_turn_replays_vertex_and_tool_calls_offline(self):
+        places = {"results": [{"name": "Blue Bottle", "formatted_address": "1 Main St", "place_id": "p1"}]}
+        recorder = Cassette(self.path, mode=RECORD)
+        recorder.maps(types.SimpleNamespace(places=lambda **kwargs: places)).places(query="coffee")
+        # Vertex turns as they would have been recorded around the tool call.
+        recorder.interactions.insert(0, {"kind": "vertex.send_message", "key": None, "latency": 0.2, "response": {
+            "candidates": [{"content": {"role": "model", "parts": [
+                {"function_call": {"name": "search_places", "args": {"query": "coffee"}}},
+            ]}}],
+        }})
+        recorder.interactions.append({"kind": "vertex.send_message", "key": None, "latency": 0.2, "response": {
+            "candidates": [{"content": {"role": "model", "parts": [{"text": "Try Blue Bottle."}]}}],
+        }})
+        recorder.save()
+        cassette = Cassette(self.path, mode=REPLAY, speed=0)
+
+        events = list(get_chat_response([{"role": "user", "content": "coffee"}], cassette.maps(), cassette=cassette))
+
+        self.assertEqual(events[0]["type"], "places")
+        self.assertEqual(events[0]["places"][0]["name"], "Blue Bottle")
+        self.assertEqual(events[-1], {"type": "text", "delta": "Try Blue Bottle."})
+
+
+if __name__ == "__main__":
+    unittest.main()
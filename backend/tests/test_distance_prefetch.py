@@ -0,0 +1,104 @@
+import math
+import os
+import sys
+import time
+import types
+import unittest
+
+os.environ.setdefault("NEXT_PUBLIC_GOOGLE_MAPS_API_KEY", "test-key")
+sys.modules.setdefault(
+    "googlemaps",
+    types.SimpleNamespace(Client=lambda key, **options: None),
+)
+sys.modules.setdefault(
+    "firebase_admin",
+    types.SimpleNamespace(
+        firestore=types.SimpleNamespace(
+            SERVER_TIMESTAMP="SERVER_TIMESTAMP",
+            Query=types.SimpleNamespace(DESCENDING="DESCENDING"),
+        )
+    ),
+)
+
+from services.distance_cache import DistanceCache
+from services.distance_prefetcher import DistancePrefetcher
+from services.trip_repository import InMemoryTripRepository
+from services.trip_service import TripService
+
+
+class CountingMapsClient:
+    """Distance Matrix stub (straight-line meters) that counts elements."""
+
+    def __init__(self):
+        self.calls = 0
+        self.elements = 0
+
+    def distance_matrix(self, origins, destinations, mode="driving"):
+        self.calls += 1
+        self.elements += len(origins) * len(destinations)
+
+        def parse(coord):
+            lat, lng = coord.split(",")
+            return float(lat), float(lng)
+
+        return {"rows": [
+            {"elements": [
+                {"status": "OK", "distance": {"value": math.dist(parse(o), parse(d)) * 111_000}}
+                for d in destinations
+            ]}
+            for o in origins
+        ]}
+
+
+def make_service(delay_seconds=60.0):
+    client = CountingMapsClient()
+    cache = DistanceCache()
+    prefetcher = DistancePrefetcher(client, cache, delay_seconds=delay_seconds)
+    service = TripService(InMemoryTripRepository(), gmaps_client=client, distance_cache=cache, prefetcher=prefetcher)
+    return service, client, prefetcher
+
+
+def stop(i):
+    # Scrambled along a line so the precheck never short-circuits optimize.
+    return {"name": f"S{i}", "lat": 40.0 + 0.01 * ((i * 5) % 8), "lng": -74.0}
+
+
+class DistancePrefetchTest(unittest.TestCase):
+    def test_optimize_after_prefetch_makes_no_matrix_calls(self):
+        service, client, prefetcher = make_service()
+        trip = service.create_trip(owner_id="user_123", title="Warm", days=[{"stops": [stop(i) for i in range(6)]}])
+        day = trip.days[0]
+        service.add_stop(trip.id, day.id, stop(6), uid="user_123")
+        service.add_stop(trip.id, day.id, stop(7), uid="user_123")
+        self.assertEqual(client.calls, 0)
+
+        prefetcher.flush()
+        calls_after_prefetch = client.calls
+        service.optimize_day(trip.id, day.id, uid="user_123")
+
+        self.assertGreater(calls_after_prefetch, 0)
+        self.assertEqual(client.calls, calls_after_prefetch)
+
+    def test_edits_are_coalesced_and_only_missing_pairs_fetched(self):
+        service, client, prefetcher = make_service()
+        trip = service.create_trip(owner_id="user_123", title="Warm", days=[{"stops": [stop(i) for i in range(6)]}])
+        prefetcher.flush()
+        client.calls = client.elements = 0
+
+        service.add_stop(trip.id, trip.days[0].id, stop(6), uid="user_123")
+        prefetcher.flush()
+
+        self.assertEqual(client.calls, 1)
+        self.assertEqual(client.elements, 6)
+
+    def test_fetch_runs_after_the_debounce_delay(self):
+        service, client, _ = make_service(delay_seconds=0.05)
+        service.create_trip(owner_id="user_123", title="Warm", days=[{"stops": [stop(i) for i in range(4)]}])
+        deadline = time.monotonic() + 2
+        while client.calls == 0 and time.monotonic() < deadline:
+            time.sleep(0.02)
+        self.assertGreater(client.calls, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,205 @@
+import os
+import sys
+import threading
+import time
+import types
+import unittest
+from datetime import datetime, timedelta, timezone
+
+os.environ.setdefault("NEXT_PUBLIC_GOOGLE_MAPS_API_KEY", "test-key")
+sys.modules.setdefault(
+    "googlemaps",
+    types.SimpleNamespace(Client=lambda key, **options: None),
+)
+sys.modules.setdefault(
+    "firebase_admin",
+    types.SimpleNamespace(
+        firestore=types.SimpleNamespace(
+            SERVER_TIMESTAMP="SERVER_TIMESTAMP",
+            Query=types.SimpleNamespace(DESCENDING="DESCENDING"),
+        )
+    ),
+)
+
+import weather
+from geo import geohash_bounds, geohash_center, geohash_encode
+from services.cache_store import FirestoreCacheStore, InMemoryCacheStore
+from services.geocoder import DEFAULT_GEOCODE_CONCURRENCY, Geocoder, normalize_query
+from services.trip_repository import InMemoryTripRepository
+from services.trip_service import TripService
+
+
+class CountingGeocodeClient:
+    def __init__(self):
+        self.queries = []
+
+    def geocode(self, query):
+        self.queries.append(query)
+        if "nowhere" in query.lower():
+            return []
+        return [{
+            "formatted_address": f"{query}, USA",
+            "geometry": {"location": {"lat": 40.7484, "lng": -73.9857}},
+            "place_id": "place-esb",
+        }]
+
+
+class CountingReverseClient:
+    def __init__(self):
+        self.points = []
+
+    def reverse_geocode(self, latlng):
+        self.points.append(latlng)
+        return [{"address_components": [
+            {"long_name": "Princeton", "types": ["locality", "political"]},
+            {"long_name": "NJ", "short_name": "NJ", "types": ["administrative_area_level_1", "political"]},
+        ]}]
+
+    def directions(self, origin, destination, mode="driving"):
+        return ["passed through"]
+
+
+class SlowGeocodeClient(CountingGeocodeClient):
+    def __init__(self):
+        super().__init__()
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def geocode(self, query):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(0.1)
+        with self.lock:
+            self.active -= 1
+        if query == "broken":
+            raise RuntimeError("INVALID_REQUEST")
+        return super().geocode(query)
+
+
+class FakeDocument:
+    def __init__(self, docs, doc_id):
+        self.docs, self.id = docs, doc_id
+
+    def get(self):
+        data = self.docs.get(self.id)
+        return types.SimpleNamespace(exists=data is not None, to_dict=lambda: data)
+
+    def set(self, data):
+        self.docs[self.id] = dict(data)
+
+    def delete(self):
+        self.docs.pop(self.id, None)
+
+
+class FakeFirestore:
+    def __init__(self):
+        self.docs = {}
+
+    def collection(self, name):
+        return types.SimpleNamespace(id=name, document=lambda doc_id: FakeDocument(self.docs, doc_id))
+
+
+class GeocoderTest(unittest.TestCase):
+    def test_equivalent_queries_share_one_request(self):
+        client = CountingGeocodeClient()
+        geocoder = Geocoder(client)
+
+        first = geocoder.geocode("Empire State Building, NYC")
+        second = geocoder.geocode("  empire state building ,nyc. ")
+
+        self.assertEqual(first, second)
+        self.assertEqual(len(client.queries), 1)
+        self.assertEqual(normalize_query("A  B ,C."), "a b, c")
+
+    def test_misses_are_cached_too(self):
+        client = CountingGeocodeClient()
+        geocoder = Geocoder(client)
+
+        self.assertEqual(geocoder.geocode("Nowhere Land"), [])
+        self.assertEqual(geocoder.geocode("nowhere land"), [])
+        self.assertEqual(len(client.queries), 1)
+
+    def test_landmark_is_geocoded_once_across_trips_and_place_ids_resolve(self):
+        client = CountingGeocodeClient()
+        service = TripService(InMemoryTripRepository(), gmaps_client=client)
+        for owner in ("user_1", "user_2"):
+            service.create_trip(owner_id=owner, title="NYC", days=[{"stops": [{"name": "Empire State Building"}]}])
+
+        trip = service.create_trip(owner_id="user_3", title="NYC", days=[{"stops": [{"name": "ESB", "placeId": "place-esb"}]}])
+
+        self.assertEqual(len(client.queries), 1)
+        self.assertEqual((trip.days[0].stops[0].lat, trip.days[0].stops[0].lng), (40.7484, -73.9857))
+
+    def test_batch_is_concurrent_deduplicated_and_ordered(self):
+        client = SlowGeocodeClient()
+        geocoder = Geocoder(client, max_qps=None)
+        queries = [f"Stop {i}" for i in range(8)] + ["stop 0", "broken", ""]
+
+        outcomes = geocoder.geocode_many(queries)
+
+        self.assertEqual(client.peak, DEFAULT_GEOCODE_CONCURRENCY)
+        self.assertEqual(sorted(client.queries), sorted(f"Stop {i}" for i in range(8)))
+        self.assertEqual([outcome.query for outcome in outcomes], queries)
+        self.assertEqual(outcomes[8].results, outcomes[0].results)
+        self.assertIsInstance(outcomes[9].error, RuntimeError)
+        self.assertEqual(outcomes[10].results, [])
+
+    def test_create_trip_geocodes_all_stops_in_one_round_trip(self):
+        client = SlowGeocodeClient()
+        service = TripService(InMemoryTripRepository(), gmaps_client=client)
+        days = [{"stops": [{"name": f"Day {d} stop {i}"} for i in range(5)]} for d in range(3)]
+
+        trip = service.create_trip(owner_id="user_1", title="Batch", days=days)
+
+        # Request starts are spaced under max_qps, so not all 8 overlap.
+        self.assertGreater(client.peak, 1)
+        self.assertTrue(all(stop.lat is not None for day in trip.days for stop in day.stops))
+
+    def test_reverse_geocodes_are_shared_within_a_cell(self):
+        client = CountingReverseClient()
+        geocoder = Geocoder(client)
+
+        # ~1 km apart, same 5-character cell.
+        names = [weather.reverse_geocode_region(lat, -74.655, geocoder) for lat in (40.351, 40.357, 40.360)]
+        geocoder.reverse_geocode("40.36,-74.66")
+
+        self.assertEqual(names, ["Princeton, NJ"] * 3)
+        self.assertEqual(len(client.points), 1)
+        min_lat, min_lng, max_lat, max_lng = geohash_bounds(geohash_encode(40.351, -74.655, 5))
+        self.assertTrue(min_lat < client.points[0][0] < max_lat and min_lng < client.points[0][1] < max_lng)
+        self.assertEqual(geocoder.directions("A", "B"), ["passed through"])
+        self.assertEqual(geohash_encode(57.64911, 10.40744, 11), "u4pruydqqvj")
+
+    def test_an_empty_cell_center_falls_back_to_the_point(self):
+        client = CountingReverseClient()
+        center = geohash_center(geohash_encode(40.351, -74.655, 5))
+        answer = client.reverse_geocode
+        client.reverse_geocode = lambda latlng: [] if latlng == center else answer(latlng)
+        geocoder = Geocoder(client)
+
+        self.assertEqual(weather.reverse_geocode_region(40.351, -74.655, geocoder), "Princeton, NJ")
+        self.assertEqual(weather.reverse_geocode_region(40.357, -74.655, geocoder), "Princeton, NJ")
+        self.assertEqual(client.points, [(40.351, -74.655)])
+
+    def test_firestore_store_survives_restarts_and_honours_ttl(self):
+        db = FakeFirestore()
+        FirestoreCacheStore(db, "geocode_cache").set("query:boston", [{"place_id": "b"}], ttl_seconds=60)
+
+        restarted = FirestoreCacheStore(db, "geocode_cache")
+        self.assertEqual(restarted.get("query:boston"), [{"place_id": "b"}])
+
+        for data in db.docs.values():
+            data["expiresAt"] = datetime.now(timezone.utc) - timedelta(seconds=1)
+        self.assertIsNone(FirestoreCacheStore(db, "geocode_cache").get("query:boston"))
+
+    def test_in_memory_store_is_bounded(self):
+        store = InMemoryCacheStore(max_entries=2)
+        for key in ("a", "b", "c"):
+            store.set(key, key, ttl_seconds=60)
+        self.assertEqual((store.get("a"), store.get("c"), len(store)), (None, "c", 2))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+import threading
+import types
+import unittest
+from unittest import mock
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from services.http_client import Http2Response, Http2Session, PooledSession, make_http_session
+from services.maps_gateway import is_retryable
+
+
+class CountingHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    connections = set()
+
+    def do_GET(self):
+        CountingHandler.connections.add(self.client_address)
+        body = b'{"status": "OK"}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class HttpClientTest(unittest.TestCase):
+    def test_sequential_requests_reuse_one_connection(self):
+        CountingHandler.connections = set()
+        server = ThreadingHTTPServer(("127.0.0.1", 0), CountingHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.shutdown)
+        session = PooledSession()
+        url = f"http://127.0.0.1:{server.server_port}/maps/api/geocode/json"
+
+        responses = [session.get(url).json() for _ in range(5)]
+
+        self.assertEqual(responses, [{"status": "OK"}] * 5)
+        self.assertEqual(len(CountingHandler.connections), 1)
+
+    def test_requests_get_the_default_timeout_unless_given_one(self):
+        session = PooledSession(connect_timeout=1, read_timeout=2)
+        seen = []
+
+        def send(request, **kwargs):
+            seen.append(kwargs["timeout"])
+            response = requests.Response()
+            response.status_code = 200
+            return response
+
+        session.get_adapter("https://").send = send
+        session.get("https://weather.example/v1")
+        session.get("https://weather.example/v1", timeout=5)
+
+        self.assertEqual(seen, [(1, 2), 5])
+
+    def test_http2_falls_back_without_h2_and_responses_look_like_requests(self):
+        try:
+            import h2  # noqa: F401
+            import httpx  # noqa: F401
+        except ImportError:
+            self.assertIsInstance(make_http_session(http2=True), PooledSession)
+
+        response = Http2Response(types.SimpleNamespace(
+            status_code=503, url="https://weather.example/v1", headers={}, content=b"", text="", json=dict,
+        ))
+        with self.assertRaises(requests.HTTPError) as raised:
+            response.raise_for_status()
+        self.assertTrue(is_retryable(raised.exception))
+
+    def test_http2_get_honours_timeouts_and_rejects_other_options(self):
+        try:
+            import httpx
+        except ImportError:
+            self.skipTest("httpx is not installed")
+        client = mock.Mock()
+        client.get.return_value = types.SimpleNamespace(
+            status_code=200, url="https://weather.example/v1", headers={}, content=b"{}", text="{}", json=dict,
+        )
+        with mock.patch.object(httpx, "Client", return_value=client):
+            session = Http2Session()
+
+        session.get("https://weather.example/v1", timeout=(1, 2))
+        session.get("https://weather.example/v1")
+
+        self.assertEqual(client.get.call_args_list[0].kwargs["timeout"], httpx.Timeout(2, connect=1))
+        self.assertNotIn("timeout", client.get.call_args_list[1].kwargs)
+        with self.assertRaises(TypeError):
+            session.get("https://weather.example/v1", stream=True)
+
+
+if __name__ == "__main__":
+    unittest.main()
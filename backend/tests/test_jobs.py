@@ -0,0 +1,232 @@
+import json
+import math
+import os
+import sys
+import threading
+import time
+import types
+import unittest
+
+os.environ.setdefault("NEXT_PUBLIC_GOOGLE_MAPS_API_KEY", "test-key")
+sys.modules.setdefault(
+    "googlemaps",
+    types.SimpleNamespace(Client=lambda key, **options: None),
+)
+_firebase_stub = sys.modules.setdefault(
+    "firebase_admin",
+    types.SimpleNamespace(
+        firestore=types.SimpleNamespace(
+            SERVER_TIMESTAMP="SERVER_TIMESTAMP",
+            Query=types.SimpleNamespace(DESCENDING="DESCENDING"),
+        ),
+    ),
+)
+if not hasattr(_firebase_stub, "auth"):
+    _firebase_stub.auth = types.SimpleNamespace(verify_id_token=lambda token: {"uid": token})
+
+from flask import Flask
+
+from routes.jobs import create_jobs_blueprint
+from routes.trips import create_trips_blueprint
+from services.job_service import JobCancelledError, JobService
+from services.trip_repository import InMemoryTripRepository
+from services.trip_service import TripService
+
+
+class SlowMapsClient:
+    """Distance Matrix stub (straight-line meters) that can be held back."""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.release.set()
+
+    def distance_matrix(self, origins, destinations, mode="driving"):
+        self.release.wait(5)
+
+        def parse(coord):
+            lat, lng = coord.split(",")
+            return float(lat), float(lng)
+
+        return {"rows": [
+            {"elements": [
+                {"status": "OK", "distance": {"value": math.dist(parse(o), parse(d)) * 111_000}}
+                for d in destinations
+            ]}
+            for o in origins
+        ]}
+
+
+def make_client(maps, inline_wait_seconds=2.0):
+    app = Flask(__name__)
+    service = TripService(InMemoryTripRepository(), gmaps_client=maps)
+    jobs = JobService(inline_wait_seconds=inline_wait_seconds)
+    app.register_blueprint(create_trips_blueprint(service, jobs))
+    app.register_blueprint(create_jobs_blueprint(jobs, service))
+    created = app.test_client().post("/api/trips", json={"title": "Jobs", "days": [
+        {"stops": [{"name": f"S{i}", "lat": 40.0 + 0.01 * ((i * 7) % 12), "lng": -74.0} for i in range(12)]},
+    ]}).get_json()
+    return app.test_client(), service, created
+
+
+class JobServiceTest(unittest.TestCase):
+    def test_job_reports_progress_and_result(self):
+        jobs = JobService()
+
+        def work(report):
+            report({"phase": "matrix", "batchesDone": 1})
+            return {"answer": 42}
+
+        job = jobs.wait(jobs.submit("test", work).id, timeout=2)
+        self.assertEqual(job.status, "succeeded")
+        self.assertEqual(job.progress, {"phase": "matrix", "batchesDone": 1})
+        self.assertEqual(job.to_dict()["result"], {"answer": 42})
+
+    def test_cancel_stops_a_running_job_at_its_next_report(self):
+        jobs = JobService()
+        started = threading.Event()
+        reached_end = []
+
+        def work(report):
+            started.set()
+            time.sleep(0.2)
+            report({"phase": "solving"})
+            reached_end.append(True)
+
+        job = jobs.submit("test", work)
+        started.wait(2)
+        jobs.cancel(job.id)
+        time.sleep(0.4)
+        self.assertEqual(jobs.get(job.id).status, "cancelled")
+        self.assertEqual(reached_end, [])
+
+
+class AsyncOptimizeTest(unittest.TestCase):
+    def test_quick_async_optimize_answers_inline(self):
+        client, _, created = make_client(SlowMapsClient())
+        trip, token = created["trip"], created["claimToken"]
+        day_id = trip["days"][0]["id"]
+
+        response = client.post(
+            f"/api/trips/{trip['id']}/days/{day_id}/optimize",
+            json={"async": True, "force": True},
+            headers={"X-Claim-Token": token},
+        )
+
+        self.assertEqual(response.status_code, 200)
+        payload = response.get_json()
+        self.assertEqual(len(payload["day"]["route"]["order"]), 12)
+        self.assertEqual(payload["job"]["status"], "succeeded")
+
+    def test_slow_async_optimize_returns_a_job_to_poll(self):
+        maps = SlowMapsClient()
+        maps.release.clear()
+        client, service, created = make_client(maps, inline_wait_seconds=0.05)
+        trip, token = created["trip"], created["claimToken"]
+        day_id = trip["days"][0]["id"]
+
+        response = client.post(
+            f"/api/trips/{trip['id']}/days/{day_id}/optimize",
+            json={"async": True, "force": True},
+            headers={"X-Claim-Token": token},
+        )
+        self.assertEqual(response.status_code, 202)
+        job_id = response.get_json()["job"]["id"]
+        self.assertEqual(response.headers["Location"], f"/api/jobs/{job_id}")
+
+        maps.release.set()
+        events = client.get(f"/api/jobs/{job_id}/events", headers={"X-Claim-Token": token})
+        statuses = [line for line in events.get_data(as_text=True).splitlines() if line]
+        self.assertIn('"status": "succeeded"', statuses[-1])
+        self.assertIsNotNone(service.get_trip(trip["id"]).days[0].route)
+
+    def test_non_numeric_max_gap_is_a_validation_error(self):
+        client, _, created = make_client(SlowMapsClient())
+        trip = created["trip"]
+
+        response = client.post(
+            f"/api/trips/{trip['id']}/days/{trip['days'][0]['id']}/optimize",
+            json={"maxGap": "tight"},
+            headers={"X-Claim-Token": created["claimToken"]},
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.get_json(), {"error": "maxGap must be a number"})
+
+    def test_bad_select_stops_inputs_are_validation_errors(self):
+        client, _, created = make_client(SlowMapsClient())
+        trip = created["trip"]
+        candidate = {"name": "Cafe", "lat": 40.02, "lng": -74.0}
+        cases = [
+            ({"budgetMinutes": "abc", "candidates": [candidate]}, "budgetMinutes must be a number"),
+            ({"budgetMinutes": -10, "candidates": [candidate]}, "budgetMinutes must be a non-negative number"),
+            ({"budgetMinutes": 120, "dwellMinutes": -500, "candidates": [candidate]}, "dwellMinutes must be a non-negative number"),
+            ({"budgetMiles": 10, "candidates": [{**candidate, "rating": "great"}]}, "Score or rating for Cafe must be a number"),
+        ]
+
+        for body, error in cases:
+            response = client.post(
+                f"/api/trips/{trip['id']}/days/{trip['days'][0]['id']}/select-stops",
+                json=body,
+                headers={"X-Claim-Token": created["claimToken"]},
+            )
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.get_json(), {"error": error})
+
+    def start_slow_optimize(self):
+        maps = SlowMapsClient()
+        maps.release.clear()
+        client, service, created = make_client(maps, inline_wait_seconds=0.05)
+        trip, token = created["trip"], created["claimToken"]
+        day = trip["days"][0]
+        response = client.post(
+            f"/api/trips/{trip['id']}/days/{day['id']}/optimize",
+            json={"async": True, "force": True},
+            headers={"X-Claim-Token": token},
+        )
+        self.assertEqual(response.status_code, 202)
+
+        def finish():
+            maps.release.set()
+            job_id = response.get_json()["job"]["id"]
+            events = client.get(f"/api/jobs/{job_id}/events", headers={"X-Claim-Token": token})
+            return json.loads(events.get_data(as_text=True).splitlines()[-1])
+
+        return client, service, trip, token, finish
+
+    def test_edits_made_while_a_job_runs_survive_its_route(self):
+        client, service, trip, token, finish = self.start_slow_optimize()
+        day = trip["days"][0]
+        stop_id = day["stops"][3]["id"]
+        client.patch(f"/api/trips/{trip['id']}/days/{day['id']}/stops/{stop_id}", json={"name": "Renamed"}, headers={"X-Claim-Token": token})
+
+        self.assertEqual(finish()["status"], "succeeded")
+        saved = service.get_trip(trip["id"]).days[0]
+        self.assertEqual(saved.stops[3].name, "Renamed")
+        self.assertEqual(len(saved.route.order), 12)
+
+    def test_a_job_whose_stops_changed_fails_with_a_conflict(self):
+        client, service, trip, token, finish = self.start_slow_optimize()
+        day = trip["days"][0]
+        client.post(f"/api/trips/{trip['id']}/days/{day['id']}/stops", json={"name": "Late", "lat": 40.2, "lng": -74.1}, headers={"X-Claim-Token": token})
+
+        job = finish()
+        self.assertEqual(job["status"], "failed")
+        self.assertIn("changed while it was being optimized", job["error"])
+        saved = service.get_trip(trip["id"]).days[0]
+        self.assertEqual((len(saved.stops), saved.route), (13, None))
+
+    def test_a_job_cancelled_after_its_last_report_does_not_save(self):
+        _, service, created = make_client(SlowMapsClient())
+        trip = created["trip"]
+
+        def report(progress):
+            if progress.get("phase") == "saving":
+                raise JobCancelledError("Job was cancelled")
+
+        with self.assertRaises(JobCancelledError):
+            service.optimize_day(trip["id"], trip["days"][0]["id"], claim_token=created["claimToken"], force=True, progress=report)
+        self.assertIsNone(service.get_trip(trip["id"]).days[0].route)
+
+
+if __name__ == "__main__":
+    unittest.main()
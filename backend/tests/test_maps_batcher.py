@@ -0,0 +1,114 @@
+import random
+import threading
+import unittest
+
+from services.maps_batcher import BatchingMapsClient, pack_blocks
+
+
+class RecordingMapsClient:
+    """Distance Matrix stub: the distance value encodes 'origin->destination'."""
+
+    def __init__(self, fail=False):
+        self.requests = []
+        self.fail = fail
+
+    def distance_matrix(self, origins, destinations, mode="driving"):
+        self.requests.append((list(origins), list(destinations)))
+        if self.fail:
+            raise RuntimeError("quota exceeded")
+        return {"rows": [
+            {"elements": [{"status": "OK", "distance": {"value": f"{o}->{d}"}} for d in destinations]}
+            for o in origins
+        ]}
+
+    def geocode(self, query):
+        return [{"query": query}]
+
+
+def run_concurrently(calls):
+    results = [None] * len(calls)
+    errors = [None] * len(calls)
+
+    def worker(index, call):
+        try:
+            results[index] = call()
+        except Exception as error:
+            errors[index] = error
+
+    threads = [threading.Thread(target=worker, args=(index, call)) for index, call in enumerate(calls)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, errors
+
+
+class PackBlocksTest(unittest.TestCase):
+    def test_rows_sharing_destinations_share_a_block(self):
+        destinations = [f"d{j}" for j in range(10)]
+        pairs = [(f"o{i}", d) for i in range(10) for d in destinations]
+        self.assertEqual(pack_blocks(pairs), [([f"o{i}" for i in range(10)], destinations)])
+
+    def test_blocks_respect_request_limits(self):
+        pairs = [(f"o{i}", f"d{j}") for i in range(30) for j in range(30)]
+        blocks = pack_blocks(pairs)
+        covered = {(o, d) for origins, destinations in blocks for o in origins for d in destinations}
+        self.assertEqual(covered, set(pairs))
+        for origins, destinations in blocks:
+            self.assertLessEqual(len(origins), 25)
+            self.assertLessEqual(len(destinations), 25)
+            self.assertLessEqual(len(origins) * len(destinations), 100)
+
+    def test_overlapping_rows_are_billed_only_for_requested_pairs(self):
+        rng = random.Random(3)
+        destinations = [f"d{j}" for j in range(40)]
+        for pairs in (
+            [("o1", "d1"), ("o1", "d2"), ("o2", "d2"), ("o2", "d3")],
+            [(f"o{i}", d) for i in range(20) for d in rng.sample(destinations, rng.randint(1, 15))],
+        ):
+            blocks = pack_blocks(pairs)
+            billed = [(o, d) for origins, block_destinations in blocks for o in origins for d in block_destinations]
+            self.assertEqual(len(billed), len(set(pairs)))
+            self.assertEqual(set(billed), set(pairs))
+
+
+class BatchingMapsClientTest(unittest.TestCase):
+    def test_concurrent_rows_are_merged_into_one_request(self):
+        inner = RecordingMapsClient()
+        client = BatchingMapsClient(inner, window_seconds=0.05)
+        destinations = ["1,1", "2,2", "3,3"]
+        calls = [
+            (lambda origin=origin: client.distance_matrix([origin], destinations, mode="driving"))
+            for origin in ("10,10", "20,20", "30,30", "40,40")
+        ]
+
+        results, errors = run_concurrently(calls)
+
+        self.assertEqual(errors, [None] * 4)
+        self.assertEqual(len(inner.requests), 1)
+        self.assertEqual(
+            [element["distance"]["value"] for element in results[1]["rows"][0]["elements"]],
+            ["20,20->1,1", "20,20->2,2", "20,20->3,3"],
+        )
+
+    def test_identical_pairs_are_fetched_once(self):
+        inner = RecordingMapsClient()
+        client = BatchingMapsClient(inner, window_seconds=0.05)
+
+        results, _ = run_concurrently([lambda: client.distance_matrix(["1,1"], ["2,2"])] * 5)
+
+        self.assertEqual(inner.requests, [(["1,1"], ["2,2"])])
+        self.assertTrue(all(result["rows"][0]["elements"][0]["status"] == "OK" for result in results))
+
+    def test_errors_reach_every_waiting_caller(self):
+        client = BatchingMapsClient(RecordingMapsClient(fail=True), window_seconds=0.01)
+        with self.assertRaises(RuntimeError):
+            client.distance_matrix(["1,1"], ["2,2", "3,3"])
+
+    def test_other_methods_pass_through(self):
+        client = BatchingMapsClient(RecordingMapsClient())
+        self.assertEqual(client.geocode("Boston"), [{"query": "Boston"}])
+
+
+if __name__ == "__main__":
+    unittest.main()
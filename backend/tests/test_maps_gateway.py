@@ -0,0 +1,136 @@
+import threading
+import time
+import types
+import unittest
+
+from services.maps_gateway import MapsGateway, MapsUnavailableError, TokenBucket
+
+
+class ApiError(Exception):
+    def __init__(self, status):
+        super().__init__(status)
+        self.status = status
+
+
+class Timeout(Exception):
+    """Named like googlemaps.exceptions.Timeout."""
+
+
+class FlakyMapsClient:
+    """Fails with the given errors, then succeeds."""
+
+    def __init__(self, *errors, delay=0.0):
+        self.errors = list(errors)
+        self.delay = delay
+        self.calls = 0
+
+    def geocode(self, query):
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.errors:
+            raise self.errors.pop(0)
+        return [{"formatted_address": query}]
+
+
+class StatusSession:
+    def __init__(self, *statuses):
+        self.statuses = list(statuses)
+
+    def get(self, url, **kwargs):
+        return types.SimpleNamespace(status_code=self.statuses.pop(0), url=url)
+
+
+def gateway(**options):
+    options.setdefault("backoff_seconds", 0.001)
+    return MapsGateway(**options)
+
+
+class MapsGatewayTest(unittest.TestCase):
+    def test_retryable_errors_are_retried_and_client_errors_are_not(self):
+        maps = gateway()
+        client = FlakyMapsClient(ApiError("OVER_QUERY_LIMIT"), Timeout())
+        self.assertEqual(maps.client(client).geocode("Boston"), [{"formatted_address": "Boston"}])
+        self.assertEqual((client.calls, maps.retries), (3, 2))
+
+        invalid = FlakyMapsClient(ApiError("INVALID_REQUEST"))
+        with self.assertRaises(ApiError):
+            maps.client(invalid).geocode("")
+        self.assertEqual(invalid.calls, 1)
+
+    def test_circuit_opens_fails_fast_and_recovers(self):
+        maps = gateway(attempts=1, circuit_failures=2, circuit_reset_seconds=0.05)
+        client = FlakyMapsClient(ApiError("UNKNOWN_ERROR"), ApiError("UNKNOWN_ERROR"))
+        wrapped = maps.client(client)
+        for _ in range(2):
+            with self.assertRaises(ApiError):
+                wrapped.geocode("Boston")
+
+        started = time.monotonic()
+        with self.assertRaises(MapsUnavailableError):
+            wrapped.geocode("Boston")
+        self.assertLess(time.monotonic() - started, 0.01)
+        self.assertEqual((client.calls, maps.breaker.state), (2, "open"))
+
+        time.sleep(0.06)
+        self.assertEqual(maps.breaker.state, "half-open")
+        self.assertEqual(wrapped.geocode("Boston"), [{"formatted_address": "Boston"}])
+        self.assertEqual(maps.breaker.state, "closed")
+
+    def test_a_rate_limited_half_open_trial_does_not_wedge_the_circuit(self):
+        maps = gateway(attempts=1, circuit_failures=1, circuit_reset_seconds=0.01, qps=0.1, burst=1, max_wait_seconds=0)
+        wrapped = maps.client(FlakyMapsClient(ApiError("UNKNOWN_ERROR")))
+        with self.assertRaises(ApiError):
+            wrapped.geocode("Boston")
+        time.sleep(0.02)
+
+        with self.assertRaisesRegex(MapsUnavailableError, "rate limit"):
+            wrapped.geocode("Boston")
+        maps.bucket = TokenBucket(rate=100, burst=1)
+        self.assertEqual(wrapped.geocode("Boston"), [{"formatted_address": "Boston"}])
+        self.assertEqual(maps.breaker.state, "closed")
+
+    def test_identical_concurrent_calls_share_one_request(self):
+        maps = gateway()
+        client = FlakyMapsClient(delay=0.1)
+        wrapped = maps.client(client)
+        threads = [threading.Thread(target=wrapped.geocode, args=("Boston",)) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wrapped.geocode("Cambridge")
+
+        self.assertEqual(client.calls, 2)
+
+    def test_different_clients_do_not_share_calls(self):
+        maps = gateway()
+        clients = [FlakyMapsClient(delay=0.1), FlakyMapsClient(delay=0.1)]
+        threads = [threading.Thread(target=maps.client(client).geocode, args=("Boston",)) for client in clients]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual([client.calls for client in clients], [1, 1])
+
+    def test_http_retries_5xx_and_returns_the_last_response(self):
+        maps = gateway()
+        self.assertEqual(maps.http(StatusSession(503, 200)).get("https://weather.example/v1").status_code, 200)
+        self.assertEqual(maps.http(StatusSession(429, 429, 429)).get("https://weather.example/v1").status_code, 429)
+        self.assertEqual(maps.http(StatusSession(404)).get("https://weather.example/v1").status_code, 404)
+
+    def test_rate_limit_rejects_calls_that_would_wait_too_long(self):
+        bucket = TokenBucket(rate=10, burst=1)
+        self.assertTrue(bucket.acquire(max_wait=0))
+        self.assertFalse(bucket.acquire(max_wait=0.05))
+        self.assertTrue(bucket.acquire(max_wait=0.2))
+
+        maps = gateway(qps=1, burst=1, max_wait_seconds=0)
+        wrapped = maps.client(FlakyMapsClient())
+        wrapped.geocode("Boston")
+        with self.assertRaises(MapsUnavailableError):
+            wrapped.geocode("Cambridge")
+
+
+if __name__ == "__main__":
+    unittest.main()
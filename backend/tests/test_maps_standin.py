@@ -0,0 +1,51 @@
+import unittest
+
+from scripts.maps_standin import DEFAULT_GAZETTEER, Gazetteer, MapsStandin, create_app
+
+
+def make_client(**options):
+    standin = MapsStandin(Gazetteer.load(DEFAULT_GAZETTEER), **options)
+    return create_app(standin).test_client(), standin
+
+
+class MapsStandinTest(unittest.TestCase):
+    def test_distance_matrix_is_deterministic_and_counted(self):
+        client, standin = make_client()
+        url = "/maps/api/distancematrix/json?origins=New York|40.0,-75.0&destinations=Boston&mode=driving&key=k"
+
+        first = client.get(url).get_json()
+        second = client.get(url).get_json()
+
+        self.assertEqual(first["status"], "OK")
+        self.assertEqual(first["rows"], second["rows"])
+        meters = first["rows"][0]["elements"][0]["distance"]["value"]
+        self.assertTrue(300_000 < meters < 450_000)
+        self.assertEqual(standin.stats()["apis"]["distance_matrix"], {"requests": 2, "elements": 4, "errors": 0})
+
+    def test_distance_matrix_enforces_request_limits(self):
+        client, _ = make_client()
+        origins = "|".join(f"40.{i:02d},-74.0" for i in range(11))
+        destinations = "|".join(f"41.{i:02d},-73.0" for i in range(10))
+
+        response = client.get(f"/maps/api/distancematrix/json?origins={origins}&destinations={destinations}&key=k")
+
+        self.assertEqual(response.get_json()["status"], "MAX_ELEMENTS_EXCEEDED")
+
+    def test_reverse_geocode_uses_nearest_locality(self):
+        client, standin = make_client()
+
+        result = client.get("/maps/api/geocode/json?latlng=40.36,-74.66&key=k").get_json()["results"][0]
+
+        self.assertEqual(result["address_components"][0]["long_name"], "Princeton")
+        self.assertIn("reverse_geocode", standin.stats()["apis"])
+
+    def test_injected_failures_and_missing_key(self):
+        client, standin = make_client(error_rate=1.0, error_status=503)
+
+        self.assertEqual(client.get("/v1/forecast/days:lookup?key=k&location.latitude=40&location.longitude=-74").status_code, 503)
+        self.assertEqual(client.get("/maps/api/geocode/json?address=Boston").get_json()["status"], "REQUEST_DENIED")
+        self.assertEqual(standin.stats()["apis"]["weather"]["errors"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
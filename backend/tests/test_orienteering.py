@@ -0,0 +1,116 @@
+import math
+import os
+import sys
+import types
+import unittest
+
+os.environ.setdefault("NEXT_PUBLIC_GOOGLE_MAPS_API_KEY", "test-key")
+sys.modules.setdefault(
+    "googlemaps",
+    types.SimpleNamespace(Client=lambda key, **options: None),
+)
+sys.modules.setdefault(
+    "firebase_admin",
+    types.SimpleNamespace(
+        firestore=types.SimpleNamespace(
+            SERVER_TIMESTAMP="SERVER_TIMESTAMP",
+            Query=types.SimpleNamespace(DESCENDING="DESCENDING"),
+        )
+    ),
+)
+
+from orienteering import solve_orienteering
+from services.trip_repository import InMemoryTripRepository
+from services.trip_service import TripService, ValidationError
+
+
+class GridMapsClient:
+    """Distance Matrix stub: straight-line meters, one minute per km."""
+
+    def distance_matrix(self, origins, destinations, mode="driving"):
+        def parse(coord):
+            lat, lng = coord.split(",")
+            return float(lat), float(lng)
+
+        def element(o, d):
+            meters = math.dist(parse(o), parse(d)) * 111_000
+            return {"status": "OK", "distance": {"value": meters}, "duration": {"value": meters * 0.06}}
+
+        return {"rows": [{"elements": [element(o, d) for d in destinations]} for o in origins]}
+
+
+def line_matrix(points):
+    return [[abs(a - b) for b in points] for a in points]
+
+
+class OrienteeringSolverTest(unittest.TestCase):
+    def test_picks_the_best_scoring_subset_within_budget(self):
+        # Start at 0; places at 1, 2, 10 and 11 (score 1, 1, 5, 5). A budget
+        # of 22 is a round trip to 11, which passes every place.
+        dist = line_matrix([0, 1, 2, 10, 11])
+        result = solve_orienteering(dist, [0, 1, 1, 5, 5], budget=22)
+        self.assertEqual(sorted(result.order[1:-1]), [1, 2, 3, 4])
+
+        result = solve_orienteering(dist, [0, 1, 1, 5, 5], budget=20)
+        self.assertEqual(sorted(result.order[1:-1]), [1, 2, 3])
+        self.assertEqual(result.score, 7)
+        self.assertLessEqual(result.cost, 20)
+
+    def test_service_time_counts_against_the_budget(self):
+        dist = line_matrix([0, 1, 2, 3])
+        result = solve_orienteering(dist, [0, 1, 1, 1], budget=30, service=[10] * 4)
+        self.assertEqual(len(result.order) - 2, 2)
+        self.assertLessEqual(result.cost, 30)
+
+    def test_required_stops_are_kept_even_over_budget(self):
+        dist = line_matrix([0, 50, 1, 2])
+        result = solve_orienteering(dist, [0, 0, 3, 3], budget=10, end_index=3, required=[1])
+        self.assertIn(1, result.order)
+        self.assertEqual(result.order[0], 0)
+        self.assertEqual(result.order[-1], 3)
+
+
+class SelectStopsTest(unittest.TestCase):
+    def setUp(self):
+        self.service = TripService(InMemoryTripRepository(), gmaps_client=GridMapsClient())
+        self.trip = self.service.create_trip(owner_id="user_123", title="Picks", days=[
+            {"stops": [{"name": "Hotel", "lat": 40.0, "lng": -74.0}]},
+        ])
+        self.day = self.trip.days[0]
+
+    def test_selected_places_are_added_in_route_order(self):
+        candidates = [
+            {"name": "Near", "lat": 40.01, "lng": -74.0, "rating": 4.0},
+            {"name": "Nearer", "lat": 40.005, "lng": -74.0, "rating": 3.5},
+            {"name": "Far", "lat": 40.5, "lng": -74.0, "rating": 4.9},
+        ]
+        result = self.service.select_stops(
+            self.trip.id, self.day.id, candidates, budget_minutes=150, dwell_minutes=60, uid="user_123",
+        )
+
+        self.assertEqual(result["selected"], ["Nearer", "Near"])
+        self.assertEqual(result["skipped"], ["Far"])
+        day = result["day"]
+        self.assertEqual([stop.name for stop in day.stops], ["Hotel", "Nearer", "Near"])
+        self.assertEqual(day.route.order[0], day.stops[0].id)
+        self.assertEqual(day.route.solver["budgetUnit"], "minutes")
+
+    def test_a_zero_rating_scores_zero_and_a_missing_one_scores_one(self):
+        candidates = [
+            {"name": "Panned", "lat": 40.005, "lng": -74.0, "rating": 0},
+            {"name": "Unrated", "lat": 40.01, "lng": -74.0},
+        ]
+        result = self.service.select_stops(
+            self.trip.id, self.day.id, candidates, budget_minutes=100, dwell_minutes=60, uid="user_123",
+        )
+
+        self.assertEqual(result["selected"], ["Unrated"])
+        self.assertEqual(result["score"], 1.0)
+
+    def test_requires_exactly_one_budget(self):
+        with self.assertRaises(ValidationError):
+            self.service.select_stops(self.trip.id, self.day.id, [], uid="user_123")
+
+
+if __name__ == "__main__":
+    unittest.main()
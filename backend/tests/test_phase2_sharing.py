@@ -6,7 +6,7 @@ import unittest
 os.environ.setdefault("NEXT_PUBLIC_GOOGLE_MAPS_API_KEY", "test-key")
 sys.modules.setdefault(
     "googlemaps",
-    types.SimpleNamespace(Client=lambda key: None),
+    types.SimpleNamespace(Client=lambda key, **options: None),
 )
 _firebase_stub = sys.modules.setdefault(
     "firebase_admin",
@@ -0,0 +1,97 @@
+import unittest
+
+from geo import cells_covering, distance_meters, geohash_encode
+from services.place_index import PlaceIndex
+from services.place_search_cache import PlaceSearchCache
+
+MIDTOWN = (40.7484, -73.9857)
+
+
+def place(index, lat, lng, rating=4.0):
+    return {
+        "name": f"Place {index}",
+        "place_id": f"p{index}",
+        "rating": rating,
+        "geometry": {"location": {"lat": lat, "lng": lng}},
+    }
+
+
+def ring(count, offset=0.002):
+    """Places spread within ~300 m of Midtown."""
+    return [place(i, MIDTOWN[0] + offset * (i % 3 - 1), MIDTOWN[1] + offset * (i % 2), rating=3 + i / 10) for i in range(count)]
+
+
+class DensePlacesClient:
+    def __init__(self, count=8):
+        self.count = count
+        self.requests = []
+
+    def places(self, **kwargs):
+        self.requests.append(kwargs)
+        return {"status": "OK", "results": ring(self.count)}
+
+
+class PlaceIndexTest(unittest.TestCase):
+    def test_searches_inside_a_covered_area_skip_google(self):
+        client = DensePlacesClient()
+        cache = PlaceSearchCache(client)
+
+        cache.places(query="restaurants", location="40.7484,-73.9857", radius=5000)
+        nearby = cache.places(query="Restaurants", location="40.7490,-73.9850", radius=1000)
+
+        self.assertEqual(len(client.requests), 1)
+        self.assertEqual(cache.index_hits, 1)
+        self.assertEqual(len(nearby["results"]), 8)
+        ratings = [result["rating"] for result in nearby["results"]]
+        self.assertEqual(ratings, sorted(ratings, reverse=True))
+
+    def test_sparse_uncovered_or_filtered_searches_fall_through(self):
+        client = DensePlacesClient(count=2)
+        cache = PlaceSearchCache(client)
+
+        cache.places(query="museum", location="40.7484,-73.9857", radius=5000)
+        cache.places(query="museum", location="40.7490,-73.9850", radius=1000)  # too few places
+        cache.places(query="bakery", location="40.7490,-73.9850", radius=1000)  # other category
+        cache.places(query="museum", location="40.7900,-73.9500", radius=3000)  # leaves the area
+        cache.places(query="museum", location="40.7490,-73.9850", radius=1000, type="museum")
+
+        self.assertEqual(len(client.requests), 5)
+        self.assertEqual(cache.index_hits, 0)
+
+    def test_a_full_page_only_covers_queries_of_comparable_radius(self):
+        index = PlaceIndex()
+        index.add("restaurants", ring(20), MIDTOWN, 5000)
+        index.add("cafe", ring(19), MIDTOWN, 5000)
+
+        self.assertIsNone(index.nearby("restaurants", *MIDTOWN, 1000))
+        self.assertEqual(len(index.nearby("restaurants", *MIDTOWN, 4000)), 20)
+        self.assertEqual(len(index.nearby("cafe", *MIDTOWN, 1000)), 19)
+
+    def test_stale_places_and_coverage_are_not_served(self):
+        index = PlaceIndex(ttl_seconds=0, min_results=1)
+        index.add("cafe", ring(3), MIDTOWN, 5000)
+
+        self.assertIsNone(index.nearby("cafe", *MIDTOWN, 1000))
+
+    def test_index_is_bounded_and_places_outside_the_radius_are_dropped(self):
+        index = PlaceIndex(max_places=3, min_results=1)
+        far = place(99, 40.7600, -73.9857)  # ~1.3 km north
+        index.add("cafe", ring(4) + [far], MIDTOWN, 5000)
+
+        results = index.nearby("cafe", *MIDTOWN, 1000)
+
+        self.assertEqual(len(index), 3)
+        self.assertEqual({result["place_id"] for result in results}, {"p2", "p3"})
+
+    def test_covering_cells_contain_every_point_in_the_circle(self):
+        cells = cells_covering(*MIDTOWN, 2000, 6)
+        for dlat in (-0.0179, 0, 0.0179):
+            for dlng in (-0.0237, 0, 0.0237):
+                point = (MIDTOWN[0] + dlat, MIDTOWN[1] + dlng)
+                if distance_meters(MIDTOWN, point) <= 2000:
+                    self.assertIn(geohash_encode(*point, 6), cells)
+        self.assertAlmostEqual(distance_meters(MIDTOWN, (40.7574, -73.9857)), 1000, delta=5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+
+from services.place_search_cache import PlaceSearchCache, radius_bucket
+
+
+class CountingPlacesClient:
+    def __init__(self):
+        self.requests = []
+
+    def places(self, **kwargs):
+        self.requests.append(kwargs)
+        return {"status": "OK", "results": [{"name": f"{kwargs['query']} #{len(self.requests)}"}]}
+
+    def directions(self, origin, destination, mode="driving"):
+        return [{"legs": []}]
+
+
+class PlaceSearchCacheTest(unittest.TestCase):
+    def test_near_identical_searches_share_one_request(self):
+        client = CountingPlacesClient()
+        cache = PlaceSearchCache(client)
+
+        first = cache.places(query="Restaurants", location="40.74840,-73.98570", radius=15000)
+        second = cache.places(query="  restaurants ", location=(40.7490, -73.9860), radius=14000)
+
+        self.assertEqual(first, second)
+        self.assertEqual(len(client.requests), 1)
+        self.assertEqual(client.requests[0]["radius"], 15000)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_distinct_areas_and_queries_are_not_shared(self):
+        client = CountingPlacesClient()
+        cache = PlaceSearchCache(client)
+
+        cache.places(query="restaurant", location="40.7484,-73.9857", radius=15000)
+        cache.places(query="restaurant", location="42.3601,-71.0589", radius=15000)
+        cache.places(query="gas station", location="40.7484,-73.9857", radius=15000)
+        cache.places(query="restaurant", location="Boston")
+
+        self.assertEqual(len(client.requests), 4)
+        self.assertEqual(client.requests[3]["location"], "Boston")
+
+    def test_expired_entries_are_refetched(self):
+        client = CountingPlacesClient()
+        cache = PlaceSearchCache(client, ttl_seconds=0)
+
+        cache.places(query="museum")
+        cache.places(query="museum")
+
+        self.assertEqual(len(client.requests), 2)
+
+    def test_buckets_and_pass_through(self):
+        self.assertEqual([radius_bucket(r) for r in (None, 400, 1500, 80000)], [None, 500, 2000, 50000])
+        self.assertEqual(PlaceSearchCache(CountingPlacesClient()).directions("A", "B"), [{"legs": []}])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,158 @@
+import math
+import os
+import random
+import sys
+import types
+import unittest
+from unittest import mock
+
+os.environ.setdefault("NEXT_PUBLIC_GOOGLE_MAPS_API_KEY", "test-key")
+sys.modules.setdefault(
+    "googlemaps",
+    types.SimpleNamespace(Client=lambda key, **options: None),
+)
+sys.modules.setdefault(
+    "firebase_admin",
+    types.SimpleNamespace(
+        firestore=types.SimpleNamespace(
+            SERVER_TIMESTAMP="SERVER_TIMESTAMP",
+            Query=types.SimpleNamespace(DESCENDING="DESCENDING"),
+        )
+    ),
+)
+
+from christofides import build_distance_lookup, predicted_improvement
+from services.distance_cache import DistanceCache
+from services.trip_repository import InMemoryTripRepository
+from services.trip_service import TripService, ValidationError
+
+
+class CountingMapsClient:
+    """Distance Matrix stub (straight-line meters) that counts elements."""
+
+    def __init__(self):
+        self.calls = 0
+        self.elements = 0
+
+    def distance_matrix(self, origins, destinations, mode="driving"):
+        self.calls += 1
+        self.elements += len(origins) * len(destinations)
+
+        def parse(coord):
+            lat, lng = coord.split(",")
+            return float(lat), float(lng)
+
+        return {"rows": [
+            {"elements": [
+                {"status": "OK", "distance": {"value": math.dist(parse(o), parse(d)) * 111_000}}
+                for d in destinations
+            ]}
+            for o in origins
+        ]}
+
+
+def make_day(client, count=5):
+    service = TripService(InMemoryTripRepository(), gmaps_client=client)
+    trip = service.create_trip(owner_id="user_123", title="Line", days=[
+        {"stops": [{"name": f"S{i}", "lat": 40.0 + 0.01 * i, "lng": -74.0} for i in range(count)]},
+    ])
+    return service, trip, trip.days[0]
+
+
+class RoutePreviewTest(unittest.TestCase):
+    def test_preview_after_optimize_is_served_from_cache(self):
+        client = CountingMapsClient()
+        service, trip, day = make_day(client)
+        optimized = service.optimize_day(trip.id, day.id, end_stop_id=day.stops[-1].id, uid="user_123", force=True)
+        calls_after_optimize = client.calls
+
+        reversed_inner = [optimized.route.order[0], *optimized.route.order[1:-1][::-1], optimized.route.order[-1]]
+        result = service.preview_route(trip.id, day.id, [optimized.route.order, reversed_inner], uid="user_123")
+
+        self.assertEqual(client.calls, calls_after_optimize)
+        self.assertEqual(result["previews"][0]["deltaMiles"], 0.0)
+        self.assertGreater(result["previews"][1]["deltaMiles"], 0)
+
+    def test_reorder_stores_cost_fetching_only_its_legs(self):
+        client = CountingMapsClient()
+        service, trip, day = make_day(client)
+        order = [stop.id for stop in day.stops][::-1]
+
+        reordered = service.reorder_stops(trip.id, day.id, order, uid="user_123")
+
+        self.assertEqual(client.elements, len(order) - 1)
+        self.assertAlmostEqual(reordered.route.totalDistanceMiles, 2.8, places=1)
+
+    def test_link_viewers_can_preview_without_write_access(self):
+        service, trip, day = make_day(CountingMapsClient())
+        service.update_trip(trip.id, {"visibility": "link"}, uid="user_123")
+        order = [stop.id for stop in day.stops]
+
+        result = service.preview_route(trip.id, day.id, [order], uid="someone_else")
+
+        self.assertEqual(result["previews"][0]["orderedStopIds"], order)
+
+    def test_preview_rejects_partial_orders(self):
+        service, trip, day = make_day(CountingMapsClient())
+        with self.assertRaises(ValidationError):
+            service.preview_route(trip.id, day.id, [[day.stops[0].id]], uid="user_123")
+
+    def test_optimize_skips_matrix_when_order_is_already_near_optimal(self):
+        client = CountingMapsClient()
+        service, trip, day = make_day(client, count=6)
+
+        optimized = service.optimize_day(trip.id, day.id, end_stop_id=day.stops[-1].id, uid="user_123")
+
+        precheck = optimized.route.solver["precheck"]
+        self.assertTrue(precheck["skippedMatrix"])
+        self.assertEqual(precheck["matrixElementsSaved"], 36)
+        self.assertEqual(optimized.route.solver["strategy"], "already_optimal")
+        self.assertEqual(optimized.route.order, [stop.id for stop in day.stops])
+        self.assertEqual(client.elements, 5)
+
+    def test_optimize_fetches_matrix_when_precheck_predicts_gain(self):
+        client = CountingMapsClient()
+        service, trip, day = make_day(client, count=6)
+        ids = [stop.id for stop in day.stops]
+        service.reorder_stops(trip.id, day.id, [ids[0], ids[3], ids[1], ids[4], ids[2], ids[5]], uid="user_123")
+
+        optimized = service.optimize_day(trip.id, day.id, start_stop_id=ids[0], end_stop_id=ids[5], uid="user_123")
+
+        self.assertFalse(optimized.route.solver["precheck"]["skippedMatrix"])
+        self.assertEqual(optimized.route.order, ids)
+
+    def test_days_over_the_precheck_cap_go_straight_to_the_solver(self):
+        client = CountingMapsClient()
+        service, trip, day = make_day(client, count=6)
+
+        with mock.patch("services.trip_service.PRECHECK_MAX_STOPS", 5):
+            optimized = service.optimize_day(trip.id, day.id, end_stop_id=day.stops[-1].id, uid="user_123")
+
+        self.assertNotIn("precheck", optimized.route.solver)
+
+    def test_precheck_estimate_keeps_to_its_time_limit(self):
+        rng = random.Random(4)
+        locations = [{"lat": 40.0 + rng.random(), "lng": -74.0 + rng.random()} for _ in range(150)]
+        order = list(range(150))
+
+        with mock.patch("christofides.solve_matrix", side_effect=AssertionError("full solve")):
+            improvement = predicted_improvement(locations, order, start_index=0, time_limit=0)
+
+        self.assertGreater(improvement, 0.5)
+
+    def test_distance_lookup_skips_chunks_already_cached(self):
+        locations = [{"lat": 40.0 + 0.01 * i, "lng": -74.0} for i in range(12)]
+        client = CountingMapsClient()
+        cache = DistanceCache()
+
+        build_distance_lookup(locations, gmaps_client=client, cache=cache)
+        first_calls = client.calls
+        lookup = build_distance_lookup(locations, gmaps_client=client, cache=cache)
+
+        self.assertEqual(first_calls, 4)
+        self.assertEqual(client.calls, first_calls)
+        self.assertGreater(lookup[(0, 11)], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
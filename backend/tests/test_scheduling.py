@@ -0,0 +1,114 @@
+import os
+import sys
+import types
+import unittest
+
+os.environ.setdefault("NEXT_PUBLIC_GOOGLE_MAPS_API_KEY", "test-key")
+sys.modules.setdefault(
+    "googlemaps",
+    types.SimpleNamespace(Client=lambda key, **options: None),
+)
+sys.modules.setdefault(
+    "firebase_admin",
+    types.SimpleNamespace(
+        firestore=types.SimpleNamespace(
+            SERVER_TIMESTAMP="SERVER_TIMESTAMP",
+            Query=types.SimpleNamespace(DESCENDING="DESCENDING"),
+        )
+    ),
+)
+
+from scheduling import parse_clock, solve_time_windows, time_windows
+from services.trip_repository import InMemoryTripRepository
+from services.trip_service import TripService, ValidationError
+
+
+class LineMapsClient:
+    """Stops on a meridian; 0.01 degrees of latitude is 10 minutes of driving."""
+
+    def distance_matrix(self, origins, destinations, mode="driving"):
+        def lat(coord):
+            return float(coord.split(",")[0])
+
+        return {"rows": [
+            {"elements": [
+                {
+                    "status": "OK",
+                    "distance": {"value": abs(lat(o) - lat(d)) * 111_000},
+                    "duration": {"value": abs(lat(o) - lat(d)) * 60_000},
+                }
+                for d in destinations
+            ]}
+            for o in origins
+        ]}
+
+
+def line_matrix(count):
+    return [[abs(i - j) * 10.0 for j in range(count)] for i in range(count)]
+
+
+class SchedulingTest(unittest.TestCase):
+    def test_parse_clock_accepts_times_and_iso_datetimes(self):
+        self.assertEqual(parse_clock("09:30"), 570)
+        self.assertEqual(parse_clock("2026-08-01T19:00:00Z"), 1140)
+        self.assertIsNone(parse_clock("dinner"))
+
+    def test_pinned_reservation_reorders_the_day(self):
+        # Shortest order is 0-1-2-3-4, which reaches stop 3 at 09:40; it is
+        # pinned at 09:35, so the best feasible order detours through it
+        # before stop 2.
+        stops = [{}, {}, {}, {"arrivalTime": "09:35"}, {}]
+        ready, due, dwell = time_windows(stops, default_dwell=5)
+
+        result = solve_time_windows(line_matrix(5), ready, due, dwell, 0, 4, depart_at=9 * 60)
+
+        self.assertTrue(result.feasible)
+        self.assertEqual(result.order, [0, 1, 3, 2, 4])
+        self.assertEqual(result.travel_minutes, 60)
+        visit = next(v for v in result.visits if v["index"] == 3)
+        self.assertEqual(visit["start"], 575)
+
+    def test_impossible_pins_report_lateness(self):
+        stops = [{}, {"arrivalTime": "09:05"}, {"arrivalTime": "09:06"}]
+        ready, due, dwell = time_windows(stops, default_dwell=30)
+
+        result = solve_time_windows(line_matrix(3), ready, due, dwell, 0, None, depart_at=9 * 60)
+
+        self.assertFalse(result.feasible)
+        self.assertGreater(result.late_minutes, 0)
+
+    def test_optimize_day_uses_time_windows_for_pinned_stops(self):
+        service = TripService(InMemoryTripRepository(), gmaps_client=LineMapsClient())
+        trip = service.create_trip(owner_id="user_123", title="Pinned", days=[{"stops": [
+            {"name": "Hotel", "lat": 40.00, "lng": -74.0, "departureTime": "09:00"},
+            {"name": "Museum", "lat": 40.01, "lng": -74.0},
+            {"name": "Lunch", "lat": 40.03, "lng": -74.0, "arrivalTime": "09:30", "departureTime": "10:30"},
+            {"name": "Park", "lat": 40.02, "lng": -74.0},
+        ]}])
+        day = trip.days[0]
+
+        optimized = service.optimize_day(trip.id, day.id, end_stop_id=day.stops[1].id, uid="user_123")
+
+        names = {stop.id: stop.name for stop in optimized.stops}
+        self.assertEqual([names[stop_id] for stop_id in optimized.route.order], ["Hotel", "Lunch", "Park", "Museum"])
+        self.assertTrue(optimized.route.solver["feasible"])
+        lunch = optimized.route.schedule[1]
+        self.assertEqual((lunch["arrivalTime"], lunch["departureTime"]), ("09:30", "10:30"))
+        self.assertEqual(optimized.route.schedule[-1]["arrivalTime"], "11:50")
+        self.assertIsNotNone(optimized.route.optimizedDistanceMiles)
+
+    def test_optimize_day_rejects_bad_schedule_options(self):
+        service = TripService(InMemoryTripRepository(), gmaps_client=LineMapsClient())
+        trip = service.create_trip(owner_id="user_123", title="Pinned", days=[{"stops": [
+            {"name": "Hotel", "lat": 40.00, "lng": -74.0},
+            {"name": "Museum", "lat": 40.01, "lng": -74.0},
+        ]}])
+        day = trip.days[0]
+
+        for options in ({"dwell_minutes": -5}, {"dwell_minutes": "long"}, {"day_start": "breakfast"}):
+            with self.assertRaises(ValidationError):
+                service.optimize_day(trip.id, day.id, uid="user_123", mode="time_windows", **options)
+
+
+if __name__ == "__main__":
+    unittest.main()
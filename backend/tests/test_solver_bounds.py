@@ -0,0 +1,104 @@
+import math
+import os
+import random
+import sys
+import types
+import unittest
+
+os.environ.setdefault("NEXT_PUBLIC_GOOGLE_MAPS_API_KEY", "test-key")
+sys.modules.setdefault(
+    "googlemaps",
+    types.SimpleNamespace(Client=lambda key, **options: None),
+)
+
+from christofides import (
+    _held_karp,
+    _local_search,
+    _nearest_neighbor_path,
+    _order_cost,
+    held_karp_lower_bound,
+    solve,
+    solve_matrix,
+)
+
+
+def random_matrix(count, seed):
+    rng = random.Random(seed)
+    points = [(rng.random(), rng.random()) for _ in range(count)]
+    return [[math.dist(a, b) for b in points] for a in points]
+
+
+class SolverBoundsTest(unittest.TestCase):
+    def test_lower_bound_never_exceeds_exact_optimum(self):
+        for seed in range(4):
+            dist = random_matrix(10, seed)
+            for end in (0, 9):
+                optimum = _order_cost(_held_karp(dist, 0, end), dist)
+                bound = held_karp_lower_bound(dist, 0, end, upper_bound=optimum * 1.2)
+                self.assertLessEqual(bound, optimum + 1e-9)
+                self.assertGreater(bound, optimum * 0.9)
+
+    def test_heuristic_result_reports_gap(self):
+        dist = random_matrix(30, seed=7)
+        result = solve_matrix(dist, 0, 29)
+
+        self.assertEqual(result.order[0], 0)
+        self.assertEqual(result.order[-1], 29)
+        self.assertEqual(sorted(result.order), list(range(30)))
+        self.assertIsNotNone(result.gap)
+        self.assertLessEqual(result.lower_bound, result.cost)
+        self.assertLess(result.gap, 0.2)
+
+    def test_lower_bound_is_tight_on_clustered_stops(self):
+        rng = random.Random(2)
+        centers = [(rng.uniform(0, 60), rng.uniform(0, 60)) for _ in range(3)]
+        points = [(rng.gauss(x, 1.4), rng.gauss(y, 1.4)) for x, y in (rng.choice(centers) for _ in range(50))]
+        dist = [[math.dist(a, b) for b in points] for a in points]
+        tour = solve_matrix(dist, 0, None, gap_threshold=0.0, max_restarts=20, time_limit=60)
+
+        bound = held_karp_lower_bound(dist, 0, 0, upper_bound=tour.cost)
+
+        self.assertLessEqual(bound, tour.cost)
+        self.assertGreater(bound, tour.cost / 1.15)
+
+    def test_loose_gap_threshold_skips_restarts(self):
+        # A generous time limit so only the gap decides how many restarts run.
+        dist = random_matrix(40, seed=3)
+        loose = solve_matrix(dist, 0, None, gap_threshold=1.0, time_limit=60)
+        tight = solve_matrix(dist, 0, None, gap_threshold=0.0, max_restarts=3, time_limit=60)
+
+        self.assertEqual(loose.stats()["restarts"], 0)
+        self.assertEqual(tight.stats()["restarts"], 3)
+
+    def test_first_local_search_converges_whatever_the_gap(self):
+        for seed in range(3):
+            dist = random_matrix(50, seed)
+            converged = _local_search(_nearest_neighbor_path(dist, 0, 49), dist)
+            result = solve_matrix(dist, 0, 49, gap_threshold=1.0, time_limit=60)
+
+            self.assertLessEqual(result.cost, _order_cost(converged, dist) + 1e-9)
+
+    def test_improvement_stops_at_the_time_limit(self):
+        dist = random_matrix(200, seed=5)
+        order = _nearest_neighbor_path(dist, 0, 199)
+
+        self.assertEqual(_local_search(list(order), dist, deadline=0.0), order)
+        result = solve_matrix(dist, 0, 199, time_limit=0)
+        self.assertEqual(result.order, order)
+        self.assertEqual(result.stats()["restarts"], 0)
+
+    def test_exact_solve_has_zero_gap(self):
+        locations = [{"name": str(i), "lat": float(i), "lng": 0.0} for i in range(5)]
+
+        def distance(origin, destination):
+            return abs(origin["lat"] - destination["lat"])
+
+        result = solve(locations, 0, 4, distance_fn=distance)
+
+        self.assertEqual(result.strategy, "held_karp")
+        self.assertEqual(result.gap, 0.0)
+        self.assertEqual([stop["name"] for stop in result.route], ["0", "1", "2", "3", "4"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+import os
+import threading
+import time
+import unittest
+
+os.environ.setdefault("NEXT_PUBLIC_GOOGLE_MAPS_API_KEY", "test-key")
+
+from services.solver_pool import SolverBusyError, SolverPool, SolverTimeoutError
+
+
+class SolverPoolTest(unittest.TestCase):
+    def setUp(self):
+        self.pool = SolverPool(max_workers=1, max_queue=0, timeout_seconds=5, inline_max_stops=10)
+
+    def tearDown(self):
+        self.pool.shutdown()
+
+    def test_small_jobs_run_inline(self):
+        # A lambda can't be pickled, so this only passes without a worker.
+        self.assertEqual(self.pool.run(lambda values: sum(values), [1, 2, 3], size=5), 6)
+        self.assertIsNone(self.pool._executor)
+
+    def test_large_jobs_run_in_a_worker(self):
+        self.assertEqual(self.pool.run(sorted, [3, 1, 2], size=50), [1, 2, 3])
+        self.assertIsNotNone(self.pool._executor)
+
+    def test_rejects_work_when_workers_and_queue_are_full(self):
+        holder = threading.Thread(target=self.pool.run, args=(time.sleep, 1.5), kwargs={"size": 50})
+        holder.start()
+        time.sleep(0.1)
+        try:
+            with self.assertRaises(SolverBusyError) as raised:
+                self.pool.run(sorted, [2, 1], size=50)
+            self.assertEqual(raised.exception.retry_after, self.pool.retry_after_seconds)
+        finally:
+            holder.join()
+        self.assertEqual(self.pool.run(sorted, [2, 1], size=50), [1, 2])
+
+    def test_times_out_long_jobs(self):
+        self.pool.timeout_seconds = 0.2
+        with self.assertRaises(SolverTimeoutError):
+            self.pool.run(time.sleep, 1.0, size=50)
+
+    def test_timed_out_jobs_keep_their_slot_until_the_worker_frees_up(self):
+        self.pool.timeout_seconds = 0.2
+        with self.assertRaises(SolverTimeoutError):
+            self.pool.run(time.sleep, 1.0, size=50)
+        with self.assertRaises(SolverBusyError):
+            self.pool.run(sorted, [2, 1], size=50)
+        time.sleep(1.0)
+        self.assertEqual(self.pool.run(sorted, [2, 1], size=50), [1, 2])
+
+    def test_a_crashed_worker_is_replaced(self):
+        with self.assertRaises(SolverTimeoutError):
+            self.pool.run(os._exit, 1, size=50)
+        self.assertEqual(self.pool.run(sorted, [2, 1], size=50), [1, 2])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,127 @@
+import os
+import sys
+import types
+import unittest
+from datetime import datetime, timedelta, timezone
+from urllib.parse import parse_qs, urlparse
+
+os.environ.setdefault("NEXT_PUBLIC_GOOGLE_MAPS_API_KEY", "test-key")
+sys.modules.setdefault(
+    "googlemaps",
+    types.SimpleNamespace(Client=lambda key, **options: None),
+)
+_firebase_stub = sys.modules.setdefault(
+    "firebase_admin",
+    types.SimpleNamespace(
+        firestore=types.SimpleNamespace(
+            SERVER_TIMESTAMP="SERVER_TIMESTAMP",
+            Query=types.SimpleNamespace(DESCENDING="DESCENDING"),
+        ),
+    ),
+)
+if not hasattr(_firebase_stub, "auth"):
+    _firebase_stub.auth = types.SimpleNamespace(verify_id_token=lambda token: {"uid": token})
+
+from flask import Flask
+
+import weather
+from routes.trips import create_trips_blueprint
+from services.forecast_cache import ForecastCache
+from services.trip_repository import InMemoryTripRepository
+from services.trip_service import TripService
+
+# Forecasts start on the region's local date; every stop here is in the
+# Americas, at most a day behind UTC, so these offsets stay in range.
+TODAY = datetime.now(timezone.utc).date()
+
+
+def day(offset):
+    return (TODAY + timedelta(days=offset)).isoformat()
+
+
+class FakeWeatherSession:
+    def __init__(self):
+        self.forecasts = []
+        self.geocodes = 0
+
+    def get(self, url, **kwargs):
+        if "geocode/json" in url:
+            self.geocodes += 1
+            body = {"status": "OK", "results": [{"address_components": [
+                {"long_name": "Somewhere", "types": ["locality"]},
+                {"short_name": "MA", "types": ["administrative_area_level_1"]},
+            ]}]}
+        else:
+            days = int(parse_qs(urlparse(url).query)["days"][0])
+            self.forecasts.append(days)
+            body = {"forecastDays": [
+                {"displayDate": {"year": date.year, "month": date.month, "day": date.day}}
+                for date in (TODAY + timedelta(days=offset) for offset in range(days))
+            ]}
+        return types.SimpleNamespace(raise_for_status=lambda: None, json=lambda: body)
+
+
+class TripWeatherTest(unittest.TestCase):
+    def setUp(self):
+        self.session = FakeWeatherSession()
+        for name, value in (("http_session", self.session), ("forecast_cache", ForecastCache(weather.get_daily_forecast))):
+            self.addCleanup(setattr, weather, name, getattr(weather, name))
+            setattr(weather, name, value)
+        app = Flask(__name__)
+        self.service = TripService(InMemoryTripRepository())
+        app.register_blueprint(create_trips_blueprint(self.service))
+        self.client = app.test_client()
+
+    def create_trip(self, days):
+        created = self.client.post("/api/trips", json={"title": "Road trip", "days": days}).get_json()
+        return created["trip"]["id"], created["claimToken"]
+
+    def test_regions_get_forecasts_for_their_visit_dates_only(self):
+        trip_id, _ = self.create_trip([
+            {"date": day(1), "stops": [{"name": "Boston", "lat": 42.3601, "lng": -71.0589}]},
+            {"date": day(8), "stops": [{"name": "Fenway", "lat": 42.3467, "lng": -71.0972}]},
+            {"date": day(2), "stops": [{"name": "Denver", "lat": 39.7392, "lng": -104.9903}]},
+            {"date": day(30), "stops": [{"name": "Miami", "lat": 25.7617, "lng": -80.1918}]},
+        ])
+
+        result = self.client.get(f"/api/trips/{trip_id}/weather").get_json()
+
+        boston, denver, miami = result["regions"]
+        self.assertEqual([entry["date"] for entry in boston["forecast"]], [day(1), day(8)])
+        self.assertEqual([entry["date"] for entry in denver["forecast"]], [day(2)])
+        self.assertEqual((miami["forecast"], miami["unavailableDates"]), ([], [day(30)]))
+        # Boston reaches past a week; Denver shares the 7-day horizon; Miami isn't fetched.
+        self.assertEqual(sorted(self.session.forecasts), [7, 10])
+
+    def test_result_is_cached_until_the_trip_changes(self):
+        trip_id, token = self.create_trip([{"date": day(1), "stops": [{"name": "Boston", "lat": 42.3601, "lng": -71.0589}]}])
+
+        first = self.client.get(f"/api/trips/{trip_id}/weather").get_json()
+        second = self.client.get(f"/api/trips/{trip_id}/weather").get_json()
+        self.assertEqual(first, second)
+        self.assertEqual(self.session.geocodes, 1)
+
+        self.client.patch(f"/api/trips/{trip_id}", json={"title": "Renamed"}, headers={"X-Claim-Token": token})
+        third = self.client.get(f"/api/trips/{trip_id}/weather").get_json()
+        self.assertNotEqual(third["version"], first["version"])
+        self.assertEqual(self.session.geocodes, 2)
+
+    def test_undated_trips_get_a_week_and_private_trips_stay_private(self):
+        trip_id, _ = self.create_trip([{"stops": [{"name": "Boston", "lat": 42.3601, "lng": -71.0589}]}])
+        [region] = self.client.get(f"/api/trips/{trip_id}/weather").get_json()["regions"]
+        self.assertEqual(len(region["forecast"]), 7)
+
+        trip = self.service.repository.get(trip_id)
+        trip.visibility = "private"
+        self.service.repository.update(trip)
+        self.assertEqual(self.client.get(f"/api/trips/{trip_id}/weather").status_code, 403)
+
+    def test_visit_dates_are_compared_with_the_regions_local_date(self):
+        # 9 pm in Boston is already tomorrow in UTC.
+        evening = datetime(2026, 10, 19, 1, 0, tzinfo=timezone.utc)
+        self.assertEqual(weather._local_date(-71.06, evening).isoformat(), "2026-10-18")
+        self.assertEqual(weather._local_date(139.69, evening).isoformat(), "2026-10-19")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,227 @@
+import os
+import random
+import threading
+import time
+import types
+import unittest
+from unittest import mock
+from urllib.parse import parse_qs, urlparse
+
+os.environ.setdefault("NEXT_PUBLIC_GOOGLE_MAPS_API_KEY", "test-key")
+
+import weather
+from services.forecast_cache import ForecastCache
+
+# One stop in each of eight regions more than 50 miles apart.
+CITIES = [
+    ("Boston", 42.3601, -71.0589),
+    ("New York", 40.7128, -74.0060),
+    ("Philadelphia", 39.9526, -75.1652),
+    ("Pittsburgh", 40.4406, -79.9959),
+    ("Columbus", 39.9612, -82.9988),
+    ("Chicago", 41.8781, -87.6298),
+    ("Omaha", 41.2565, -95.9345),
+    ("Denver", 39.7392, -104.9903),
+]
+
+
+class InFlight:
+    """Counts overlapping calls; peak is the most seen at once."""
+
+    def __init__(self):
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def __enter__(self):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+
+    def __exit__(self, *exc):
+        with self.lock:
+            self.active -= 1
+
+
+class SlowRegionGeocoder:
+    def __init__(self):
+        self.in_flight = InFlight()
+
+    def reverse_geocode(self, latlng):
+        with self.in_flight:
+            time.sleep(0.1)
+        name = next(city for city, lat, lng in CITIES if abs(lat - latlng[0]) + abs(lng - latlng[1]) < 0.1)
+        return [{"address_components": [
+            {"long_name": name, "types": ["locality"]},
+            {"short_name": "US", "types": ["administrative_area_level_1"]},
+        ]}]
+
+
+class SlowForecastSession:
+    def __init__(self):
+        self.in_flight = InFlight()
+
+    def get(self, url, **kwargs):
+        with self.in_flight:
+            time.sleep(0.1)
+        latitude = float(parse_qs(urlparse(url).query)["location.latitude"][0])
+        if abs(latitude - 41.2565) < 0.05:
+            raise ConnectionError("weather unavailable")
+        return types.SimpleNamespace(
+            raise_for_status=lambda: None,
+            json=lambda: {"forecastDays": [{"displayDate": {"year": 2026, "month": 10, "day": 18}, "maxTemperature": {"degrees": latitude}}]},
+        )
+
+
+class WeatherTest(unittest.TestCase):
+    def setUp(self):
+        original = weather.http_session
+        self.session = weather.http_session = SlowForecastSession()
+        self.addCleanup(setattr, weather, "http_session", original)
+        cache = weather.forecast_cache
+        weather.forecast_cache = ForecastCache(weather.get_daily_forecast)
+        self.addCleanup(setattr, weather, "forecast_cache", cache)
+        self.locations = [{"name": f"{city} stop", "lat": lat, "lng": lng} for city, lat, lng in CITIES]
+
+    def test_regions_are_named_and_forecast_concurrently(self):
+        geocoder = SlowRegionGeocoder()
+        result = weather.get_weather_for_locations(self.locations, geocoder=geocoder)
+
+        self.assertEqual((geocoder.in_flight.peak, self.session.in_flight.peak), (8, 8))
+        self.assertEqual([region["regionName"] for region in result["regions"]], [f"{city}, US Area" for city, _, _ in CITIES])
+        for region, (city, lat, _) in zip(result["regions"], CITIES):
+            if city != "Omaha":
+                self.assertAlmostEqual(region["forecast"][0]["maxTemp"], lat, delta=0.05)
+
+    def test_a_failed_region_reports_its_error_without_failing_the_rest(self):
+        regions = weather.get_weather_for_locations(self.locations, geocoder=SlowRegionGeocoder())["regions"]
+
+        failed = [region for region in regions if region.get("error")]
+        self.assertEqual([region["regionName"] for region in failed], ["Omaha, US Area"])
+        self.assertEqual(failed[0]["forecast"], [])
+
+    def test_cluster_and_forecast_helpers_keep_input_order(self):
+        clusters = weather.cluster_locations(self.locations + [{"name": "Cambridge", "lat": 42.3736, "lng": -71.1097}], geocoder=SlowRegionGeocoder())
+        regions = weather.get_weather_for_clusters(clusters)
+
+        self.assertEqual(len(clusters), 8)
+        self.assertEqual(clusters[0]["locations"][-1]["name"], "Cambridge")
+        self.assertEqual([region["regionName"] for region in regions], [cluster["regionName"] for cluster in clusters])
+
+
+class ClusteringTest(unittest.TestCase):
+    def random_stops(self, count, seed=7):
+        rng = random.Random(seed)
+        return [{"name": f"Stop {i}", "lat": rng.uniform(25, 49), "lng": rng.uniform(-124, -67)} for i in range(count)]
+
+    def count_distances(self, group, *args):
+        calls = []
+        distance = weather.haversine_distance
+
+        def counting(*points):
+            calls.append(points)
+            return distance(*points)
+
+        with mock.patch.object(weather, "haversine_distance", counting):
+            return group(*args), len(calls)
+
+    def test_clusters_do_not_depend_on_input_order_and_scale(self):
+        stops = self.random_stops(1000)
+        shuffled = random.Random(1).sample(stops, len(stops))
+
+        clusters, comparisons = self.count_distances(weather._group_locations, stops, 50)
+        self.assertLess(comparisons, 20 * len(stops))
+
+        members = {frozenset(stop["name"] for stop in cluster["locations"]) for cluster in clusters}
+        self.assertEqual(members, {frozenset(stop["name"] for stop in cluster["locations"]) for cluster in weather._group_locations(shuffled, 50)})
+        for cluster in clusters:
+            for stop in cluster["locations"]:
+                self.assertLessEqual(weather.haversine_distance(stop["lat"], stop["lng"], cluster["locations"][0]["lat"], cluster["locations"][0]["lng"]), 100)
+
+    def test_centroid_is_the_mean_position_named_after_the_closest_stop(self):
+        stops = [
+            {"name": "Harvard", "lat": 42.3770, "lng": -71.1167},
+            {"name": "Fenway", "lat": 42.3467, "lng": -71.0972},
+            {"name": "Aquarium", "lat": 42.3591, "lng": -71.0498},
+        ]
+        [cluster] = weather._group_locations(stops, 50)
+
+        self.assertAlmostEqual(cluster["centroid"]["lat"], 42.3609, places=4)
+        self.assertAlmostEqual(cluster["centroid"]["lng"], -71.0879, places=4)
+        self.assertEqual(cluster["centroid"]["name"], "Fenway")
+        self.assertEqual([stop["name"] for stop in cluster["locations"]], ["Harvard", "Fenway", "Aquarium"])
+
+    def test_density_clustering_of_one_metro_does_not_compare_every_pair(self):
+        rng = random.Random(3)
+        stops = [{"name": f"Stop {i}", "lat": 40.75 + rng.uniform(-0.1, 0.1), "lng": -73.98 + rng.uniform(-0.1, 0.1)} for i in range(1000)]
+
+        clusters, comparisons = self.count_distances(weather._group_locations, stops, 50, weather.DENSITY_CLUSTERING)
+
+        self.assertEqual([len(cluster["locations"]) for cluster in clusters], [1000])
+        self.assertLess(comparisons, 2 * len(stops))
+
+    def test_density_clustering_follows_chains_of_stops(self):
+        # Stops every ~20 miles along I-90 west of Boston, plus one far away.
+        chain = [{"name": f"Mile {20 * i}", "lat": 42.36, "lng": -71.06 - 0.39 * i} for i in range(8)]
+        stops = chain + [{"name": "Denver", "lat": 39.7392, "lng": -104.9903}]
+
+        density = weather._group_locations(stops, 25, weather.DENSITY_CLUSTERING)
+        leader = weather._group_locations(stops, 25)
+
+        self.assertEqual([len(cluster["locations"]) for cluster in density], [8, 1])
+        self.assertGreater(len(leader), 2)
+        with self.assertRaises(ValueError):
+            weather._group_locations(stops, 25, "kmeans")
+
+
+class ForecastCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.now = 10 * 3600 + 1800.0  # half past an hour
+        self.requests = []
+        self.failing = False
+
+    def fetch(self, lat, lng, days):
+        self.requests.append((lat, lng, days))
+        if self.failing:
+            raise ConnectionError("weather unavailable")
+        return [{"date": "2026-10-18", "maxTemp": len(self.requests)}]
+
+    def cache(self):
+        return ForecastCache(self.fetch, clock=lambda: self.now)
+
+    def test_nearby_requests_share_an_entry_until_the_top_of_the_hour(self):
+        cache = self.cache()
+        first = cache.get(42.3601, -71.0589)
+        self.now += 1799
+        second = cache.get(42.3605, -71.0585)
+
+        self.assertEqual(first, second)
+        self.assertEqual(len(self.requests), 1)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        cache.get(42.3601, -71.0589, days=3)
+        self.assertEqual(len(self.requests), 2)
+
+    def test_stale_entries_are_served_while_refreshing_in_the_background(self):
+        cache = self.cache()
+        cache.get(42.3601, -71.0589)
+        self.now += 1800  # next hour: stale
+
+        stale = cache.get(42.3601, -71.0589)
+        cache._executor.shutdown(wait=True)
+
+        self.assertEqual(stale[0]["maxTemp"], 1)
+        self.assertEqual(cache.stale_hits, 1)
+        self.assertEqual(cache.get(42.3601, -71.0589)[0]["maxTemp"], 2)
+
+    def test_failures_are_not_cached(self):
+        cache = self.cache()
+        self.failing = True
+        with self.assertRaises(ConnectionError):
+            cache.get(42.3601, -71.0589)
+        self.failing = False
+
+        self.assertEqual(cache.get(42.3601, -71.0589)[0]["maxTemp"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
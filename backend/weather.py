@@ -4,15 +4,46 @@ Provides location clustering and Google Weather API integration.
 """
 
 import os
-import requests
-from math import radians, sin, cos, sqrt, atan2
-from typing import List, Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+from itertools import islice
+from math import radians, sin, cos, sqrt, atan2, floor, ceil
+from typing import Callable, List, Dict, Any, Optional, Tuple
+
+from services.forecast_cache import ForecastCache
+from services.http_client import api_session
+from services.maps_gateway import default_gateway
 
 GOOGLE_MAPS_API_KEY = os.getenv('NEXT_PUBLIC_GOOGLE_MAPS_API_KEY')
-WEATHER_API_BASE = "https://weather.googleapis.com/v1/forecast/days:lookup"
+# Overridable so load tests can run against scripts/maps_standin.py.
+GOOGLE_MAPS_BASE_URL = os.getenv('GOOGLE_MAPS_BASE_URL', 'https://maps.googleapis.com').rstrip('/')
+WEATHER_API_BASE = os.getenv('WEATHER_API_BASE_URL', 'https://weather.googleapis.com').rstrip('/') + "/v1/forecast/days:lookup"
+
+# Anything with a requests-style get(); a pooled keep-alive session (with
+# timeouts) behind the shared Maps gateway (rate limit, retries, circuit
+# breaker), wrapped by a recording session by services/cassette.py.
+http_session = default_gateway.http(api_session)
 
 # Default clustering threshold in miles
 DEFAULT_CLUSTER_THRESHOLD_MILES = 50
+MILES_PER_DEGREE_LAT = 69.05
+
+# LEADER_CLUSTERING bounds each region's radius by the threshold;
+# DENSITY_CLUSTERING follows chains of nearby stops (a dense metro area of
+# any size is one region) and needs this many neighbours to extend a chain.
+LEADER_CLUSTERING = "leader"
+DENSITY_CLUSTERING = "density"
+DENSITY_MIN_NEIGHBORS = 2
+
+# Google Weather forecasts up to 10 days ahead. Trips within a week ask for 7
+# days so they share forecast cache entries with /weather.
+FORECAST_HORIZON_DAYS = 10
+DEFAULT_FORECAST_DAYS = 7
+
+# Region names and forecasts are fetched concurrently, bounded across all
+# /weather requests (the gateway still applies the shared rate limit).
+WEATHER_MAX_CONCURRENCY = int(os.getenv("WEATHER_MAX_CONCURRENCY", "16"))
+_executor = ThreadPoolExecutor(max_workers=WEATHER_MAX_CONCURRENCY, thread_name_prefix="weather")
 
 
 def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
@@ -32,7 +63,7 @@ def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> fl
     return R * c
 
 
-def reverse_geocode_region(lat: float, lng: float) -> str:
+def reverse_geocode_region(lat: float, lng: float, geocoder=None) -> str:
     """
     Use Google's Geocoding API to get a broader region name for coordinates.
     Returns a city/county level name instead of a specific place name.
@@ -40,25 +71,29 @@ def reverse_geocode_region(lat: float, lng: float) -> str:
     Args:
         lat: Latitude
         lng: Longitude
+        geocoder: services.geocoder.Geocoder; its reverse geocodes are cached
+            per ~5 km cell, so repeat lookups in a metro area are free
         
     Returns:
         A human-readable region name (e.g., "Los Angeles, CA" or "Cook County, IL")
     """
-    if not GOOGLE_MAPS_API_KEY:
-        return None
-    
-    url = f"https://maps.googleapis.com/maps/api/geocode/json?latlng={lat},{lng}&key={GOOGLE_MAPS_API_KEY}"
-    
     try:
-        response = requests.get(url)
-        response.raise_for_status()
-        data = response.json()
+        if geocoder is not None:
+            results = geocoder.reverse_geocode((lat, lng))
+        else:
+            if not GOOGLE_MAPS_API_KEY:
+                return None
+            url = f"{GOOGLE_MAPS_BASE_URL}/maps/api/geocode/json?latlng={lat},{lng}&key={GOOGLE_MAPS_API_KEY}"
+            response = http_session.get(url)
+            response.raise_for_status()
+            data = response.json()
+            results = data.get('results') if data.get('status') == 'OK' else None
         
-        if data.get('status') != 'OK' or not data.get('results'):
+        if not results:
             return None
         
         # Extract address components from the first result
-        components = data['results'][0].get('address_components', [])
+        components = results[0].get('address_components', [])
         
         locality = None  # City
         admin_area_2 = None  # County
@@ -88,59 +123,227 @@ def reverse_geocode_region(lat: float, lng: float) -> str:
         return None
 
 
-def cluster_locations(locations: List[Dict[str, Any]], threshold_miles: float = DEFAULT_CLUSTER_THRESHOLD_MILES) -> List[Dict[str, Any]]:
+def cluster_locations(
+    locations: List[Dict[str, Any]],
+    threshold_miles: float = DEFAULT_CLUSTER_THRESHOLD_MILES,
+    geocoder=None,
+    method: str = LEADER_CLUSTERING,
+) -> List[Dict[str, Any]]:
     """
-    Cluster locations by distance using a simple greedy algorithm.
+    Cluster locations by distance and name each cluster's region.
     
     Args:
         locations: List of location dicts with 'name', 'lat', 'lng' keys
-        threshold_miles: Maximum distance for locations to be in same cluster
+        threshold_miles: Maximum distance from a cluster's seed location
+            (LEADER_CLUSTERING) or between neighbouring locations
+            (DENSITY_CLUSTERING)
+        geocoder: Optional caching geocoder for region names
+        method: LEADER_CLUSTERING or DENSITY_CLUSTERING
         
     Returns:
-        List of cluster dicts, each with:
-        - 'centroid': { 'name', 'lat', 'lng' } (first location in cluster)
-        - 'locations': list of all locations in cluster
+        List of cluster dicts, in order of each cluster's first location, with:
+        - 'centroid': { 'name', 'lat', 'lng' } (mean position, named after
+          the closest location)
+        - 'locations': list of all locations in cluster, in input order
         - 'regionName': human-readable name for the region
     """
+    clusters = _group_locations(locations, threshold_miles, method)
+    for cluster, region_name in zip(clusters, _executor.map(lambda cluster: _region_name(cluster, geocoder), clusters)):
+        cluster['regionName'] = region_name
+    return clusters
+
+
+class _Grid:
+    """Buckets points into square cells at least cell_miles on a side, so
+    every point within cell_miles of a point is in its 3x3 neighbourhood."""
+
+    def __init__(self, cell_miles: float, max_abs_lat: float):
+        self.lat_step = cell_miles / MILES_PER_DEGREE_LAT
+        # Degrees of longitude shrink towards the poles; size columns for the
+        # trip's highest latitude so they are wide enough everywhere in it.
+        self.lng_step = self.lat_step / max(cos(radians(min(max_abs_lat, 89.0))), 1e-6)
+        self.cells: Dict[Tuple[int, int], List[int]] = {}
+
+    def cell(self, lat: float, lng: float) -> Tuple[int, int]:
+        return floor(lat / self.lat_step), floor(lng / self.lng_step)
+
+    def add(self, lat: float, lng: float, item: int) -> None:
+        self.cells.setdefault(self.cell(lat, lng), []).append(item)
+
+    def near(self, lat: float, lng: float) -> List[int]:
+        row, col = self.cell(lat, lng)
+        return [
+            item
+            for d_row in (-1, 0, 1)
+            for d_col in (-1, 0, 1)
+            for item in self.cells.get((row + d_row, col + d_col), ())
+        ]
+
+
+class _FineGrid:
+    """Buckets points into cells small enough that any two points in one are
+    within radius_miles of each other; around() lists the other cells that
+    can hold points within radius_miles of a cell's points."""
+
+    def __init__(self, radius_miles: float, lats: List[float]):
+        # A square cell's diagonal is side * sqrt(2); keep a margin for the
+        # flat-earth approximation.
+        side_miles = radius_miles / sqrt(2) * 0.99
+        self.lat_step = side_miles / MILES_PER_DEGREE_LAT
+        lowest = 0.0 if min(lats) <= 0 <= max(lats) else min(abs(lat) for lat in lats)
+        highest = min(max(abs(lat) for lat in lats), 89.0)
+        # Columns are no wider than side_miles at the trip's lowest latitude,
+        # and reach far enough for the narrower ones at its highest.
+        self.lng_step = self.lat_step / cos(radians(lowest))
+        rows = ceil(radius_miles / side_miles)
+        cols = ceil(radius_miles / (MILES_PER_DEGREE_LAT * cos(radians(highest)) * self.lng_step)) + 1
+        self.offsets = [
+            (d_row, d_col)
+            for d_row in range(-rows, rows + 1)
+            for d_col in range(-cols, cols + 1)
+            if d_row or d_col
+        ]
+
+    def cell(self, lat: float, lng: float) -> Tuple[int, int]:
+        return floor(lat / self.lat_step), floor(lng / self.lng_step)
+
+    def around(self, cell: Tuple[int, int]) -> List[Tuple[int, int]]:
+        row, col = cell
+        return [(row + d_row, col + d_col) for d_row, d_col in self.offsets]
+
+
+def _group_locations(
+    locations: List[Dict[str, Any]],
+    threshold_miles: float,
+    method: str = LEADER_CLUSTERING,
+) -> List[Dict[str, Any]]:
+    """
+    Cluster without naming, so region names can be requested concurrently.
+    
+    Locations are visited in a canonical (lat, lng, name) order and only
+    compared against neighbouring grid cells, so the result doesn't depend on
+    input order and neither method compares every pair of 1,000 stops, even
+    when they all sit in one metro.
+    """
     if not locations:
         return []
-    
-    clusters = []
-    
-    for location in locations:
-        lat = location['lat']
-        lng = location['lng']
-        
-        # Find if this location belongs to an existing cluster
-        assigned = False
-        for cluster in clusters:
-            centroid = cluster['centroid']
-            distance = haversine_distance(lat, lng, centroid['lat'], centroid['lng'])
-            
-            if distance <= threshold_miles:
-                cluster['locations'].append(location)
-                assigned = True
-                break
-        
-        # If no cluster found, create a new one
-        if not assigned:
-            # Use reverse geocoding to get a broader region name
-            region_name = reverse_geocode_region(lat, lng)
-            if not region_name:
-                # Fallback to location name if reverse geocoding fails
-                region_name = location['name']
-            
-            clusters.append({
-                'centroid': {
-                    'name': location['name'],
-                    'lat': lat,
-                    'lng': lng
-                },
-                'locations': [location],
-                'regionName': f"{region_name} Area"
-            })
-    
-    return clusters
+    points = [(float(location['lat']), float(location['lng'])) for location in locations]
+    order = sorted(range(len(locations)), key=lambda i: (points[i], str(locations[i].get('name') or '')))
+    if method == DENSITY_CLUSTERING:
+        groups = _density_groups(points, order, threshold_miles)
+    elif method == LEADER_CLUSTERING:
+        groups = _leader_groups(points, order, threshold_miles, _Grid(threshold_miles, max(abs(lat) for lat, _ in points)))
+    else:
+        raise ValueError(f"Unknown clustering method: {method}")
+    groups = sorted((sorted(group) for group in groups), key=lambda group: group[0])
+    return [_make_cluster([locations[i] for i in group], [points[i] for i in group]) for group in groups]
+
+
+def _leader_groups(points, order, threshold_miles, grid) -> List[List[int]]:
+    """Each location joins the nearest cluster seed within threshold_miles,
+    or seeds a new cluster."""
+    groups: List[List[int]] = []
+    for i in order:
+        lat, lng = points[i]
+        best, best_distance = None, None
+        for group_index in grid.near(lat, lng):
+            seed_lat, seed_lng = points[groups[group_index][0]]
+            distance = haversine_distance(lat, lng, seed_lat, seed_lng)
+            if distance <= threshold_miles and (best is None or (distance, group_index) < (best_distance, best)):
+                best, best_distance = group_index, distance
+        if best is None:
+            grid.add(lat, lng, len(groups))
+            groups.append([i])
+        else:
+            groups[best].append(i)
+    return groups
+
+
+def _density_groups(points, order, threshold_miles, min_neighbors: int = DENSITY_MIN_NEIGHBORS) -> List[List[int]]:
+    """
+    DBSCAN: clusters grow through core locations, those with at least
+    min_neighbors others within threshold_miles. A border location joins the
+    cluster of its nearest core location; isolated locations get their own.
+
+    Runs on cells small enough that a cell's locations are all within
+    threshold_miles of each other: a crowded cell is core without any
+    distance checks and neighbouring core cells join on the first close pair,
+    so one dense metro costs a handful of comparisons rather than one per
+    pair of stops.
+    """
+    grid = _FineGrid(threshold_miles, [lat for lat, _ in points])
+    cell_of = {i: grid.cell(*points[i]) for i in order}
+    cells: Dict[Tuple[int, int], List[int]] = {}
+    for i in order:
+        cells.setdefault(cell_of[i], []).append(i)
+
+    def close(i: int, j: int) -> bool:
+        return haversine_distance(*points[i], *points[j]) <= threshold_miles
+
+    def is_core(i: int) -> bool:
+        members = cells[cell_of[i]]
+        if len(members) > min_neighbors:
+            return True
+        nearby = (j for cell in grid.around(cell_of[i]) for j in cells.get(cell, ()) if close(i, j))
+        return len(members) - 1 + sum(1 for _ in islice(nearby, min_neighbors)) >= min_neighbors
+
+    core_points = {i for i in order if is_core(i)}
+    core: Dict[Tuple[int, int], List[int]] = {}
+    for i in order:
+        if i in core_points:
+            core.setdefault(cell_of[i], []).append(i)
+
+    parent = {cell: cell for cell in core}
+
+    def root(cell: Tuple[int, int]) -> Tuple[int, int]:
+        while parent[cell] != cell:
+            parent[cell] = parent[parent[cell]]
+            cell = parent[cell]
+        return cell
+
+    for cell in sorted(core):
+        for other in grid.around(cell):
+            if other > cell and other in core and root(other) != root(cell) and any(
+                close(i, j) for i in core[cell] for j in core[other]
+            ):
+                parent[root(other)] = root(cell)
+
+    groups: Dict[Any, List[int]] = {}
+    for i in order:
+        if i in core_points:
+            groups.setdefault(root(cell_of[i]), []).append(i)
+            continue
+        reach = [
+            (haversine_distance(*points[i], *points[j]), j)
+            for cell in (cell_of[i], *grid.around(cell_of[i]))
+            for j in core.get(cell, ())
+        ]
+        reach = [candidate for candidate in reach if candidate[0] <= threshold_miles]
+        key = root(cell_of[min(reach)[1]]) if reach else ("noise", i)
+        groups.setdefault(key, []).append(i)
+    return list(groups.values())
+
+
+def _make_cluster(members: List[Dict[str, Any]], points: List[Tuple[float, float]]) -> Dict[str, Any]:
+    lat = sum(point[0] for point in points) / len(points)
+    lng = sum(point[1] for point in points) / len(points)
+    closest = min(range(len(members)), key=lambda i: haversine_distance(lat, lng, *points[i]))
+    return {
+        'centroid': {
+            'name': members[closest]['name'],
+            'lat': lat,
+            'lng': lng
+        },
+        'locations': members,
+    }
+
+
+def _region_name(cluster: Dict[str, Any], geocoder=None) -> str:
+    centroid = cluster['centroid']
+    # Use reverse geocoding to get a broader region name, falling back to
+    # the location name if reverse geocoding fails
+    region_name = reverse_geocode_region(centroid['lat'], centroid['lng'], geocoder) or centroid['name']
+    return f"{region_name} Area"
 
 
 def get_daily_forecast(lat: float, lng: float, days: int = 7) -> List[Dict[str, Any]]:
@@ -160,7 +363,7 @@ def get_daily_forecast(lat: float, lng: float, days: int = 7) -> List[Dict[str,
     
     url = f"{WEATHER_API_BASE}?key={GOOGLE_MAPS_API_KEY}&location.latitude={lat}&location.longitude={lng}&days={days}"
     
-    response = requests.get(url)
+    response = http_session.get(url)
     response.raise_for_status()
     
     data = response.json()
@@ -190,60 +393,170 @@ def get_daily_forecast(lat: float, lng: float, days: int = 7) -> List[Dict[str,
     return simplified_forecast
 
 
+# Shared by every /weather request: repeat views of an area are answered from
+# memory, and stale forecasts are refreshed in the background.
+forecast_cache = ForecastCache(get_daily_forecast)
+
+
 def get_weather_for_clusters(clusters: List[Dict[str, Any]], days: int = 7) -> List[Dict[str, Any]]:
     """
-    Fetch weather data for each cluster's centroid.
+    Fetch weather data for each cluster's centroid, concurrently.
     
     Args:
         clusters: List of cluster objects from cluster_locations()
         days: Number of days to fetch
         
     Returns:
-        List of weather region objects with forecast data
+        List of weather region objects with forecast data, in cluster order
     """
-    weather_regions = []
-    
-    for cluster in clusters:
-        centroid = cluster['centroid']
-        
-        try:
-            forecast = get_daily_forecast(centroid['lat'], centroid['lng'], days)
-            weather_regions.append({
-                'regionName': cluster['regionName'],
-                'centroid': centroid,
-                'locationCount': len(cluster['locations']),
-                'forecast': forecast
-            })
-        except Exception as e:
-            print(f"Error fetching weather for {cluster['regionName']}: {e}")
-            weather_regions.append({
-                'regionName': cluster['regionName'],
-                'centroid': centroid,
-                'locationCount': len(cluster['locations']),
-                'forecast': [],
-                'error': str(e)
-            })
-    
-    return weather_regions
-
-
-def get_weather_for_locations(locations: List[Dict[str, Any]], threshold_miles: float = DEFAULT_CLUSTER_THRESHOLD_MILES, days: int = 7) -> Dict[str, Any]:
+    return list(_executor.map(
+        lambda cluster: _weather_region(cluster, lambda: forecast_cache.get(cluster['centroid']['lat'], cluster['centroid']['lng'], days)),
+        clusters,
+    ))
+
+
+def _weather_region(cluster: Dict[str, Any], fetch_forecast: Callable[[], List[Dict[str, Any]]]) -> Dict[str, Any]:
+    centroid = cluster['centroid']
+    try:
+        return {
+            'regionName': cluster['regionName'],
+            'centroid': centroid,
+            'locationCount': len(cluster['locations']),
+            'forecast': fetch_forecast()
+        }
+    except Exception as e:
+        print(f"Error fetching weather for {cluster['regionName']}: {e}")
+        return {
+            'regionName': cluster['regionName'],
+            'centroid': centroid,
+            'locationCount': len(cluster['locations']),
+            'forecast': [],
+            'error': str(e)
+        }
+
+
+def get_weather_for_locations(
+    locations: List[Dict[str, Any]],
+    threshold_miles: float = DEFAULT_CLUSTER_THRESHOLD_MILES,
+    days: int = 7,
+    geocoder=None,
+    method: str = LEADER_CLUSTERING,
+) -> Dict[str, Any]:
     """
     Main entry point: cluster locations and fetch weather for each region.
     
+    Region names and forecasts for every cluster are all requested at once,
+    so the response takes about one round trip however many regions a trip
+    spans.
+    
     Args:
         locations: List of location dicts with 'name', 'lat', 'lng'
         threshold_miles: Distance threshold for clustering
         days: Number of forecast days
+        geocoder: Optional caching geocoder for region names
+        method: Clustering method, see cluster_locations
         
     Returns:
         Dict with 'regions' containing weather data for each cluster
     """
-    clusters = cluster_locations(locations, threshold_miles)
-    regions = get_weather_for_clusters(clusters, days)
+    clusters = _group_locations(locations, threshold_miles, method)
+    names = [_executor.submit(_region_name, cluster, geocoder) for cluster in clusters]
+    forecasts = [
+        _executor.submit(forecast_cache.get, cluster['centroid']['lat'], cluster['centroid']['lng'], days)
+        for cluster in clusters
+    ]
+    for cluster, name in zip(clusters, names):
+        cluster['regionName'] = name.result()
+    regions = [_weather_region(cluster, forecast.result) for cluster, forecast in zip(clusters, forecasts)]
     
     return {
         'regions': regions,
         'clusterCount': len(clusters),
         'thresholdMiles': threshold_miles
     }
+
+
+def get_weather_for_visits(
+    visits: List[Dict[str, Any]],
+    threshold_miles: float = DEFAULT_CLUSTER_THRESHOLD_MILES,
+    geocoder=None,
+    today: Optional[date] = None,
+) -> Dict[str, Any]:
+    """
+    Weather for the days a trip actually spends in each region.
+    
+    Like get_weather_for_locations, but each location also carries the
+    'date' (YYYY-MM-DD) it is visited. A region's forecast keeps only its
+    visit dates, and regions whose dates are all past or beyond the forecast
+    horizon are not fetched at all. Without any dates, every region gets the
+    next DEFAULT_FORECAST_DAYS days.
+    
+    Args:
+        visits: Location dicts with 'name', 'lat', 'lng' and optional 'date'
+        threshold_miles: Distance threshold for clustering
+        geocoder: Optional caching geocoder for region names
+        today: First forecast day for every region (defaults to each
+            region's local date; see _local_date)
+        
+    Returns:
+        Dict with 'regions' (each with the 'dates' it is visited and, for
+        dates the forecast doesn't reach, 'unavailableDates'), 'clusterCount'
+        and 'thresholdMiles'
+    """
+    clusters = _group_locations(visits, threshold_miles)
+    dated = any(visit.get('date') for visit in visits)
+
+    plans = []
+    for cluster in clusters:
+        # Trip dates and forecast displayDates are local to the region.
+        first_day = today or _local_date(cluster['centroid']['lng'])
+        last_day = first_day + timedelta(days=FORECAST_HORIZON_DAYS - 1)
+        dates = sorted({visit['date'] for visit in cluster['locations'] if visit.get('date')})
+        in_range = [day for day in dates if _in_range(day, first_day, last_day)]
+        days = DEFAULT_FORECAST_DAYS
+        if in_range and date.fromisoformat(in_range[-1]) >= first_day + timedelta(days=DEFAULT_FORECAST_DAYS):
+            days = FORECAST_HORIZON_DAYS
+        plans.append((dates, in_range, days if in_range or not dated else None))
+
+    names = [_executor.submit(_region_name, cluster, geocoder) for cluster in clusters]
+    forecasts = [
+        _executor.submit(forecast_cache.get, cluster['centroid']['lat'], cluster['centroid']['lng'], days) if days else None
+        for cluster, (_, _, days) in zip(clusters, plans)
+    ]
+    regions = []
+    for cluster, name, forecast, (dates, in_range, _) in zip(clusters, names, forecasts, plans):
+        cluster['regionName'] = name.result()
+        if forecast is None:
+            fetch = list
+        elif dated:
+            fetch = lambda forecast=forecast, in_range=set(in_range): [day for day in forecast.result() if day['date'] in in_range]
+        else:
+            fetch = forecast.result
+        region = _weather_region(cluster, fetch)
+        region['dates'] = dates
+        if dated and len(in_range) < len(dates):
+            region['unavailableDates'] = [day for day in dates if day not in in_range]
+        regions.append(region)
+
+    return {
+        'regions': regions,
+        'clusterCount': len(clusters),
+        'thresholdMiles': threshold_miles
+    }
+
+
+def _local_date(lng: float, now: Optional[datetime] = None) -> date:
+    """
+    The calendar date at a longitude, using its solar UTC offset (15 degrees
+    per hour). Political time zones and DST can differ by an hour or two,
+    which only matters that close to local midnight.
+    """
+    now = now or datetime.now(timezone.utc)
+    return (now + timedelta(hours=round(lng / 15))).date()
+
+
+def _in_range(day: str, first: date, last: date) -> bool:
+    try:
+        return first <= date.fromisoformat(day) <= last
+    except ValueError:
+        return False